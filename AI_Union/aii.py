@@ -1,8 +1,84 @@
 # -*- coding: utf-8 -*-
 """
-aii.py v9.8.4
+aii.py v9.9.8
 RDZEŃ MASTER BRAIN - EriAmo Union + Prefrontal Cortex + Quantum Emotions + FractalHorizon
 
+ZMIANY v9.9.8:
+- BUGFIX: sketch admisji ChunkLexicon jako osobny komponent punktu
+  kontrolnego ('chunk_sketch', licznik sketch_revision) — zapisywany po
+  samych zliczeniach fraz, bez przepisywania chunks.json
+
+ZMIANY v9.9.7:
+- BUGFIX: bez FractalMemory D_Map to DMapMatrix.D_Map (hooki jak
+  _IndexedDMap) — MemoryMatrix odświeżana przy każdym wstawieniu, podmianie
+  i usunięciu; macierz trzymana wg długości D_Map (v9.9.5) zwracała stary
+  wiersz po podmianie rekordu pod tym samym kluczem (/remember dwa razy
+  w sekundzie) i po usunięciu + dodaniu (_prune_memory, potem /read)
+
+ZMIANY v9.9.6:
+- FractalMemory.horizon = fractal_horizon — wstawienia, podmiany i usunięcia
+  w D_Map aktualizują kolumny wagi/głębokości horyzontu, więc auto_decay()
+  zostaje maską po własnych kolumnach
+
+ZMIANY v9.9.5:
+- WYDAJNOŚĆ: _memory_matrix() bez FractalMemory nie buduje MemoryMatrix
+  z D_Map przy każdym zapytaniu — macierz trzymana dla tego samego słownika
+  o tej samej długości, _touch_memory() odświeża w niej wiersz
+
+ZMIANY v9.9.4:
+- BUGFIX: PersistenceWorker dostaje checkpoint(strict=True) — nieudany zapis
+  komponentu w tle to błąd wątku, a nie zapis zakończony (flush() → False)
+
+ZMIANY v9.9.3:
+- WYDAJNOŚĆ: _sync_kurz_hybrid() — dominujące osie wszystkich słów leksykonu
+  jednym argmax na EvolvingLexicon.matrix zamiast np.array(wektor) per słowo
+
+ZMIANY v9.9.2:
+- /read, /remember i /activate nie zapisują synchronicznie — request_save()
+  zgłasza zapis do PersistenceWorker (checkpoint.py), który skleja serię
+  żądań i wykonuje checkpoint() w tle; /save nadal zapisuje od razu.
+  Komponenty zapisują kopię stanu (D_Map przez WAL FractalMemory / kopię
+  słownika dla SoulIO); EriAmoUnion.stop() czeka na persistence.flush()
+- VectorCortex.save(): zapis sklonowanych tensorów
+
+ZMIANY v9.9.1:
+- save() = CheckpointManager.checkpoint(): zapis tylko komponentów, których
+  licznik zmian (FractalMemory.generation, ChunkLexicon/VectorCortex/
+  FractalHorizon.revision) zmienił się od ostatniego zapisu — równolegle,
+  za atomowym manifestem data/checkpoint.json
+- Dusza zapisywana raz: przez FractalMemory, a SoulIO tylko bez niej
+  (wcześniej save() pisał .soul dwa razy)
+- VectorCortex.revision — liczba kroków uczenia
+
+ZMIANY v9.9.0:
+- save()/load(): stan kwantowy przez QuantumBridge.save_state()/load_state()
+  (binarny quantum_state.npz, przepisywany tylko po zmianie stanu; stary
+  quantum_state.json wczytywany, gdy .npz jeszcze nie istnieje)
+
+ZMIANY v9.8.9:
+- _touch_memory(): odświeża też wagę/głębokość kwantu na horyzoncie
+  (FractalHorizon.auto_decay czyta je z kolumn, nie z D_Map)
+
+ZMIANY v9.8.8:
+- WYDAJNOŚĆ: _quantum_explore() punktuje wszystkie przefiltrowane wspomnienia
+  jednym wywołaniem QuantumBridge.score_memories() zamiast pętli per wiersz
+
+ZMIANY v9.8.7:
+- Horyzont: save()/sync_all_from_fractal() dostają FractalMemory.generation —
+  przy zgodnym snapshocie start pomija pełną resynchronizację
+
+ZMIANY v9.8.6:
+- AttentionCortex.run_cycle(): fractal_horizon.advance() — materializacja
+  analitycznej ewolucji horyzontu w tle (recall horyzontu tylko czyta)
+
+ZMIANY v9.8.5:
+- WYDAJNOŚĆ: _resonance_traditional, _instinct_search, _find_memories_for_chunk,
+  _quantum_explore i introspective_echo punktują wspomnienia na MemoryMatrix
+  (jeden matmul + maski) zamiast np.array(wektor_C_Def) per rekord per zapytanie
+- _set_weight()/_touch_memory(): mutacje wag i /activate odświeżają wiersz macierzy
+- WYDAJNOŚĆ: _lexical_overlap() z list postingowych FractalMemory (indeks odwrócony);
+  _instinct_search liczy składnik wektorowy tylko dla kandydatów z overlap > 0
+
 ZMIANY v9.8.4:
 - BUGFIX: NameError w interact() – 'status' undefined gdy last_winner_id nie istnieje w D_Map
   Dodano bezpieczny return "[RL] Brak aktywnego wspomnienia w pamięci." jako fallback
@@ -25,6 +101,7 @@ import re
 import json
 import random
 import string
+from functools import partial
 import numpy as np
 import torch
 import torch.nn as nn
@@ -37,6 +114,8 @@ except ImportError:
     sys.exit(1)
 
 import haiku
+from memory_matrix import MemoryMatrix, DMapMatrix
+from checkpoint import CheckpointManager, PersistenceWorker
 
 try:
     import fractal
@@ -119,6 +198,7 @@ class VectorCortex:
         )
         self.optimizer = optim.Adam(self.model.parameters(), lr=0.01)
         self.criterion = nn.MSELoss()
+        self.revision = 0   # kroki uczenia od startu — licznik zmian dla checkpoint.py
 
     def predict(self, current_vector):
         current_vector = np.array(current_vector)
@@ -139,10 +219,13 @@ class VectorCortex:
         loss = self.criterion(self.model(tp), ta)
         loss.backward()
         self.optimizer.step()
+        self.revision += 1
         return loss.item()
 
     def save(self, path):
-        try: torch.save(self.model.state_dict(), f"{path}.cortex.pt")
+        # Klony tensorów — learn() może trwać w trakcie zapisu w tle
+        state = {k: v.detach().clone() for k, v in self.model.state_dict().items()}
+        try: torch.save(state, f"{path}.cortex.pt")
         except: pass
 
     def load(self, path):
@@ -163,6 +246,8 @@ class AttentionCortex:
         # Auto-decay starych, słabych wspomnień na horyzoncie
         if getattr(self.brain, "fractal_horizon", None):
             self.brain.fractal_horizon.auto_decay(self.brain.D_Map)
+            # Leniwa materializacja ewolucji kwantów (recall jej nie wymaga)
+            self.brain.fractal_horizon.advance()
         if len(self.brain.D_Map) > self.max_memories:
             self._prune_memory()
         mem_id = random.choice(list(self.brain.D_Map.keys()))
@@ -190,12 +275,14 @@ class AttentionCortex:
         idx = np.argmax(self.brain.context_vector)
         if self.brain.context_vector[idx] < 0.2:
             return
-        candidates = [e for e in self.brain.D_Map.values()
-                      if len(np.array(e.get('wektor_C_Def', [0]*15))) > idx
-                      and np.array(e.get('wektor_C_Def', [0]*15))[idx] > 0.4]
-        if candidates:
-            echo = random.choice(candidates)
-            echo['weight'] = min(1.0, echo.get('weight', 0.5) + 0.05)
+        matrix = self.brain._memory_matrix()
+        with matrix.lock:
+            rows = np.nonzero(matrix.vectors[:, idx] > 0.4)[0]
+            if rows.size == 0:
+                return
+            echo_id = matrix.ids[random.choice(rows)]
+            echo = self.brain.D_Map[echo_id]
+            self.brain._set_weight(echo_id, min(1.0, echo.get('weight', 0.5) + 0.05))
             print(f"{Colors.MAGENTA}[REFLEKSJA]{Colors.RESET} Echo {self.brain.AXES_ORDER[idx].upper()}: \"{echo['tresc'][:60]}...\"")
 
     def reflect_on_input(self, text, input_vec):
@@ -214,7 +301,7 @@ class AttentionCortex:
 # ────────────────────────────────────────────────────────────────
 
 class AII:
-    VERSION = "9.8.4"
+    VERSION = "9.9.8"
     AXES_ORDER = UnionConfig.AXES
     DIM = UnionConfig.DIMENSION
 
@@ -230,7 +317,8 @@ class AII:
 
     def __init__(self, standalone_mode=True):
         self.standalone_mode = standalone_mode
-        self.D_Map = {}
+        # Bez FractalMemory: hooki DMapMatrix utrzymują MemoryMatrix D_Map
+        self.D_Map = DMapMatrix(dim=self.DIM).D_Map
         self.context_vector = np.zeros(self.DIM, dtype=np.float32)
         self.last_winner_id = None
         self.EMOTION_DECAY = 0.96
@@ -276,6 +364,12 @@ class AII:
         if self.soul_io and hasattr(self.soul_io, 'filepath'):
             self.cortex.load(self.soul_io.filepath)
 
+        # Punkt kontrolny: to, co właśnie wczytano, jest już na dysku
+        self.checkpoints = CheckpointManager(self._get_data_dir(), verbose=self.standalone_mode)
+        self._register_checkpoints()
+        self.persistence = PersistenceWorker(partial(self.checkpoints.checkpoint, strict=True),
+                                             name="aii-persistence")
+
         added = self._sync_kurz_hybrid()
         if added > 0:
             print(f"{Colors.GREEN}[KURZ] Zsynchronizowano {added} odruchów.{Colors.RESET}")
@@ -288,8 +382,17 @@ class AII:
         if HORIZON_AVAILABLE:
             try:
                 self.fractal_horizon = FractalHorizon(data_dir=self._get_data_dir())
+                # Przed synchronizacją — jej zmiany mają trafić do następnego zapisu
+                self.checkpoints.register(
+                    'horizon', self._save_horizon, generation=lambda: self.fractal_horizon.revision,
+                    files=[os.path.join(self.fractal_horizon.data_dir, self.fractal_horizon.SNAPSHOT_FILE)])
                 if self.D_Map:
-                    self.fractal_horizon.sync_all_from_fractal(self.D_Map)
+                    self.fractal_horizon.sync_all_from_fractal(
+                        self.D_Map, generation=getattr(self.fractal_memory, 'generation', None))
+                owner = getattr(self.D_Map, '_owner', None)
+                if owner is not None:
+                    # Hooki D_Map odświeżają wagę/głębokość kwantów (auto_decay czyta kolumny)
+                    owner.horizon = self.fractal_horizon
                 s = self.fractal_horizon.state()
                 print(f"{Colors.CYAN}[HORYZONT] Aktywny — {s['quanta']} kwantów, "
                       f"do emergencji: {s['until_emergence']}{Colors.RESET}")
@@ -341,7 +444,7 @@ class AII:
             mod = 0.2 if stripped == '+' else -0.3
             if self.last_winner_id in self.D_Map:
                 old = self.D_Map[self.last_winner_id].get('weight', 0.5)
-                self.D_Map[self.last_winner_id]['weight'] = np.clip(old + mod, 0.1, 1.0)
+                self._set_weight(self.last_winner_id, np.clip(old + mod, 0.1, 1.0))
                 status = "Wzmocniono" if mod > 0 else "Osłabiono"
                 print(f"{Colors.CYAN}[RL] {status} (waga: {self.D_Map[self.last_winner_id]['weight']:.2f}){Colors.RESET}")
                 return f"[RL] {status}."
@@ -396,7 +499,7 @@ class AII:
                 if instinct_candidates:
                     instinct_candidates = self.quantum.rank_candidates(instinct_candidates, top_n=5)
                     _, winner_id, winner_entry = instinct_candidates[0]
-                    winner_entry['weight'] = min(1.0, winner_entry.get('weight', 0.5) + 0.01)
+                    self._set_weight(winner_id, min(1.0, winner_entry.get('weight', 0.5) + 0.01))
                     self.last_winner_id = winner_id
                     resp = self._clean_resp(winner_entry['tresc'])
                     print(f"{Colors.GREEN}[INSTYNKT+Q]{Colors.RESET} {resp[:80]}")
@@ -533,32 +636,29 @@ class AII:
         input_words = set(re.findall(r'\w+', text.lower())) - {
             'to', 'jest', 'w', 'z', 'na', 'się', 'czy', 'i', 'a', 'o', 'do', 'co', 'jak'
         }
-        candidates = []
-        for mid, entry in self.D_Map.items():
-            content = entry.get('tresc', '')
-            if content.count('→') > 1 or len(content.split()) < 3:
-                continue
-            mem_vec = np.array(entry.get('wektor_C_Def', np.zeros(self.DIM)))
-            if np.sum(np.abs(mem_vec)) < 0.01:
-                continue
-            text_overlap = len(input_words & set(re.findall(r'\w+', content.lower())))
-            score = (self.quantum._memory_resonance(mem_vec) * 0.5
-                     + self.quantum._memory_phase_alignment(mem_vec) * 0.3
-                     + text_overlap * 0.2)
-            score *= (0.5 + entry.get('weight', 0.5))
-            if entry.get('_type', '') in ('@MEMORY', '@READ'):
-                score *= 1.5
-            candidates.append((score, mid, entry))
-        if not candidates:
-            return None
-        candidates.sort(key=lambda x: x[0], reverse=True)
-        top = candidates[:top_n]
+        matrix = self._memory_matrix()
+        with matrix.lock:
+            mask = ((matrix.arrows <= 1) & (matrix.words >= 3)
+                    & (np.abs(matrix.vectors).sum(axis=1) >= 0.01))
+            rows = np.nonzero(mask)[0]
+            if rows.size == 0:
+                return None
+            overlap = self._lexical_overlap(matrix, input_words)
+            # Cała przefiltrowana pamięć jednym wsadem (QuantumBridge.score_memories)
+            resonance, _, phase = self.quantum.score_memories(
+                matrix.vectors[rows].astype(np.float64))
+            scores = resonance * 0.5 + phase * 0.3 + overlap[rows] * 0.2
+            scores *= 0.5 + matrix.weights[rows]
+            scores *= np.where(matrix.type_mask('@MEMORY', '@READ')[rows], 1.5, 1.0)
+            order = np.argsort(-scores, kind='stable')[:top_n]
+            ids = matrix.ids
+            top = [(float(scores[k]), ids[rows[k]], self.D_Map[ids[rows[k]]]) for k in order]
         if len(top) > 1:
             top = self.quantum.rank_candidates(top, top_n=top_n)
         winner_score, winner_id, winner_entry = top[0]
         if winner_score < 0.3:
             return None
-        winner_entry['weight'] = min(1.0, winner_entry.get('weight', 0.5) + 0.005)
+        self._set_weight(winner_id, min(1.0, winner_entry.get('weight', 0.5) + 0.005))
         self.last_winner_id = winner_id
         dom_pl = self.quantum.state.dominant_emotion()
         dom_name = EN_TO_PL.get(dom_pl[0], dom_pl[0])
@@ -573,26 +673,14 @@ class AII:
         if not all_words:
             return []
         vec = emotional_vector if emotional_vector is not None else np.zeros(self.DIM)
-        candidates = []
-        for mid, entry in self.D_Map.items():
-            content = entry.get('tresc', '')
-            overlap = all_words & set(re.findall(r'\w+', content.lower()))
-            if not overlap or len(content.split()) < 4 or content.count('→') >= 2:
-                continue
-            score = len(overlap) * 6.0
-            mem_vec = np.array(entry.get('wektor_C_Def', np.zeros(self.DIM)))
-            if np.linalg.norm(mem_vec) > 0 and np.linalg.norm(vec) > 0:
-                score += np.dot(vec, mem_vec) * 3.0
-            if entry.get('_type', '') in ('@MEMORY', '@READ'):
-                score *= 1.8
-            word_count = len(content.split())
-            if word_count > 15:
-                score *= max(0.5, 1.0 - (word_count - 15) * 0.02)
-            score *= (0.5 + entry.get('weight', 0.5))
-            if score > threshold:
-                candidates.append((score, mid, entry))
-        candidates.sort(key=lambda x: x[0], reverse=True)
-        return candidates[:10]
+        matrix = self._memory_matrix()
+        with matrix.lock:
+            overlap = self._lexical_overlap(matrix, all_words)
+            # Tylko kandydaci z list postingowych — reszta i tak odpada (overlap == 0)
+            rows = np.nonzero((overlap > 0) & (matrix.words >= 4) & (matrix.arrows < 2))[0]
+            scores = self._classical_scores(matrix, overlap, 6.0, vec, 3.0, rows=rows)
+            keep = scores > threshold
+            return self._top_candidates(matrix, rows[keep], scores[keep], limit=10)
 
     def _apply_emotion_saturation(self, impact_vec):
         self.context_vector = np.clip(self.context_vector + impact_vec, 0.0, 1.0)
@@ -603,15 +691,15 @@ class AII:
             self.quantum.sync_from_aii()
 
     def _sync_kurz_hybrid(self):
-        if not self.kurz or not self.lexicon or not hasattr(self.lexicon, 'words'):
+        if not self.kurz or not self.lexicon or not hasattr(self.lexicon, 'matrix'):
             return 0
         added = 0
-        for word, data in self.lexicon.words.items():
-            vector = np.array(data.get('wektor', np.zeros(self.DIM)))
-            if np.sum(vector) > 0:
-                sector = self.AXES_ORDER[np.argmax(vector)]
-                if self.kurz.add_trigger(sector, word):
-                    added += 1
+        vectors = self.lexicon.matrix
+        rows = np.nonzero(vectors.sum(axis=1) > 0)[0]
+        vocabulary = self.lexicon.vocabulary
+        for row, axis in zip(rows.tolist(), vectors[rows].argmax(axis=1).tolist()):
+            if self.kurz.add_trigger(self.AXES_ORDER[axis], vocabulary[row]):
+                added += 1
         if added > 0:
             self.kurz._recompile_patterns()
         return added
@@ -637,52 +725,29 @@ class AII:
         if self.quantum and len(candidates) > 1:
             candidates = self.quantum.rank_candidates(candidates, top_n=5)
         _, winner_id, winner_entry = candidates[0]
-        winner_entry['weight'] = min(1.0, winner_entry.get('weight', 0.5) + 0.015)
+        self._set_weight(winner_id, min(1.0, winner_entry.get('weight', 0.5) + 0.015))
         self.last_winner_id = winner_id
         return self._clean_resp(winner_entry['tresc'])
 
     def _find_memories_for_chunk(self, chunk, vec):
-        candidates = []
         chunk_words = set(chunk.text.lower().split())
-        for mid, entry in self.D_Map.items():
-            content = entry.get('tresc', '')
-            if content.count('→') >= 2:
-                continue
-            score = len(chunk_words & set(content.lower().split())) * 8.0
-            mem_vec = np.array(entry.get('wektor_C_Def', np.zeros(self.DIM)))
-            if np.linalg.norm(mem_vec) > 0 and np.linalg.norm(vec) > 0:
-                score += np.dot(vec, mem_vec) * 4.0
-            if entry.get('_type', '') in ('@MEMORY', '@READ'):
-                score *= 1.8
-            word_count = len(content.split())
-            if word_count > 15:
-                score *= max(0.5, 1.0 - (word_count - 15) * 0.02)
-            score *= (0.5 + entry.get('weight', 0.5))
-            if score > 0.5:
-                candidates.append((score, mid, entry))
-        return sorted(candidates, key=lambda x: x[0], reverse=True)
+        matrix = self._memory_matrix()
+        with matrix.lock:
+            overlap = self._lexical_overlap(matrix, chunk_words, split=True)
+            scores = self._classical_scores(matrix, overlap, 8.0, vec, 4.0)
+            rows = np.nonzero((matrix.arrows < 2) & (scores > 0.5))[0]
+            return self._top_candidates(matrix, rows, scores[rows])
 
     def _resonance_traditional(self, vec, text, threshold=0.15):
         sig_words = set(re.findall(r'\w+', text.lower())) - {
             'to', 'jest', 'w', 'z', 'na', 'się', 'czy', 'i', 'a', 'o', 'do'
         }
-        candidates = []
-        for mid, entry in self.D_Map.items():
-            content = entry.get('tresc', '')
-            if content.count('→') >= 2:
-                continue
-            score = len(sig_words & set(re.findall(r'\w+', content.lower()))) * 6.5
-            mem_vec = np.array(entry.get('wektor_C_Def', np.zeros(self.DIM)))
-            if np.linalg.norm(mem_vec) > 0 and np.linalg.norm(vec) > 0:
-                score += np.dot(vec, mem_vec) * 3.0
-            if entry.get('_type', '') in ('@MEMORY', '@READ'):
-                score *= 1.8
-            word_count = len(content.split())
-            if word_count > 15:
-                score *= max(0.5, 1.0 - (word_count - 15) * 0.02)
-            score *= (0.5 + entry.get('weight', 0.5))
-            if score > threshold:
-                candidates.append((score, mid, entry))
+        matrix = self._memory_matrix()
+        with matrix.lock:
+            overlap = self._lexical_overlap(matrix, sig_words)
+            scores = self._classical_scores(matrix, overlap, 6.5, vec, 3.0)
+            rows = np.nonzero((matrix.arrows < 2) & (scores > threshold))[0]
+            candidates = self._top_candidates(matrix, rows, scores[rows])
         if not candidates:
             if self.quantum and self.D_Map:
                 explored = self._quantum_explore(text)
@@ -692,14 +757,75 @@ class AII:
             if "Neutralny" in dom:
                 return "Hmm... nie wiem jeszcze co o tym myśleć. Powiedz mi więcej."
             return f"[{dom}] To mnie ciekawi... opowiedz więcej."
-        candidates.sort(key=lambda x: x[0], reverse=True)
         if self.quantum and len(candidates) > 1:
             candidates = self.quantum.rank_candidates(candidates, top_n=5)
         _, winner_id, winner_entry = candidates[0]
-        winner_entry['weight'] = min(1.0, winner_entry.get('weight', 0.5) + 0.01)
+        self._set_weight(winner_id, min(1.0, winner_entry.get('weight', 0.5) + 0.01))
         self.last_winner_id = winner_id
         return self._clean_resp(winner_entry['tresc'])
 
+    # ────────────────────────────────────────────────────────────────
+    # WEKTOROWE PUNKTOWANIE WSPOMNIEŃ (MemoryMatrix)
+    # ────────────────────────────────────────────────────────────────
+
+    def _memory_matrix(self):
+        """
+        MemoryMatrix właściciela D_Map (FractalMemory albo DMapMatrix — hooki
+        wstawienia/usunięcia); zwykły dict przypisany z zewnątrz — budowana ad hoc.
+        """
+        matrix = getattr(getattr(self.D_Map, '_owner', None), 'matrix', None)
+        if matrix is not None:
+            return matrix
+        return MemoryMatrix.from_dmap(self.D_Map, self.DIM)
+
+    def _set_weight(self, mid, weight):
+        """Ustawia wagę wspomnienia i odświeża jego wiersz w MemoryMatrix."""
+        self.D_Map[mid]['weight'] = weight
+        self._touch_memory(mid)
+
+    def _touch_memory(self, mid):
+        owner = getattr(self.D_Map, '_owner', None)
+        if owner is not None:
+            owner.touch(mid)
+        if self.fractal_horizon is not None and mid in self.D_Map:
+            self.fractal_horizon.touch(mid, self.D_Map[mid])
+
+    def _lexical_overlap(self, matrix, words, split=False):
+        """Liczba wspólnych słów zapytania i treści, per wiersz macierzy."""
+        if not words:
+            return np.zeros(len(matrix), dtype=np.float64)
+        if matrix is getattr(self.fractal_memory, 'matrix', None):
+            return self.fractal_memory.lexical_overlap(words, split=split)
+        # Fallback bez FractalMemory — tokenizacja każdej treści
+        overlap = np.zeros(len(matrix), dtype=np.float64)
+        for row, mid in enumerate(matrix.ids):
+            content = self.D_Map[mid].get('tresc', '').lower()
+            tokens = content.split() if split else re.findall(r'\w+', content)
+            overlap[row] = len(words & set(tokens))
+        return overlap
+
+    def _classical_scores(self, matrix, overlap, lex_weight, vec, vec_weight, rows=None):
+        """
+        score = overlap·lex_weight + (M·vec)·vec_weight,
+        ×1.8 dla @MEMORY/@READ, kara za >15 słów, ×(0.5 + waga).
+        rows — liczy tylko dla podzbioru wierszy (wynik wyrównany do rows).
+        """
+        sel = slice(None) if rows is None else rows
+        scores = overlap[sel] * lex_weight + matrix.dot(vec, rows).astype(np.float64) * vec_weight
+        scores *= np.where(matrix.type_mask('@MEMORY', '@READ')[sel], 1.8, 1.0)
+        words = matrix.words[sel]
+        scores *= np.where(words > 15, np.maximum(0.5, 1.0 - (words - 15) * 0.02), 1.0)
+        scores *= 0.5 + matrix.weights[sel]
+        return scores
+
+    def _top_candidates(self, matrix, rows, scores, limit=None):
+        """Lista (score, mem_id, entry) dla wierszy rows, malejąco po score."""
+        order = np.argsort(-scores, kind='stable')
+        if limit is not None:
+            order = order[:limit]
+        ids = matrix.ids
+        return [(float(scores[k]), ids[rows[k]], self.D_Map[ids[rows[k]]]) for k in order]
+
     def _handle_cmd(self, cmd):
         parts = cmd.split(maxsplit=1)
         c = parts[0].lower()
@@ -807,7 +933,7 @@ class AII:
                         try: self.fractal_horizon.sync_from_fractal(record)
                         except Exception: pass
                     added += 1
-                self.save()
+                self.request_save()
                 return f"{Colors.GREEN}Wczytano {added} linii ({activated} aktywowanych emocjonalnie).{Colors.RESET}"
             except Exception as e:
                 return f"{Colors.RED}Błąd: {e}{Colors.RESET}"
@@ -836,7 +962,7 @@ class AII:
                 'fractal': {'depth': 3, 'parent_id': None, 'children_ids': []}
             }
             self.D_Map[mid] = record
-            self.save()
+            self.request_save()
             if self.fractal_horizon:
                 try:
                     self.fractal_horizon.sync_from_fractal(record)
@@ -846,11 +972,14 @@ class AII:
 
         elif c == '/activate':
             reactivated = 0
-            for mid, entry in self.D_Map.items():
-                if entry.get('_type', '') not in ('@READ', '@MEMORY'):
-                    continue
-                old_vec = np.array(entry.get('wektor_C_Def', np.zeros(self.DIM)))
-                if np.count_nonzero(old_vec > 0.1) >= 2:
+            matrix = self._memory_matrix()
+            with matrix.lock:
+                stale = (matrix.type_mask('@READ', '@MEMORY')
+                         & (np.count_nonzero(matrix.vectors > 0.1, axis=1) < 2))
+                stale_ids = [matrix.ids[r] for r in np.nonzero(stale)[0]]
+            for mid in stale_ids:
+                entry = self.D_Map.get(mid)
+                if entry is None:
                     continue
                 new_vec = np.zeros(self.DIM)
                 if self.kurz:
@@ -864,9 +993,10 @@ class AII:
                 if np.sum(new_vec) < 0.01:
                     new_vec[self.AXES_ORDER.index('wiedza')] = 0.3
                 entry['wektor_C_Def'] = new_vec.tolist()
+                self._touch_memory(mid)
                 reactivated += 1
             if reactivated > 0:
-                self.save()
+                self.request_save()
             return f"{Colors.GREEN}Aktywowano {reactivated} wspomnień (przeskanowano przez KURZ).{Colors.RESET}"
 
         elif c == '/quantum':
@@ -890,31 +1020,60 @@ class AII:
         return f"{Colors.RED}Nieznana komenda. /help{Colors.RESET}"
 
     def save(self):
-        if self.soul_io:
-            self.soul_io.save_stream(self.D_Map)
-        if self.chunk_lexicon:
-            self.chunk_lexicon.save()
-        if self.soul_io and hasattr(self.soul_io, 'filepath'):
-            self.cortex.save(self.soul_io.filepath)
-        if self.fractal_memory:
-            try: self.fractal_memory.save()
-            except Exception as e: print(f"[FRACTAL SAVE] Błąd: {e}")
+        """Punkt kontrolny: zapisuje tylko komponenty zmienione od ostatniego zapisu."""
+        self.checkpoints.checkpoint()
 
-        # POPRAWKA: bezpieczna ścieżka
+    def request_save(self):
+        """Zapis w tle: komenda wraca od razu, seria żądań = jeden checkpoint."""
+        self.persistence.request()
+
+    # ─────────────────────────────────────────────────────────────
+    # PUNKT KONTROLNY (checkpoint.py)
+    # ─────────────────────────────────────────────────────────────
+
+    def _register_checkpoints(self):
+        """Dusza, chunki, kora i stan kwantowy — horyzont rejestruje się przy tworzeniu."""
+        cp = self.checkpoints
+        soul_path = self.soul_io.filepath if self.soul_io and hasattr(self.soul_io, 'filepath') else None
+        if self.fractal_memory:
+            # Dusza tylko przez FractalMemory (WAL / snapshot) — bez drugiego zapisu przez SoulIO
+            fm = self.fractal_memory
+            cp.register('soul', self._save_soul, generation=lambda: fm.generation, files=[fm.soul_file])
+        elif self.soul_io:
+            # Bez licznika zmian zwykłego D_Map — zapis przy każdym punkcie kontrolnym
+            cp.register('soul', self._save_soul, files=[soul_path] if soul_path else [])
+        if self.chunk_lexicon:
+            lex = self.chunk_lexicon
+            cp.register('chunks', lex.save_chunks, generation=lambda: lex.revision, files=[lex.chunk_file])
+            if lex.admit_count > 1:
+                cp.register('chunk_sketch', lex.save_sketch,
+                            generation=lambda: lex.sketch_revision, files=[lex.sketch_file])
+        if soul_path:
+            cp.register('cortex', lambda: self.cortex.save(soul_path),
+                        generation=lambda: self.cortex.revision, files=[f"{soul_path}.cortex.pt"])
         if self.quantum:
-            try:
-                base_dir = self._get_data_dir()
-                os.makedirs(base_dir, exist_ok=True)
-                qpath = os.path.join(base_dir, "quantum_state.json")
-                with open(qpath, 'w', encoding='utf-8') as f:
-                    json.dump(self.quantum.to_dict(), f, indent=2, ensure_ascii=False)
-                print(f"{Colors.GREEN}[QUANTUM SAVE] → {qpath}{Colors.RESET}")
-            except Exception as e:
-                print(f"[QUANTUM SAVE] Błąd: {e}")
+            # QuantumBridge sam pomija niezmieniony stan (i odświeża chwilę zapisu)
+            cp.register('quantum', self._save_quantum,
+                        files=[os.path.join(self._get_data_dir(), self.quantum.SNAPSHOT_FILE)])
 
-        if self.fractal_horizon:
-            try: self.fractal_horizon.save()
-            except Exception as e: print(f"[HORYZONT SAVE] Błąd: {e}")
+    def _save_soul(self):
+        if self.fractal_memory:
+            if not self.fractal_memory.save():
+                raise IOError("zapis FractalMemory nieudany")
+        else:
+            self.soul_io.save_stream(dict(self.D_Map))
+
+    def _save_quantum(self) -> bool:
+        base_dir = self._get_data_dir()
+        # .npz przepisywany tylko gdy stan zmienił się od ostatniego zapisu
+        written = self.quantum.save_state(base_dir)
+        if written:
+            qpath = os.path.join(base_dir, self.quantum.SNAPSHOT_FILE)
+            print(f"{Colors.GREEN}[QUANTUM SAVE] → {qpath}{Colors.RESET}")
+        return written
+
+    def _save_horizon(self):
+        self.fractal_horizon.save(generation=getattr(self.fractal_memory, 'generation', None))
 
     def load(self):
         if self.soul_io:
@@ -924,15 +1083,13 @@ class AII:
                     entry.setdefault('weight', 0.5)
                     entry.setdefault('time', time.time())
                     entry.setdefault('_type', '@MEMORY')
-                self.D_Map = loaded
+                self.D_Map = DMapMatrix(loaded, self.DIM).D_Map
 
         # POPRAWKA: bezpieczna ścieżka
         if self.quantum:
             try:
-                qpath = os.path.join(self._get_data_dir(), "quantum_state.json")
-                if os.path.exists(qpath):
-                    with open(qpath, 'r', encoding='utf-8') as f:
-                        self.quantum.from_dict(json.load(f))
+                qpath = self.quantum.load_state(self._get_data_dir())
+                if qpath:
                     print(f"{Colors.GREEN}[QUANTUM] Załadowano fazy z {qpath}{Colors.RESET}")
             except Exception as e:
                 print(f"[QUANTUM LOAD] Błąd: {e}")
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+ann_index.py v1.0.0
+Przybliżone wyszukiwanie najbliższych sąsiadów (cosine) dla FractalMemory.
+
+RandomProjectionLSH — SimHash w czystym NumPy:
+  - n_tables tablic, każda z n_bits losowymi hiperpłaszczyznami przez zero
+  - hiperpłaszczyzny zawierają przekątną (1,1,…,1): wektory wspomnień leżą
+    w dodatnim ortancie, a płaszczyzna nieprzecinająca ortantu daje bit stały
+  - sygnatura = bity znaku rzutów → klucz int → kubełek (zbiór mem_id)
+  - query = kubełek własny w każdej tablicy (+ opcjonalnie kubełki
+    w odległości Hamminga 1, multiprobe=True)
+
+Domyślnie 16 tablic × 16 bitów bez multi-probe: przy 30k–150k wektorach
+emocjonalnych ~150–800 kandydatów, top-5 zgodne z pełnym skanem w ~97%.
+
+Indeks zwraca tylko KANDYDATÓW — dokładny cosine liczy wołający
+(re-rank na MemoryMatrix), więc progi 0.7 (link) i 0.5 (rodzic)
+pozostają dokładne dla znalezionych kandydatów.
+
+Interfejs (wymienny): add(mem_id, vec), remove(mem_id), query(vec) → set, clear(), len();
+opcjonalnie add_many(mem_ids, vecs) — hurtowe wstawienie przy wczytaniu pliku.
+"""
+
+import numpy as np
+from collections import defaultdict
+from typing import Dict, Set
+
+try:
+    from union_config import DIMENSION
+except ImportError:
+    DIMENSION = 15
+
+
+class RandomProjectionLSH:
+    """Indeks LSH z losowymi rzutami (SimHash) dla podobieństwa cosinusowego."""
+
+    def __init__(self, dim: int = DIMENSION, n_tables: int = 16, n_bits: int = 16,
+                 multiprobe: bool = False, seed: int = 615):
+        self.dim = dim
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.multiprobe = multiprobe
+        # Stały seed — te same kubełki po każdym restarcie
+        rng = np.random.default_rng(seed)
+        planes = rng.standard_normal((n_tables, n_bits, dim))
+        diagonal = np.ones(dim) / np.sqrt(dim)
+        planes -= (planes @ diagonal)[..., None] * diagonal
+        self._planes = planes.astype(np.float32)
+        self._bit_values = (1 << np.arange(n_bits)).astype(np.int64)
+        self._tables = [defaultdict(set) for _ in range(n_tables)]
+        self._keys: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _signature(self, vec: np.ndarray) -> np.ndarray:
+        bits = (self._planes @ np.asarray(vec, dtype=np.float32)) > 0   # (T, B)
+        return bits.astype(np.int64) @ self._bit_values                  # (T,)
+
+    def add(self, mem_id: str, vec: np.ndarray):
+        self.add_keys(mem_id, self._signature(vec))
+
+    def add_many(self, mem_ids, vecs: np.ndarray):
+        """Hurtowe wstawienie — sygnatury jednym mnożeniem macierzy."""
+        if not len(mem_ids):
+            return
+        for mem_id in mem_ids:
+            if mem_id in self._keys:
+                self.remove(mem_id)
+        bits = np.einsum('tbd,nd->ntb', self._planes, np.asarray(vecs, dtype=np.float32)) > 0
+        keys = bits.astype(np.int64) @ self._bit_values                      # (N, T)
+        ids = np.array(mem_ids, dtype=object)
+        # Grupowanie po kluczu w każdej tablicy: jeden update() na kubełek
+        for t, table in enumerate(self._tables):
+            order = np.argsort(keys[:, t], kind='stable')
+            sorted_keys = keys[order, t]
+            starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+            sorted_ids = ids[order].tolist()
+            bounds = starts.tolist() + [len(sorted_ids)]
+            for key, lo, hi in zip(sorted_keys[starts].tolist(), bounds[:-1], bounds[1:]):
+                bucket = table.get(key)
+                if bucket is None:
+                    table[key] = set(sorted_ids[lo:hi])
+                else:
+                    bucket.update(sorted_ids[lo:hi])
+        self._keys.update(zip(mem_ids, keys))
+
+    def add_keys(self, mem_id: str, keys: np.ndarray):
+        if mem_id in self._keys:
+            self.remove(mem_id)
+        for table, key in zip(self._tables, keys.tolist()):
+            table[key].add(mem_id)
+        self._keys[mem_id] = keys
+
+    def remove(self, mem_id: str):
+        keys = self._keys.pop(mem_id, None)
+        if keys is None:
+            return
+        for table, key in zip(self._tables, keys.tolist()):
+            bucket = table.get(key)
+            if bucket is not None:
+                bucket.discard(mem_id)
+                if not bucket:
+                    del table[key]
+
+    def clear(self):
+        for table in self._tables:
+            table.clear()
+        self._keys.clear()
+
+    def query(self, vec: np.ndarray) -> Set[str]:
+        """Kandydaci: mem_id z kubełków zapytania (+ sąsiednich przy multiprobe)."""
+        candidates: Set[str] = set()
+        for table, key in zip(self._tables, self._signature(vec).tolist()):
+            bucket = table.get(key)
+            if bucket:
+                candidates |= bucket
+            if self.multiprobe:
+                for bit in range(self.n_bits):
+                    bucket = table.get(key ^ (1 << bit))
+                    if bucket:
+                        candidates |= bucket
+        return candidates
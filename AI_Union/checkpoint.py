@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+checkpoint.py v1.1.1
+Skoordynowany punkt kontrolny wszystkich zapisywanych komponentów AII.
+
+Zamiast przepisywać przy każdym /save, /read, /remember i zamknięciu całą
+duszę, chunks.json, korę (.pt), stan kwantowy i horyzont — każdy komponent
+rejestruje się z licznikiem zmian (generation), a checkpoint() zapisuje tylko te,
+których licznik zmienił się od ostatniego udanego zapisu:
+
+  soul     → FractalMemory.save()       licznik: FractalMemory.generation
+  chunks   → ChunkLexicon.save()        licznik: ChunkLexicon.revision
+  cortex   → VectorCortex.save()        licznik: VectorCortex.revision
+  quantum  → QuantumBridge.save_state() własne śledzenie zmian (generation=None)
+  horizon  → FractalHorizon.save()      licznik: FractalHorizon.revision
+
+- zmienione komponenty zapisywane równolegle (wątki; każdy zapis sam robi
+  tmp + os.replace), potem JEDEN atomowy manifest checkpoint.json:
+  {"version": 1, "seq": 7, "saved_at": ...,
+   "components": {"soul": {"generation": 1234, "seq": 7, "saved_at": ..., "files": [...]}}}
+  — wpis komponentu zmienia się tylko, gdy jego zapis się udał
+- licznik czytany PRZED zapisem: zmiana w trakcie zapisu zostawia komponent
+  brudnym do następnego checkpoint()
+- save() rzucające wyjątek = komponent dalej brudny; zwracające False = nie
+  było czego zapisać (stan zgodny z dyskiem, manifest bez zmian)
+- register() zakłada, że stan właśnie wczytany = stan na dysku (gdy istnieją
+  wszystkie pliki komponentu); inaczej pierwszy checkpoint() go zapisze
+
+ZMIANY v1.1.1:
+- BUGFIX: PersistenceWorker uznaje żądania za zapisane tylko po udanym save();
+  błąd trafia do last_error, a flush() ponawia zapis i zwraca False, gdy się
+  nie udał. checkpoint(strict=True) rzuca CheckpointError, gdy save()
+  któregoś komponentu zawiódł (AII przekazuje tak checkpoint() do wątku)
+
+ZMIANY v1.1.0:
+- PersistenceWorker: wątek zapisu w tle — request() wraca od razu, seria
+  żądań w oknie PERSIST_COALESCE_S to jeden checkpoint(); flush() to bariera
+  (czeka aż wszystkie wcześniejsze żądania są na dysku) — tylko przy zamknięciu.
+  Komponenty zapisywane równolegle z wątkiem interakcji biorą na starcie
+  save() własną kopię stanu; zmiana w trakcie zapisu zostawia je brudnymi
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+try:
+    from union_config import UnionConfig, Colors
+    _PARALLEL_DEFAULT = getattr(UnionConfig, 'CHECKPOINT_PARALLEL', True)
+    _WORKERS_DEFAULT = getattr(UnionConfig, 'CHECKPOINT_WORKERS', 4)
+    _COALESCE_DEFAULT = getattr(UnionConfig, 'PERSIST_COALESCE_S', 0.25)
+except ImportError:
+    _PARALLEL_DEFAULT = True
+    _WORKERS_DEFAULT = 4
+    _COALESCE_DEFAULT = 0.25
+    class Colors:
+        GREEN = "\033[32m"
+        RED = "\033[31m"
+        RESET = "\033[0m"
+
+# Licznik niezarejestrowany — komponent zawsze brudny
+_UNSAVED = object()
+
+
+class CheckpointError(RuntimeError):
+    """checkpoint(strict=True): zapis co najmniej jednego komponentu się nie udał."""
+
+
+@dataclass
+class CheckpointComponent:
+    """Zapisywany komponent: zapis, licznik zmian (None = śledzi sam) i jego pliki."""
+    name: str
+    save: Callable[[], Optional[bool]]
+    generation: Optional[Callable[[], int]] = None
+    files: List[str] = field(default_factory=list)
+    saved_generation: object = _UNSAVED
+
+    def current(self):
+        return None if self.generation is None else self.generation()
+
+    def is_dirty(self) -> bool:
+        # Bez licznika save() jest wołane zawsze (komponent sam pomija zapis)
+        return self.generation is None or self.saved_generation != self.current()
+
+
+class CheckpointManager:
+    """Zapis tylko zmienionych komponentów, równolegle, za atomowym manifestem."""
+
+    MANIFEST_FILE = "checkpoint.json"
+    MANIFEST_VERSION = 1
+
+    def __init__(self, data_dir: str = "data", parallel: Optional[bool] = None,
+                 workers: Optional[int] = None, verbose: bool = False):
+        self.data_dir = data_dir
+        self.path = os.path.join(data_dir, self.MANIFEST_FILE)
+        self.parallel = _PARALLEL_DEFAULT if parallel is None else parallel
+        self.workers = max(1, workers or _WORKERS_DEFAULT)
+        self.verbose = verbose
+        self.components: Dict[str, CheckpointComponent] = {}
+        self._lock = threading.Lock()
+        self.manifest = self._read_manifest()
+        self.seq = int(self.manifest.get('seq', 0))
+
+    # ─────────────────────────────────────────────────────────────
+    # REJESTRACJA
+    # ─────────────────────────────────────────────────────────────
+
+    def register(self, name: str, save: Callable[[], Optional[bool]],
+                 generation: Optional[Callable[[], int]] = None, files: List[str] = ()):
+        """
+        Dodaje komponent. Gdy wszystkie jego pliki istnieją, bieżący licznik
+        uznawany jest za zapisany (stan właśnie wczytany z tych plików).
+        """
+        component = CheckpointComponent(name, save, generation, list(files))
+        if component.files and all(os.path.exists(p) for p in component.files):
+            component.saved_generation = component.current()
+        self.components[name] = component
+        return component
+
+    def mark_clean(self, *names: str):
+        """Bieżący stan komponentów (domyślnie wszystkich) = stan na dysku."""
+        for name in names or list(self.components):
+            component = self.components[name]
+            component.saved_generation = component.current()
+
+    def dirty(self) -> List[str]:
+        return [name for name, c in self.components.items() if c.is_dirty()]
+
+    # ─────────────────────────────────────────────────────────────
+    # PUNKT KONTROLNY
+    # ─────────────────────────────────────────────────────────────
+
+    def checkpoint(self, force: bool = False, strict: bool = False) -> Dict[str, Optional[bool]]:
+        """
+        Zapisuje brudne komponenty (force — wszystkie), potem manifest.
+        Zwraca nazwa → True (zapisany) / False (bez zmian) / None (błąd)
+        dla komponentów, których save() zostało wywołane. strict — błąd
+        któregokolwiek komponentu rzuca CheckpointError (po zapisie manifestu
+        dla udanych; nieudane zostają brudne).
+        """
+        with self._lock:
+            pending = [c for c in self.components.values() if force or c.is_dirty()]
+            if not pending:
+                return {}
+            # Licznik sprzed zapisu — zmiany w trakcie zostaną na następny raz
+            generations = {c.name: c.current() for c in pending}
+
+            if self.parallel and len(pending) > 1:
+                with ThreadPoolExecutor(max_workers=min(self.workers, len(pending)),
+                                        thread_name_prefix="checkpoint") as pool:
+                    results = dict(zip([c.name for c in pending], pool.map(self._save_one, pending)))
+            else:
+                results = {c.name: self._save_one(c) for c in pending}
+
+            for c in pending:
+                if results[c.name] is not None:
+                    c.saved_generation = generations[c.name]
+            saved = [c for c in pending if results[c.name]]
+            if saved:
+                self._commit(saved, generations)
+            if self.verbose and (saved or None in results.values()):
+                failed = [name for name, ok in results.items() if ok is None]
+                print(f"{Colors.GREEN}[CHECKPOINT] #{self.seq}: "
+                      f"{', '.join(c.name for c in saved) or '—'}{Colors.RESET}"
+                      + (f" {Colors.RED}błąd: {', '.join(failed)}{Colors.RESET}" if failed else ""))
+            if strict and None in results.values():
+                failed = [name for name, ok in results.items() if ok is None]
+                raise CheckpointError(f"Nieudany zapis: {', '.join(failed)}")
+            return results
+
+    def _save_one(self, component: CheckpointComponent) -> Optional[bool]:
+        try:
+            return component.save() is not False
+        except Exception as e:
+            print(f"{Colors.RED}[CHECKPOINT] {component.name}: {e}{Colors.RESET}")
+            return None
+
+    def _commit(self, saved: List[CheckpointComponent], generations: dict):
+        """Podbija seq i atomowo przepisuje manifest z wpisami zapisanych komponentów."""
+        self.seq += 1
+        now = time.time()
+        entries = dict(self.manifest.get('components', {}))
+        for component in saved:
+            entries[component.name] = {
+                'generation': generations[component.name],
+                'seq': self.seq,
+                'saved_at': now,
+                'files': [os.path.relpath(p, self.data_dir) for p in component.files],
+            }
+        self.manifest = {'version': self.MANIFEST_VERSION, 'seq': self.seq,
+                         'saved_at': now, 'components': entries}
+        self._write_manifest()
+
+    # ─────────────────────────────────────────────────────────────
+    # MANIFEST
+    # ─────────────────────────────────────────────────────────────
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            return manifest if isinstance(manifest, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self):
+        os.makedirs(self.data_dir, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ZAPIS W TLE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class PersistenceWorker:
+    """
+    Wątek wykonujący save() poza wątkiem interakcji.
+
+    request() tylko odnotowuje żądanie; wątek czeka coalesce [s] na kolejne
+    i wykonuje jeden zapis dla całej serii. flush() czeka, aż zapis obejmie
+    wszystkie żądania złożone przed jego wywołaniem (bez okna sklejania).
+
+    save() rzucające wyjątek = żądania niezapisane: błąd w last_error,
+    ponowienie przy następnym request() albo flush().
+    """
+
+    def __init__(self, save: Callable[[], object], coalesce: Optional[float] = None,
+                 name: str = "persistence"):
+        self.save = save
+        self.coalesce = _COALESCE_DEFAULT if coalesce is None else coalesce
+        self.name = name
+        self._cond = threading.Condition()
+        self._requested = 0     # numer ostatniego żądania
+        self._attempted = 0     # żądania objęte zakończoną próbą zapisu
+        self._done = 0          # żądania objęte udanym zapisem
+        self._flushing = 0      # liczba czekających flush()
+        self.last_error: Optional[Exception] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def request(self):
+        """Zgłasza potrzebę zapisu i wraca natychmiast."""
+        with self._cond:
+            self._request_locked()
+
+    def _request_locked(self):
+        self._requested += 1
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        self._cond.notify_all()
+
+    def pending(self) -> bool:
+        with self._cond:
+            return self._done < self._requested
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Bariera: True gdy wszystkie dotychczasowe żądania są zapisane.
+        Po nieudanej próbie ponawia zapis; False — błąd (last_error) albo timeout.
+        """
+        with self._cond:
+            target = self._requested
+            if self._done >= target:
+                return True
+            if self._attempted >= target:
+                # Ostatnia próba zawiodła i nic nowego nie czeka — ponów
+                self._request_locked()
+                target = self._requested
+            self._flushing += 1
+            self._cond.notify_all()
+            try:
+                self._cond.wait_for(lambda: self._attempted >= target, timeout)
+                return self._done >= target
+            finally:
+                self._flushing -= 1
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._attempted < self._requested)
+                # Okno sklejania — kolejne request() dołączają do tego zapisu
+                self._cond.wait_for(lambda: self._flushing > 0, self.coalesce)
+                target = self._requested
+            error = None
+            try:
+                self.save()
+            except Exception as e:
+                error = e
+                print(f"{Colors.RED}[PERSISTENCE] Błąd zapisu w tle: {e}{Colors.RESET}")
+            with self._cond:
+                self._attempted = target
+                if error is None:
+                    self._done = target
+                else:
+                    self.last_error = error
+                self._cond.notify_all()
@@ -1,9 +1,53 @@
 # -*- coding: utf-8 -*-
 """
-chunk_lexicon.py v1.1.0
+chunk_lexicon.py v1.3.5
 Pełna zaawansowana architektura językowa.
 Autor: Maciej A. Mazur & Claude
 
+ZMIANY v1.3.5:
+- WYDAJNOŚĆ: _ChunkTrie.matches() zwraca trafienia w kubełkach długości —
+  analyze_text_chunks() idzie od najdłuższych i sortuje tylko w obrębie
+  kubełka (po kolejności dodania), zamiast jednego sortowania wszystkich
+  trafień. Świadomie nie zachłanne przejście od lewej: zmieniłoby pokrycie
+  i chunks_found względem reguły "najpierw dłuższe"
+
+ZMIANY v1.3.4:
+- BUGFIX: zliczenia i starzenie sketcha admisji mają własny licznik
+  (sketch_revision) — punkt kontrolny zapisuje <chunks>.sketch.npy
+  (save_sketch()) także wtedy, gdy żaden chunk się nie zmienił; postęp fraz
+  widzianych < CHUNK_ADMIT_COUNT razy nie ginie przy restarcie. save() =
+  save_chunks() + save_sketch()
+
+ZMIANY v1.3.3:
+- BUGFIX: save() zapisuje chunks.json i <chunks>.sketch.npy przez plik
+  tymczasowy + os.replace — crash w trakcie zapisu (także w tle) nie zostawia
+  uciętego pliku, który load() wczytałby jako pusty słownik
+
+ZMIANY v1.3.2:
+- save() serializuje kopię listy chunków i tablicy sketcha — bezpieczny przy
+  zapisie w tle (PersistenceWorker) równolegle z uczeniem
+
+ZMIANY v1.3.1:
+- revision — licznik zmian słownika (nowe/usunięte chunki, częstości) dla
+  punktu kontrolnego (checkpoint.py); samo odświeżenie primingu go nie podbija
+  (priming wygasa w minutę, last_seen nie jest zapisywany)
+
+ZMIANY v1.3.0:
+- Ograniczony słownik chunków (UnionConfig.CHUNK_MAX): po przekroczeniu limitu
+  eviction LFU z zanikiem — score = frequency × (1 + priming) × exp(−wiek/τ),
+  usuwane najsłabsze do 90% limitu
+- Admisja przez count-min sketch: n-gram staje się chunkiem dopiero po
+  CHUNK_ADMIT_COUNT wystąpieniach (1 = stare zachowanie); sketch starzeje się
+  (połowienie liczników) przy każdej eviction, zapis w <chunks>.sketch.npy
+- Wektory emocjonalne we wspólnej tablicy N×15 (_VectorStore), LanguageChunk
+  trzyma tylko slot (+ __slots__); chunks.json zapisywany bez wcięć
+
+ZMIANY v1.2.0:
+- WYDAJNOŚĆ: analyze_text_chunks() przez trie słów (_ChunkTrie) aktualizowane
+  przyrostowo w extract_chunks_from_text()/load() — jedno przejście po słowach
+  wejścia zamiast sortowania wszystkich chunków i prób w każdej pozycji.
+  Wynik identyczny: najpierw dłuższe, potem kolejność dodania, potem pozycja
+
 FIX: Naprawiono brak metody from_dict w klasie LanguageChunk.
 ZMIANY: Obsługa flagi verbose dla cichego uczenia.
 """
@@ -13,19 +57,115 @@ import json
 import time
 import re
 import os
+import zlib
 from typing import Dict, List, Optional
 from union_config import UnionConfig, Colors
 
+CHUNK_MAX = getattr(UnionConfig, 'CHUNK_MAX', 50000)
+CHUNK_ADMIT_COUNT = getattr(UnionConfig, 'CHUNK_ADMIT_COUNT', 2)
+CHUNK_DECAY_TAU = getattr(UnionConfig, 'CHUNK_DECAY_TAU', 7 * 24 * 3600.0)
+
+
+class _VectorStore:
+    """Wspólna tablica wektorów emocjonalnych chunków (wiersz = slot, wolne sloty wracają)."""
+
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, dim: int = UnionConfig.DIMENSION):
+        self.dim = dim
+        self.vectors = np.zeros((self.INITIAL_CAPACITY, dim))
+        self._free: List[int] = []
+        self._next = 0
+
+    def alloc(self, vector) -> int:
+        if self._free:
+            slot = self._free.pop()
+        else:
+            if self._next >= len(self.vectors):
+                grown = np.zeros((len(self.vectors) * 2, self.dim))
+                grown[:len(self.vectors)] = self.vectors
+                self.vectors = grown
+            slot = self._next
+            self._next += 1
+        self.vectors[slot] = vector
+        return slot
+
+    def release(self, slot: int):
+        self._free.append(slot)
+
+
+class _CountMinSketch:
+    """Przybliżone liczniki n-gramów przed admisją (crc32 z różnymi ziarnami)."""
+
+    def __init__(self, width: int = 1 << 16, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int32)
+        self.revision = 0   # licznik zmian tablicy (punkt kontrolny <chunks>.sketch.npy)
+
+    def _cells(self, key: str) -> list:
+        data = key.encode('utf-8')
+        return [zlib.crc32(data, seed) % self.width for seed in range(self.depth)]
+
+    def add(self, key: str) -> int:
+        """Zlicza wystąpienie i zwraca oszacowanie (min po wierszach)."""
+        estimate = None
+        for row, cell in enumerate(self._cells(key)):
+            self.table[row, cell] += 1
+            value = int(self.table[row, cell])
+            estimate = value if estimate is None else min(estimate, value)
+        self.revision += 1
+        return estimate
+
+    def age(self):
+        """Połowienie liczników — stare wystąpienia tracą znaczenie."""
+        self.table >>= 1
+        self.revision += 1
+
+
 class LanguageChunk:
+    __slots__ = ('text', 'words', 'length', 'frequency', 'last_seen',
+                 'priming_strength', '_vector', '_store', '_slot')
+
     def __init__(self, text: str, frequency: int = 1, emotional_vector: Optional[np.ndarray] = None):
         self.text = text.lower().strip()
         self.words = self.text.split()
         self.length = len(self.words)
         self.frequency = frequency
+        self._store = None
+        self._slot = -1
+        self._vector = None
         self.emotional_vector = emotional_vector if emotional_vector is not None else np.zeros(UnionConfig.DIMENSION)
         self.last_seen = time.time()
         self.priming_strength = 0.0
 
+    @property
+    def emotional_vector(self) -> np.ndarray:
+        """Wiersz wspólnej tablicy leksykonu (albo własny wektor poza leksykonem)."""
+        if self._store is not None:
+            return self._store.vectors[self._slot]
+        return self._vector
+
+    @emotional_vector.setter
+    def emotional_vector(self, value):
+        if self._store is not None:
+            self._store.vectors[self._slot] = value
+        else:
+            self._vector = value
+
+    def _attach(self, store: _VectorStore):
+        if self._store is None:
+            self._slot = store.alloc(self._vector)
+            self._store = store
+            self._vector = None
+
+    def _detach(self):
+        if self._store is not None:
+            self._vector = self._store.vectors[self._slot].copy()
+            self._store.release(self._slot)
+            self._store = None
+            self._slot = -1
+
     def update_priming(self):
         current_time = time.time()
         decay = np.exp(-(current_time - self.last_seen) / 60.0)
@@ -49,15 +189,146 @@ class LanguageChunk:
         c.priming_strength = data.get('priming_strength', 0.0)
         return c
 
+class _ChunkTrie:
+    """
+    Trie po słowach: ścieżka = words chunka, węzeł końcowy trzyma
+    (kolejność dodania, chunk). Dopasowanie = przejście od każdej pozycji
+    wejścia najwyżej max_length słów w głąb — O(słowa × max_length).
+    """
+    _END = None  # klucz węzła końcowego (słowa to zawsze str)
+
+    def __init__(self):
+        self.root: dict = {}
+        self.size = 0
+        self.max_length = 0
+        self._seq = 0
+
+    def add(self, chunk: 'LanguageChunk'):
+        self.size += 1  # liczone też puste — porównywane z len(chunks)
+        if not chunk.words:
+            return
+        node = self.root
+        for word in chunk.words:
+            node = node.setdefault(word, {})
+        # Chunki o tych samych słowach: liczy się pierwszy dodany
+        # (w starym przeglądzie drugi zawsze trafiał na zajęty zakres)
+        node.setdefault(self._END, []).append((self._seq, chunk))
+        self._seq += 1
+        self.max_length = max(self.max_length, chunk.length)
+
+    def remove(self, chunk: 'LanguageChunk'):
+        self.size -= 1
+        if not chunk.words:
+            return
+        path = [self.root]
+        for word in chunk.words:
+            node = path[-1].get(word)
+            if node is None:
+                return
+            path.append(node)
+        terminal = path[-1].get(self._END, [])
+        terminal[:] = [entry for entry in terminal if entry[1] is not chunk]
+        if not terminal:
+            path[-1].pop(self._END, None)
+        # Przycięcie pustych gałęzi
+        for depth in range(len(chunk.words), 0, -1):
+            if path[depth]:
+                break
+            del path[depth - 1][chunk.words[depth - 1]]
+
+    def matches(self, words: List[str]) -> list:
+        """
+        Trafienia pogrupowane wg długości: buckets[długość] = [(kolejność,
+        pozycja, chunk)], w każdym kubełku pozycje rosnąco (kolejność przejścia).
+        """
+        n = len(words)
+        end = self._END
+        buckets = [[] for _ in range(self.max_length + 1)]
+        for i in range(n):
+            node = self.root
+            for j in range(i, min(n, i + self.max_length)):
+                node = node.get(words[j])
+                if node is None:
+                    break
+                terminal = node.get(end)
+                if terminal is not None:
+                    buckets[j - i + 1].append((terminal[0][0], i, terminal[0][1]))
+        return buckets
+
+
+def _write_replace(path, write):
+    """Zapis do <path>.tmp (fsync), potem os.replace — plik zawsze cały albo stary."""
+    tmp = path + ".tmp"
+    with open(tmp, 'wb') as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
 class ChunkLexicon:
-    def __init__(self, chunk_file: str = "data/chunks.json"):
+    EVICT_TO = 0.9  # eviction zostawia EVICT_TO × max_chunks
+
+    def __init__(self, chunk_file: str = "data/chunks.json", max_chunks: Optional[int] = None,
+                 admit_count: Optional[int] = None):
         self.chunk_file = chunk_file
+        self.max_chunks = max_chunks or CHUNK_MAX
+        self.admit_count = admit_count or CHUNK_ADMIT_COUNT
         self.chunks: Dict[str, LanguageChunk] = {}
+        self._trie = _ChunkTrie()
+        self._store = _VectorStore()
+        self._sketch = _CountMinSketch()
+        self.revision = 0   # licznik zmian do zapisu (checkpoint.py)
         self.load()
 
     @property
     def total_chunks(self): return len(self.chunks)
 
+    @property
+    def sketch_file(self) -> str:
+        return self.chunk_file + ".sketch.npy"
+
+    @property
+    def sketch_revision(self) -> int:
+        """Zmiany sketcha admisji (zliczenia, starzenie) — osobno od revision słownika."""
+        return self._sketch.revision
+
+    def _add_chunk(self, key: str, chunk: LanguageChunk):
+        chunk._attach(self._store)
+        self.chunks[key] = chunk
+        self._trie.add(chunk)
+        self.revision += 1
+
+    def _remove_chunk(self, key: str):
+        chunk = self.chunks.pop(key)
+        self._trie.remove(chunk)
+        chunk._detach()
+        self.revision += 1
+
+    def _evict(self):
+        """LFU z zanikiem: usuwa najsłabsze chunki do EVICT_TO × max_chunks."""
+        excess = len(self.chunks) - int(self.max_chunks * self.EVICT_TO)
+        if len(self.chunks) <= self.max_chunks or excess <= 0:
+            return 0
+        now = time.time()
+        keys = list(self.chunks)
+        objs = list(self.chunks.values())
+        frequency = np.fromiter((c.frequency for c in objs), dtype=float, count=len(objs))
+        priming = np.fromiter((c.priming_strength for c in objs), dtype=float, count=len(objs))
+        age = now - np.fromiter((c.last_seen for c in objs), dtype=float, count=len(objs))
+        score = frequency * (1.0 + priming) * np.exp(-age / CHUNK_DECAY_TAU)
+        for idx in np.argpartition(score, excess - 1)[:excess].tolist():
+            self._remove_chunk(keys[idx])
+        self._sketch.age()
+        return excess
+
+    def _ensure_trie(self):
+        """Przebudowa gdy ktoś zmienił self.chunks z pominięciem _add_chunk()."""
+        if self._trie.size != len(self.chunks):
+            self._trie = _ChunkTrie()
+            for chunk in self.chunks.values():
+                self._trie.add(chunk)
+
     def extract_chunks_from_text(self, text: str):
         words = re.sub(r'[^\w\s]', '', text.lower()).split()
         for n in range(2, 6):
@@ -66,25 +337,41 @@ class ChunkLexicon:
                 if phrase in self.chunks:
                     self.chunks[phrase].frequency += 1
                     self.chunks[phrase].update_priming()
+                    self.revision += 1
+                elif self.admit_count <= 1:
+                    self._add_chunk(phrase, LanguageChunk(phrase))
                 else:
-                    self.chunks[phrase] = LanguageChunk(phrase)
+                    # Admisja: dopiero K-te wystąpienie tworzy chunk
+                    seen = self._sketch.add(phrase)
+                    if seen >= self.admit_count:
+                        self._add_chunk(phrase, LanguageChunk(phrase, frequency=seen))
+        self._evict()
 
     def analyze_text_chunks(self, text: str, verbose: bool = True) -> dict:
         words = text.lower().split()
         if not words: return {"coverage": 0.0, "emotional_vector": np.zeros(UnionConfig.DIMENSION), "chunks_found": []}
         
+        self._ensure_trie()
         found = []
-        covered = set()
-        sorted_keys = sorted(self.chunks.keys(), key=lambda x: self.chunks[x].length, reverse=True)
-        for pk in sorted_keys:
-            c_obj = self.chunks[pk]
-            for i in range(len(words) - c_obj.length + 1):
-                if words[i:i+c_obj.length] == c_obj.words:
-                    idx_range = set(range(i, i + c_obj.length))
-                    if not (idx_range & covered):
-                        found.append(c_obj); covered.update(idx_range); c_obj.update_priming()
-
-        coverage = len(covered) / len(words)
+        covered = [False] * len(words)
+        n_covered = 0
+        # Kolejność jak dawniej: dłuższe chunki najpierw, remisy wg kolejności
+        # dodania, w obrębie chunka od lewej; trafienie bierze wolny zakres.
+        # Zachłanne przejście od lewej dałoby inne pokrycie ("a b" + "b c d"
+        # w "a b c d"), więc kubełki długości zamiast jednego przebiegu
+        buckets = self._trie.matches(words)
+        for length in range(len(buckets) - 1, 0, -1):
+            bucket = buckets[length]
+            if len(bucket) > 1:
+                bucket.sort(key=lambda m: m[0])  # stabilne — pozycje zostają rosnąco
+            for _, i, c_obj in bucket:
+                end = i + length
+                if not any(covered[i:end]):
+                    covered[i:end] = [True] * length
+                    n_covered += length
+                    found.append(c_obj); c_obj.update_priming()
+
+        coverage = n_covered / len(words)
         
         # Wyświetlanie Match-logów tylko jeśli verbose=True (rozmowa)
         if verbose and coverage > 0:
@@ -99,14 +386,36 @@ class ChunkLexicon:
     def get_statistics(self): return {"total": self.total_chunks}
     
     def save(self):
+        self.save_chunks()
+        self.save_sketch()
+
+    def save_chunks(self):
         os.makedirs(os.path.dirname(self.chunk_file), exist_ok=True)
-        with open(self.chunk_file, 'w', encoding='utf-8') as f:
-            json.dump({'chunks': {t: c.to_dict() for t, c in self.chunks.items()}}, f, indent=2)
+        # Kopia pod zapis — słownik może rosnąć w trakcie (zapis w tle)
+        items = list(self.chunks.items())
+        _write_replace(self.chunk_file, lambda f: f.write(json.dumps(
+            {'chunks': {t: c.to_dict() for t, c in items}}, ensure_ascii=False).encode('utf-8')))
+
+    def save_sketch(self):
+        """Sketch admisji — postęp fraz widzianych < CHUNK_ADMIT_COUNT razy."""
+        if self.admit_count <= 1:
+            return
+        os.makedirs(os.path.dirname(self.chunk_file), exist_ok=True)
+        sketch = self._sketch.table.copy()
+        _write_replace(self.sketch_file, lambda f: np.save(f, sketch))
 
     def load(self):
         if os.path.exists(self.chunk_file):
             try:
                 with open(self.chunk_file, 'r', encoding='utf-8') as f:
                     d = json.load(f).get('chunks', {})
-                    for t, c in d.items(): self.chunks[t] = LanguageChunk.from_dict(c)
-            except: pass
\ No newline at end of file
+                    for t, c in d.items(): self._add_chunk(t, LanguageChunk.from_dict(c))
+            except: pass
+            self._evict()
+        if os.path.exists(self.sketch_file):
+            try:
+                table = np.load(self.sketch_file)
+                if table.shape == self._sketch.table.shape:
+                    self._sketch.table = table.astype(np.int32)
+            except Exception:
+                pass
\ No newline at end of file
@@ -1,12 +1,17 @@
 # decision_maker.py
+# v2.3 — pamięć podręczna rezonansu i Grover na tablicach NumPy
+# PERF v2.3: emotional_resonance memoizowany kluczem (bajty wektora stanu,
+#            emotional_cost) — bez deepcopy stanu i bez ponownego recall_combined
+#            dla tej samej opcji; invalidate_cache() woła most po interferencji
+# PERF v2.3: amplify_good_options — rezonanse wszystkich opcji jednym
+#            resonance_strength_batch, pętla Grovera na tablicy amplitud
 # v2.2 — poprawki semantyczne i wydajnościowe
 # FIX v2.2: mean_amp liczony przed pętlą wewnętrzną (był po każdej modyfikacji
 #           — operator refleksji był zależny od kolejności opcji)
 # DOCS v2.2: udokumentowany świadomy mismatch językowy w _option_to_vector
 
-import copy
 import numpy as np
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from quantum_emotions import QuantumEmotionalState
 from emotional_interference import EmotionalInterference
 
@@ -41,6 +46,15 @@ class QuantumDecisionMaker:
         self.interference = interference
         self.conscience = conscience
         self.horizon = None  # Referencja do FractalHorizon
+        # (bajty wektora stanu, emotional_cost) → rezonans; czyszczone przez invalidate_cache()
+        self._resonance_cache: Dict[tuple, float] = {}
+
+    # Limit wpisów — przy przekroczeniu cache jest czyszczony w całości
+    RESONANCE_CACHE_MAX = 4096
+
+    def invalidate_cache(self):
+        """Unieważnij zapamiętane rezonanse (nowy krok interferencji / zmiana Horizon)."""
+        self._resonance_cache.clear()
 
     def generate_options(self, situation: dict) -> List[dict]:
         """Generate possible actions/responses"""
@@ -55,38 +69,57 @@ class QuantumDecisionMaker:
         """
         Jak opcja rezonuje z obecnym stanem emocjonalnym?
 
-        FIX v2.1: simulated_state jest teraz głęboką kopią bieżącego stanu,
-        nie pustym obiektem. Poprzednio tylko wybrane wymiary z emotional_cost
-        były ustawiane — reszta pozostawała 0, co po normalize() dawało
-        zniekształcony rozkład ("częściowa projekcja", nie "symulacja").
+        FIX v2.1: symulacja startuje z pełnego bieżącego stanu (nie z pustego
+        obiektu) — inaczej po normalize() rozkład był zniekształcony.
+        v2.3: wynik zapamiętany dla pary (stan, emotional_cost) — patrz _resonances().
         """
-        # FIX: deepcopy zachowuje pełny bieżący stan jako punkt startowy symulacji
-        simulated_state = copy.deepcopy(self.emotional_state)
-
-        for emotion, weight in option['emotional_cost'].items():
-            if emotion in simulated_state.DIMENSIONS:
-                simulated_state.amplitudes[emotion] += weight * 0.5
-
-        simulated_state.normalize()
-        resonance = self.interference.resonance_strength(simulated_state)
-
-        # Dodaj rezonans wspomnień z Horizon jeśli dostępny
-        if self.horizon:
-            query_vector = np.array([
-                abs(simulated_state.amplitudes[dim])
-                for dim in simulated_state.DIMENSIONS
-            ])
-            recalled = self.horizon.recall_combined(
-                query="",
-                query_vector=query_vector,
-                fractal_d_map={},
-                top_k=1,
-                depth=1.0
-            )
-            if recalled:
-                resonance += recalled[0]['score'] * 0.5
+        return float(self._resonances([option])[0])
+
+    @staticmethod
+    def _cost_key(option: dict) -> tuple:
+        return tuple(sorted(option['emotional_cost'].items()))
+
+    def _resonances(self, options: List[dict]) -> np.ndarray:
+        """
+        Rezonans każdej opcji (tablica długości N).
 
-        return resonance
+        Brakujące w cache opcje liczone razem: kopia wektora stanu + weight·0.5
+        na osiach emotional_cost, normalizacja wierszy, resonance_strength_batch.
+        Przy podpiętym Horizon dochodzi score·0.5 najlepszego wspomnienia.
+        """
+        state = self.emotional_state
+        state_key = state.vector.tobytes()
+        keys = [(state_key, self._cost_key(opt)) for opt in options]
+        cache = self._resonance_cache
+        missing = list({key: None for key in keys if key not in cache})
+        if missing:
+            if len(cache) + len(missing) > self.RESONANCE_CACHE_MAX:
+                cache.clear()
+            index = state.INDEX
+            simulated = np.tile(state.vector, (len(missing), 1))
+            for row, (_, cost) in enumerate(missing):
+                for emotion, weight in cost:
+                    if emotion in index:
+                        simulated[row, index[emotion]] += weight * 0.5
+            norms = np.sqrt(np.sum(np.abs(simulated) ** 2, axis=1))
+            simulated[norms > 1e-10] /= norms[norms > 1e-10, None]
+            resonances = self.interference.resonance_strength_batch(simulated)
+
+            # Dodaj rezonans wspomnień z Horizon jeśli dostępny
+            if self.horizon:
+                for row in range(len(missing)):
+                    recalled = self.horizon.recall_combined(
+                        query="",
+                        query_vector=np.abs(simulated[row]),
+                        fractal_d_map={},
+                        top_k=1,
+                        depth=1.0
+                    )
+                    if recalled:
+                        resonances[row] += recalled[0]['score'] * 0.5
+
+            cache.update(zip(missing, resonances.tolist()))
+        return np.array([cache[key] for key in keys])
 
     def amplify_good_options(self, options: List[dict],
                              iterations: int = None) -> List[Tuple[dict, float]]:
@@ -101,28 +134,21 @@ class QuantumDecisionMaker:
         if iterations is None:
             iterations = int(np.sqrt(len(options)))
 
-        amplitudes = {i: 1.0 / np.sqrt(len(options))
-                      for i in range(len(options))}
+        n = len(options)
+        amplitudes = np.full(n, 1.0 / np.sqrt(n))
 
         # FIX: oblicz rezonans jeden raz — wynik jest stały przez całą pętlę
-        resonances = {i: self.emotional_resonance(opt)
-                      for i, opt in enumerate(options)}
-        mean_resonance = np.mean(list(resonances.values()))
+        resonances = self._resonances(options)
+        good = resonances > np.mean(resonances)
 
         for _ in range(iterations):
-            # FIX v2.2: mean_amp liczony RAZ przed pętlą wewnętrzną.
-            # Poprzednio był liczony po każdej modyfikacji amplitudes[i],
-            # więc odbicie opcji i=1 używało średniej uwzględniającej już
-            # zmodyfikowane i=0 — operator refleksji był zależny od kolejności
-            # opcji, nie symetryczny. Poprawny Grover: snapshot średniej, potem
-            # aplikuj do wszystkich.
-            mean_amp = np.mean(list(amplitudes.values()))
-            for i in range(len(options)):
-                if resonances[i] > mean_resonance:
-                    amplitudes[i] *= -1
-                amplitudes[i] = 2 * mean_amp - amplitudes[i]
-
-        total = sum(abs(a) ** 2 for a in amplitudes.values())
+            # FIX v2.2: mean_amp liczony RAZ przed odbiciem — operator refleksji
+            # symetryczny względem kolejności opcji (poprawny Grover: snapshot
+            # średniej, potem aplikuj do wszystkich).
+            mean_amp = np.mean(amplitudes)
+            amplitudes = 2 * mean_amp - np.where(good, -amplitudes, amplitudes)
+
+        total = float(np.sum(amplitudes ** 2))
 
         if total < 1e-10:
             # FIX v2.1: degeneracja — fallback do rozkładu jednostajnego zamiast
@@ -135,19 +161,13 @@ class QuantumDecisionMaker:
                 RuntimeWarning,
                 stacklevel=2
             )
-            n = len(options)
-            probabilities = {i: 1.0 / n for i in range(n)}
+            probabilities = np.full(n, 1.0 / n)
         else:
-            probabilities = {i: abs(amplitudes[i]) ** 2 / total
-                             for i in range(len(options))}
-
-        ranked = sorted(
-            [(options[i], probabilities[i]) for i in range(len(options))],
-            key=lambda x: x[1],
-            reverse=True
-        )
+            probabilities = amplitudes ** 2 / total
 
-        return ranked
+        # Stabilnie malejąco — remisy w kolejności opcji, jak sorted(reverse=True)
+        order = np.argsort(-probabilities, kind='stable')
+        return [(options[i], float(probabilities[i])) for i in order.tolist()]
 
     def decide(self, situation: dict, verify: bool = True) -> dict:
         """Make decision: emotional narrowing + optional logical verification"""
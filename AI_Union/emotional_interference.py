@@ -1,12 +1,56 @@
 # emotional_interference.py
+# v1.3 — resonance_strength_batch(): rezonans K stanów naraz (K×16)
+# v1.2 — macierz sprzężeń jako ndarray: interferencja = jeden iloczyn macierz·wektor,
+#        rezonans = forma kwadratowa; bez deepcopy
 # v1.1 — poprawki semantyczne
 
-import copy
 import numpy as np
+from collections.abc import Mapping, MutableMapping
 from typing import Dict
 from quantum_emotions import QuantumEmotionalState
 
 
+class _CouplingRow(MutableMapping):
+    """interference_matrix[A] — wiersz macierzy sprzężeń jako dict B → float."""
+    __slots__ = ('_owner', '_i')
+
+    def __init__(self, owner: 'EmotionalInterference', i: int):
+        self._owner = owner
+        self._i = i
+
+    def __getitem__(self, other: str) -> float:
+        return float(self._owner.coupling[self._i, QuantumEmotionalState.INDEX[other]])
+
+    def __setitem__(self, other: str, value: float):
+        self._owner.coupling[self._i, QuantumEmotionalState.INDEX[other]] = value
+
+    def __delitem__(self, other: str):
+        raise TypeError("Macierz sprzężeń ma stałe wymiary")
+
+    def __iter__(self):
+        return iter(QuantumEmotionalState.DIMENSIONS)
+
+    def __len__(self) -> int:
+        return len(QuantumEmotionalState.DIMENSIONS)
+
+
+class _CouplingView(Mapping):
+    """interference_matrix[A][B] — widok dict-of-dict na EmotionalInterference.coupling."""
+    __slots__ = ('_owner',)
+
+    def __init__(self, owner: 'EmotionalInterference'):
+        self._owner = owner
+
+    def __getitem__(self, emotion: str) -> _CouplingRow:
+        return _CouplingRow(self._owner, QuantumEmotionalState.INDEX[emotion])
+
+    def __iter__(self):
+        return iter(QuantumEmotionalState.DIMENSIONS)
+
+    def __len__(self) -> int:
+        return len(QuantumEmotionalState.DIMENSIONS)
+
+
 class EmotionalInterference:
     """
     Modeluje jak emocje wpływają na siebie (interference).
@@ -17,10 +61,31 @@ class EmotionalInterference:
 
     def __init__(self):
         # Macierz interferencji (można uczyć z doświadczenia)
-        # interference[A][B] = jak silnie A wpływa na B
-        self.interference_matrix = self._initialize_interference()
-
-    def _initialize_interference(self) -> Dict[str, Dict[str, float]]:
+        # coupling[A, B] = jak silnie A wpływa na B (indeksy DIMENSIONS);
+        # interference_matrix[A][B] — ten sam stan przez widok dict-of-dict
+        self.coupling = self._initialize_interference()
+
+    @property
+    def interference_matrix(self) -> Dict[str, Dict[str, float]]:
+        return _CouplingView(self)
+
+    @interference_matrix.setter
+    def interference_matrix(self, values: Dict[str, Dict[str, float]]):
+        index = QuantumEmotionalState.INDEX
+        coupling = np.zeros((len(index), len(index)))
+        for a, row in values.items():
+            for b, value in row.items():
+                coupling[index[a], index[b]] = value
+        self.coupling = coupling
+
+    def _matrices(self):
+        """(transfer, upper) z bieżącego coupling — 16×16, liczone za każdym razem."""
+        off_diagonal = self.coupling.copy()
+        np.fill_diagonal(off_diagonal, 0.0)
+        # wpływ na B = Σ_A coupling[A, B]·a_A  →  transpozycja; upper: każda para i < j raz
+        return off_diagonal.T, np.triu(self.coupling, k=1)
+
+    def _initialize_interference(self) -> np.ndarray:
         """
         Bazowa macierz interferencji.
 
@@ -29,8 +94,8 @@ class EmotionalInterference:
         -1 = destruktywna  (osłabiają się)
          0 = neutralna
         """
-        dims = QuantumEmotionalState.DIMENSIONS
-        interference = {dim: {d: 0.0 for d in dims} for dim in dims}
+        index = QuantumEmotionalState.INDEX
+        interference = np.zeros((len(index), len(index)))
 
         positive_pairs = [
             ('joy', 'trust'), ('joy', 'anticipation'),
@@ -45,12 +110,12 @@ class EmotionalInterference:
         ]
 
         for a, b in positive_pairs:
-            interference[a][b] = 0.7
-            interference[b][a] = 0.7
+            interference[index[a], index[b]] = 0.7
+            interference[index[b], index[a]] = 0.7
 
         for a, b in negative_pairs:
-            interference[a][b] = -0.7
-            interference[b][a] = -0.7
+            interference[index[a], index[b]] = -0.7
+            interference[index[b], index[a]] = -0.7
 
         return interference
 
@@ -59,29 +124,15 @@ class EmotionalInterference:
         """
         Zastosuj interference — emocje wpływają na siebie.
 
+        v1.2: new = a + time_step · (Cᵀ a), C bez przekątnej — jeden iloczyn
+        macierz·wektor; nowy stan to state.copy() (bez deepcopy i losowania faz).
+
         FIX v1.1: Poprzednio new_state = QuantumEmotionalState() tworzył obiekt
-        z 15 losowymi amplitudami zespolonymi, które były natychmiast w całości
-        nadpisywane przez pętlę (wszystkie DIMENSIONS są pokryte). Losowa
-        inicjalizacja była semantycznie myląca i marnowała CPU.
-        Teraz używamy deepcopy stanu wejściowego jako nośnika struktury,
-        a następnie nadpisujemy wszystkie amplitudy obliczonymi wartościami.
-        Wynik numeryczny jest identyczny — zmiana jest semantyczna i czytelna.
+        z 15 losowymi amplitudami zespolonymi, nadpisywanymi w całości przez pętlę.
         """
-        new_state = copy.deepcopy(state)
-
-        for emotion in state.DIMENSIONS:
-            current_amp = state.amplitudes[emotion]
-            influence = 0j
-
-            for other_emotion in state.DIMENSIONS:
-                if other_emotion == emotion:
-                    continue
-                other_amp = state.amplitudes[other_emotion]
-                coupling = self.interference_matrix[other_emotion][emotion]
-                influence += coupling * other_amp * time_step
-
-            new_state.amplitudes[emotion] = current_amp + influence
-
+        transfer, _ = self._matrices()
+        new_state = state.copy()
+        new_state.vector = state.vector + time_step * (transfer @ state.vector)
         new_state.normalize()
         return new_state
 
@@ -90,22 +141,15 @@ class EmotionalInterference:
         Mierz jak "rezonujące" są emocje — iloczyn skalarny amplitud zespolonych
         ważony macierzą interferencji.
 
-        FIX v1.1: Poprzednio dedulikacja par używała `em1 >= em2` (porównanie
-        stringów). Działało poprawnie (macierz symetryczna, każda para liczona raz),
-        ale kolejność zależała od porządku leksykograficznego nazw, nie od
-        kolejności w DIMENSIONS — kruche i nieczytelne.
-        Teraz używamy indeksów: for i, em1 / for em2 in DIMENSIONS[i+1:].
+        v1.2: forma kwadratowa Re(aᵀ U a*), U = górny trójkąt macierzy
+        (każda para i < j w kolejności DIMENSIONS liczona raz, jak w v1.1).
         """
-        total_resonance = 0.0
-        dims = state.DIMENSIONS
-
-        for i, em1 in enumerate(dims):
-            for em2 in dims[i + 1:]:
-                amp1 = state.amplitudes[em1]
-                amp2 = state.amplitudes[em2]
-                coupling = self.interference_matrix[em1][em2]
-
-                interference = np.real(amp1 * np.conj(amp2)) * coupling
-                total_resonance += interference
-
-        return total_resonance
\ No newline at end of file
+        _, upper = self._matrices()
+        a = state.vector
+        return float(np.real(a @ (upper @ np.conj(a))))
+
+    def resonance_strength_batch(self, vectors: np.ndarray) -> np.ndarray:
+        """resonance_strength() dla K wektorów stanu naraz (K×len(DIMENSIONS)) → K."""
+        _, upper = self._matrices()
+        vectors = np.asarray(vectors, dtype=np.complex128)
+        return np.real(np.sum(vectors * (np.conj(vectors) @ upper.T), axis=1))
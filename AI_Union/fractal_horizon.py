@@ -1,10 +1,96 @@
 # -*- coding: utf-8 -*-
 """
-fractal_horizon.py v1.1
+fractal_horizon.py v1.7.6
 FractalMemory jako sterownik EventHorizon.
 
 Nie dwa systemy. Jeden.
 
+ZMIANY v1.7.6:
+- BUGFIX: kolumny _weight/_depth aktualne tam, gdzie zmieniają się rekordy —
+  hooki D_Map FractalMemory wołają touch() (wstawienie/podmiana) i detach()
+  (usunięcie, clear: waga 0.5, głębokość 1 jak brakujący rekord przed v1.5);
+  sync_all_from_fractal() odpina kwanty bez rekordu. auto_decay() zostaje
+  czystą maską po kolumnach
+- touch() podbija revision tylko, gdy kolumny kwantu faktycznie się zmieniły
+
+ZMIANY v1.7.5:
+- content_uniforms(contents, count): liczby [0, 1) z hasha treści jako funkcja
+  publiczna — EventHorizonMemory.oscillations korzysta z niej zamiast własnej
+  kopii FNV-1a/splitmix64
+
+ZMIANY v1.7.4:
+- BUGFIX: advance() i krok ewolucji recall w trybie 'step' nie podbijają
+  revision (_mark_evolved(): tylko agregaty do przeliczenia) — faza to funkcja
+  t0 i czasu, a nie zmiana do zapisu; punkt kontrolny nie przepisuje już
+  horizon.npz przy każdym cyklu uwagi. Ewolucja trafia na dysk z następną
+  prawdziwą zmianą stosu
+
+ZMIANY v1.7.3:
+- BUGFIX: recall_combined() punktuje też rekordy D_Map nieobecne na horyzoncie
+  (cosinus z wierszy MemoryMatrix FractalMemory albo z rekordów) — jak przed
+  v1.7 trafiają do wyników z samym wynikiem proustowskim
+
+ZMIANY v1.7.2:
+- save() pracuje na kopii id/treści/kolumn pobranej na starcie — spójny
+  snapshot przy zapisie w tle (PersistenceWorker)
+
+ZMIANY v1.7.1:
+- revision — licznik zmian stosu kwantów (_mark_changed(), touch(), emergencja);
+  punkt kontrolny (checkpoint.py) zapisuje horizon.npz tylko po zmianie
+
+ZMIANY v1.7:
+- WYDAJNOŚĆ: recall_combined() = jeden przebieg po kolumnach stosu: rezonans
+  kwantowy (top_k·3 jak recall), cosinus proustowski z kolumny _vec (surowy
+  wektor rekordu, norma _vnorm, flaga @META), średnia geometryczna i top-k
+  na indeksach wierszy — bez drugiej pętli po fractal_d_map z np.array
+  per rekord i bez zbiorów id; D_Map pytany tylko o rekordy wyniku
+- _resonance_scores(): wspólny rdzeń recall() i recall_combined()
+- touch() odświeża też wektor rekordu; snapshot v4 zapisuje vector/vnorm/meta
+
+ZMIANY v1.6:
+- WYDAJNOŚĆ: fazy kwantów z content_phases() — licznikowy hash (FNV-1a bajtów
+  UTF-8 treści → splitmix64(klucz + k)) liczony wektorowo dla wielu treści naraz,
+  bez np.random.RandomState per kwant
+- sync_all_from_fractal()/sync_from_fractal() przez _sync_records(): amplitudy
+  całej partii rekordów jednym przebiegiem i hurtowe _put_many()
+- phase_seeding: 'hash' (nowe horyzonty, UnionConfig.HORIZON_PHASE_SEEDING) albo
+  'legacy' (dokładnie fazy RandomState sprzed v1.6); horyzont wczytany
+  ze snapshotu v1/v2 lub horizon.json zostaje przy 'legacy', snapshot v3
+  pamięta swój schemat — zapytanie i kwanty zawsze w tym samym schemacie
+
+ZMIANY v1.5:
+- WYDAJNOŚĆ: auto_decay() = jedna maskowana operacja na kolumnach stosu
+  (born, weight, depth → curvature) zamiast pętli z fractal_d_map.get per kwant;
+  waga i głębokość rekordu trzymane w kolumnach _weight/_depth
+  (sync_from_fractal, touch() po mutacji rekordu, snapshot v2)
+- state(): średnia krzywizna i global_phase z agregatów liczonych wektorowo
+  i trzymanych do następnej zmiany stosu (_stats) — bez pętli po kwantach
+
+ZMIANY v1.4:
+- Binarny snapshot horizon.npz: amplitudy (z fazami), krzywizna, energia,
+  born, t0, treść i id (blob UTF-8 + offsety) — WSZYSTKIE kwanty, jeden np.load
+  (koniec obcinania do 500; horizon.json czytany już tylko jako stary format)
+- generation: snapshot pamięta FractalMemory.generation z chwili zapisu;
+  sync_all_from_fractal(d_map, generation) przy zgodnej generacji tylko
+  dosynchronizowuje brakujące id zamiast przeliczać cały D_Map
+
+ZMIANY v1.3:
+- Ewolucja analityczna (domyślna, UnionConfig.HORIZON_EVOLUTION='analytic'):
+  faza kwantu = faza zapisana w chwili t0 + 2π|a|·PHASE_RATE·(now − t0),
+  energia = f(now − born) — liczone tylko przy ocenie, recall() nic nie zapisuje
+  (wynik nie zależy od liczby wcześniejszych recall, czytelnicy się nie ścigają)
+- advance(): materializuje fazy/energie wszystkich kwantów na teraz
+  (AttentionCortex.run_cycle, nie częściej niż co ADVANCE_INTERVAL s)
+- evolution='step' = stare zachowanie (recall ewoluuje każdy kwant o dt=0.001)
+
+ZMIANY v1.2:
+- WYDAJNOŚĆ: horyzont trzyma kwanty w stosie tablic (amplitudy complex128 N×D,
+  curvature/energy/born float64); recall() = jeden wektorowy przebieg:
+  evolve wszystkich, rezonans, tunel, top-k przez argpartition
+- quanta to widok mem_id → kwant (API jak Quantum: amplitude, curvature, ...)
+- resonance_with() liczy overlap tym samym jądrem co recall() (suma iloczynów
+  zamiast BLAS dot) — ścieżka pojedyncza i wsadowa dają identyczne liczby
+
 ZMIANY v1.1:
 - FIX: reinforce() — dodano MIN_CURVATURE=0.05, blokuje pętlę wzmacniania
   (curvature nie spada poniżej 0.05, tunnel nie osiąga 1.0)
@@ -27,8 +113,21 @@ import numpy as np
 import json
 import os
 import time
+from collections.abc import MutableMapping
 from datetime import datetime
 
+try:
+    from union_config import UnionConfig
+    _EVOLUTION = getattr(UnionConfig, 'HORIZON_EVOLUTION', 'analytic')
+    _PHASE_RATE = getattr(UnionConfig, 'HORIZON_PHASE_RATE', 0.001)
+    _ADVANCE_INTERVAL = getattr(UnionConfig, 'HORIZON_ADVANCE_INTERVAL', 60.0)
+    _PHASE_SEEDING = getattr(UnionConfig, 'HORIZON_PHASE_SEEDING', 'hash')
+except ImportError:
+    _EVOLUTION = 'analytic'
+    _PHASE_RATE = 0.001
+    _ADVANCE_INTERVAL = 60.0
+    _PHASE_SEEDING = 'hash'
+
 
 # ═══════════════════════════════════════════════════════
 # MAPOWANIE: FRAKTAL → HORYZONT
@@ -49,51 +148,225 @@ TYPE_MODIFIER = {
 }
 
 
+# ═══════════════════════════════════════════════════════
+# FAZA Z TREŚCI
+# ═══════════════════════════════════════════════════════
+
+PHASE_PREFIX = 50   # znaki treści wyznaczające fazę (jak seed z v1.0)
+
+_FNV_OFFSET = np.uint64(0xcbf29ce484222325)
+_FNV_PRIME = np.uint64(0x100000001b3)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _content_keys(contents: list) -> np.ndarray:
+    """FNV-1a 64 bajtów UTF-8 pierwszych PHASE_PREFIX znaków — kolumnami dla N treści."""
+    encoded = [str(c)[:PHASE_PREFIX].encode('utf-8') for c in contents]
+    n = len(encoded)
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=n)
+    width = int(lengths.max()) if n else 0
+    # Treści jako macierz N×width bajtów (dopełnienie zerami, poza długością pomijane)
+    starts = np.cumsum(lengths) - lengths
+    blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    owner = np.repeat(np.arange(n), lengths)
+    buf = np.zeros((n, width), dtype=np.uint64)
+    buf[owner, np.arange(len(blob)) - starts[owner]] = blob
+    keys = np.full(n, _FNV_OFFSET, dtype=np.uint64)
+    for j in range(width):
+        keys = np.where(lengths > j, (keys ^ buf[:, j]) * _FNV_PRIME, keys)
+    return keys
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    z = x + _GOLDEN
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def content_uniforms(contents: list, count: int) -> np.ndarray:
+    """
+    N×count liczb [0, 1) z treści: splitmix64(FNV-1a(treść) + (k+1)·γ).
+    Wspólne źródło fal horyzontu (content_phases) i EventHorizonMemory.oscillations.
+    """
+    counters = _content_keys(contents)[:, None] + np.arange(count, dtype=np.uint64) * _GOLDEN
+    return (_splitmix64(counters) >> np.uint64(11)).astype(np.float64) / 2.0**53
+
+
+def _legacy_phases(content: str, d: int) -> np.ndarray:
+    """Fazy sprzed v1.6: RandomState z ważonej sumy znaków."""
+    seed = sum(ord(c) * (i + 1) for i, c in enumerate(content[:PHASE_PREFIX]))
+    rng = np.random.RandomState(seed % (2**31))
+    return rng.uniform(0, 2 * np.pi, d)
+
+
+def content_phases(contents: list, d: int, seeding: str = None) -> np.ndarray:
+    """
+    Fazy [0, 2π) dla N treści → N×d. Faza k zależy tylko od treści i k
+    (pierwsze d faz to prefiks dłuższego wektora, jak kolejne losowania RNG).
+
+    seeding='hash'   — licznikowy: splitmix64(FNV-1a(treść) + k·γ), wektorowo
+    seeding='legacy' — np.random.RandomState per treść (fazy sprzed v1.6)
+    """
+    seeding = seeding or _PHASE_SEEDING
+    if seeding == 'legacy':
+        out = np.zeros((len(contents), d))
+        for i, content in enumerate(contents):
+            out[i] = _legacy_phases(content, d)
+        return out
+    if seeding != 'hash':
+        raise ValueError(f"Nieznany schemat faz: {seeding!r} (oczekiwano 'hash' lub 'legacy')")
+    return content_uniforms(contents, d) * (2 * np.pi)
+
+
+def _magnitudes(vectors: np.ndarray) -> np.ndarray:
+    """Moduły amplitud: wektor / Σ (N×d); zerowa suma → rozkład jednostajny."""
+    total = np.sum(vectors, axis=1, keepdims=True)
+    uniform = np.full_like(vectors, 1.0 / vectors.shape[1]) if vectors.shape[1] else vectors
+    return np.where(total > 1e-10, vectors / np.where(total > 1e-10, total, 1.0), uniform)
+
+
 # ═══════════════════════════════════════════════════════
 # KWANT — oscyluje na horyzoncie
 # ═══════════════════════════════════════════════════════
 
 class Quantum:
-    def __init__(self, content: str, vector: np.ndarray, curvature: float):
+    def __init__(self, content: str, vector: np.ndarray, curvature: float,
+                 seeding: str = None):
         self.content = content
         self.born = time.time()
         self.curvature = curvature
         self.energy = 1.0
 
         # Amplituda z wektora emocjonalnego + faza z treści
-        seed = sum(ord(c) * (i + 1) for i, c in enumerate(content[:50]))
-        rng = np.random.RandomState(seed % (2**31))
-        phases = rng.uniform(0, 2 * np.pi, len(vector))
-
         mags = np.array(vector, dtype=float)
-        total = np.sum(mags)
-        if total > 1e-10:
-            mags /= total
-        else:
-            mags = np.ones(len(vector)) / len(vector)
-
-        self.amplitude = mags * np.exp(1j * phases)
+        phases = content_phases([content], len(mags), seeding)[0]
+        self.amplitude = _magnitudes(mags[None, :])[0] * np.exp(1j * phases)
 
     def evolve(self, dt: float = 0.001):
-        freqs = np.abs(self.amplitude) * 2 * np.pi
-        self.amplitude *= np.exp(1j * freqs * dt)
-        mags = np.abs(self.amplitude)
-        phases = np.angle(self.amplitude)
-        s = np.sum(mags)
-        if s > 1e-10:
-            mags /= s
-        self.amplitude = mags * np.exp(1j * phases)
-
-        elapsed = time.time() - self.born
-        self.energy = max(np.exp(-elapsed * 0.00005), 1e-10)
+        self.amplitude = _evolve_amplitudes(self.amplitude, dt)
+        self.energy = float(_energy(time.time() - self.born))
 
     def resonance_with(self, other: 'Quantum') -> float:
         if len(self.amplitude) != len(other.amplitude):
             return 0.0
-        overlap = np.abs(np.dot(np.conj(self.amplitude), other.amplitude))
+        overlap = _overlap(other.amplitude, self.amplitude)
         return float(overlap * np.sqrt(self.energy * other.energy))
 
 
+# Jądra obliczeń — wspólne dla pojedynczego kwantu i całego stosu (ostatnia oś = wymiary)
+
+def _evolve_amplitudes(amp: np.ndarray, dt: float) -> np.ndarray:
+    freqs = np.abs(amp) * 2 * np.pi
+    amp = amp * np.exp(1j * freqs * dt)
+    mags = np.abs(amp)
+    phases = np.angle(amp)
+    s = np.sum(mags, axis=-1, keepdims=True)
+    mags = np.where(s > 1e-10, mags / np.where(s > 1e-10, s, 1.0), mags)
+    return mags * np.exp(1j * phases)
+
+
+def _rotate_phases(amp: np.ndarray, dt) -> np.ndarray:
+    """
+    Analityczna postać evolve(): sam obrót fazy o 2π|a|·dt (moduły są już
+    znormalizowane, więc renormalizacja nic nie zmienia). dt: skalar albo (N, 1).
+    """
+    return amp * np.exp(1j * (np.abs(amp) * 2 * np.pi) * dt)
+
+
+def _energy(elapsed):
+    return np.maximum(np.exp(-np.asarray(elapsed, dtype=float) * 0.00005), 1e-10)
+
+
+def _overlap(amps: np.ndarray, query_amp: np.ndarray):
+    """|<query|amp>| — suma iloczynów po ostatniej osi (ta sama kolejność sumowania)."""
+    return np.abs(np.sum(np.conj(query_amp) * amps, axis=-1))
+
+
+# ═══════════════════════════════════════════════════════
+# STOS KWANTÓW — widoki zgodne z API Quantum
+# ═══════════════════════════════════════════════════════
+
+class _QuantumRow:
+    """Jeden kwant w tablicach FractalHorizon (te same atrybuty co Quantum)."""
+    __slots__ = ('_h', 'mem_id')
+
+    def __init__(self, horizon: 'FractalHorizon', mem_id: str):
+        self._h = horizon
+        self.mem_id = mem_id
+
+    @property
+    def _r(self) -> int:
+        return self._h._row[self.mem_id]
+
+    @property
+    def content(self) -> str:
+        return self._h._content[self._r]
+
+    @content.setter
+    def content(self, value: str):
+        self._h._content[self._r] = value
+        self._h.revision += 1
+
+    @property
+    def amplitude(self) -> np.ndarray:
+        r = self._r
+        return self._h._amp[r, :self._h._dims[r]]
+
+    @amplitude.setter
+    def amplitude(self, value):
+        r = self._r
+        self._h._amp[r, :self._h._dims[r]] = value
+        self._h._mark_changed()
+
+    def _scalar(name):
+        def getter(self):
+            return float(getattr(self._h, name)[self._r])
+
+        def setter(self, value):
+            getattr(self._h, name)[self._r] = value
+            self._h._mark_changed()
+        return property(getter, setter)
+
+    curvature = _scalar('_curvature')
+    energy = _scalar('_energy')
+    born = _scalar('_born')
+    del _scalar
+
+    def evolve(self, dt: float = 0.001):
+        self._h._evolve_rows(np.array([self._r]), dt, time.time())
+        self._h.revision += 1  # jawna ewolucja kwantu — zmiana do zapisu
+
+    resonance_with = Quantum.resonance_with
+
+
+class _QuantaView(MutableMapping):
+    """mem_id → kwant; kolejność = kolejność wstawiania (jak dict)."""
+
+    def __init__(self, horizon: 'FractalHorizon'):
+        self._h = horizon
+
+    def __getitem__(self, mem_id):
+        if mem_id not in self._h._row:
+            raise KeyError(mem_id)
+        return _QuantumRow(self._h, mem_id)
+
+    def __setitem__(self, mem_id, q):
+        self._h._put(mem_id, q.content, q.amplitude, q.curvature, q.energy, q.born)
+
+    def __delitem__(self, mem_id):
+        self._h._remove(mem_id)
+
+    def __contains__(self, mem_id):
+        return mem_id in self._h._row
+
+    def __iter__(self):
+        return iter(list(self._h._ids))
+
+    def __len__(self):
+        return len(self._h._ids)
+
+
 # ═══════════════════════════════════════════════════════
 # FRACTAL HORIZON — jeden zintegrowany system
 # ═══════════════════════════════════════════════════════
@@ -108,20 +381,214 @@ class FractalHorizon:
     """
 
     EMERGENCE_THRESHOLD = 1000
+    DIMENSION = 15
+    INITIAL_CAPACITY = 256
+    PHASE_RATE = _PHASE_RATE            # dt ewolucji na sekundę (tryb analityczny)
+    ADVANCE_INTERVAL = _ADVANCE_INTERVAL
 
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", evolution: str = None,
+                 phase_seeding: str = None):
         self.data_dir = data_dir
         os.makedirs(data_dir, exist_ok=True)
+        # 'analytic' — recall tylko czyta; 'step' — recall ewoluuje kwanty (v1.2)
+        self.evolution = evolution or _EVOLUTION
+        # Schemat faz z treści (content_phases) — nadpisywany przez wczytany snapshot
+        self.phase_seeding = phase_seeding or _PHASE_SEEDING
+        self._last_advance = time.time()
 
-        # Kwanty na horyzoncie: mem_id → Quantum
-        self.quanta = {}
+        # Kwanty na horyzoncie: stos tablic (wiersz i ↔ _ids[i]),
+        # quanta = widok mem_id → kwant
+        self._alloc(self.INITIAL_CAPACITY)
+        self.quanta = _QuantaView(self)
 
         self.global_phase = 0.0
         self.emergence_detected = False
         self.self_queries = []
+        # FractalMemory.generation, z którą horyzont był zgodny przy zapisie
+        self.generation = None
+        # Licznik zmian stosu od startu — punkt kontrolny (checkpoint.py)
+        self.revision = 0
 
         self._load_horizon()
 
+    # ─────────────────────────────────────────────────────
+    # STOS TABLIC
+    # ─────────────────────────────────────────────────────
+
+    def _alloc(self, capacity: int):
+        self._ids = []
+        self._row = {}
+        self._content = []
+        self._amp = np.zeros((capacity, self.DIMENSION), dtype=np.complex128)
+        self._dims = np.zeros(capacity, dtype=np.int16)
+        self._curvature = np.zeros(capacity, dtype=np.float64)
+        self._energy = np.zeros(capacity, dtype=np.float64)
+        self._born = np.zeros(capacity, dtype=np.float64)
+        # Chwila, dla której zapisana jest faza amplitudy (tryb analityczny)
+        self._t0 = np.zeros(capacity, dtype=np.float64)
+        # Waga i głębokość rekordu FractalMemory (dla auto_decay)
+        self._weight = np.full(capacity, 0.5, dtype=np.float64)
+        self._depth = np.ones(capacity, dtype=np.float64)
+        # Surowy wektor rekordu (cosinus proustowski), jego norma i flaga @META
+        self._vec = np.zeros((capacity, self.DIMENSION), dtype=np.float64)
+        self._vnorm = np.zeros(capacity, dtype=np.float64)
+        self._meta = np.zeros(capacity, dtype=bool)
+        # (avg_curvature, global_phase) — None = do przeliczenia po zmianie stosu
+        self._stats = None
+
+    _COLUMNS = ('_amp', '_dims', '_curvature', '_energy', '_born', '_t0',
+                '_weight', '_depth', '_vec', '_vnorm', '_meta')
+
+    def _mark_changed(self):
+        """Stos zmieniony: agregaty do przeliczenia, snapshot do zapisu."""
+        self._stats = None
+        self.revision += 1
+
+    def _mark_evolved(self):
+        """Fazy/energie przeliczone w czasie: agregaty do przeliczenia, bez zapisu."""
+        self._stats = None
+
+    def _grow(self):
+        capacity = self._amp.shape[0] * 2
+        for name in self._COLUMNS:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _put(self, mem_id: str, content: str, amplitude, curvature: float,
+             energy: float, born: float, weight: float = 0.5, depth: float = 1):
+        """Wstawia/nadpisuje kwant (nadpisanie zachowuje pozycję, jak dict)."""
+        row = self._row.get(mem_id)
+        if row is None:
+            row = len(self._ids)
+            if row >= self._amp.shape[0]:
+                self._grow()
+            self._ids.append(mem_id)
+            self._content.append(content)
+            self._row[mem_id] = row
+        else:
+            self._content[row] = content
+        amplitude = np.asarray(amplitude, dtype=np.complex128)[:self.DIMENSION]
+        self._amp[row] = 0.0
+        self._amp[row, :len(amplitude)] = amplitude
+        self._dims[row] = len(amplitude)
+        self._curvature[row] = curvature
+        self._energy[row] = energy
+        self._born[row] = born
+        self._t0[row] = time.time()
+        self._weight[row] = weight
+        self._depth[row] = depth
+        self._vec[row] = 0.0
+        self._vnorm[row] = 0.0
+        self._meta[row] = False
+        self._mark_changed()
+
+    def _put_many(self, mem_ids: list, contents: list, amplitudes: np.ndarray,
+                  dims: np.ndarray, curvature: np.ndarray, born: float,
+                  weight: np.ndarray, depth: np.ndarray, vectors: np.ndarray,
+                  vnorm: np.ndarray, meta: np.ndarray):
+        """
+        Hurtowe _put (energy=1.0): amplitudes/vectors N×DIMENSION (dopełnione zerami).
+        Istniejące id nadpisane w miejscu, nowe dopisane blokiem w kolejności
+        wejścia; powtórzone id — wygrywa ostatnie (jak kolejne _put).
+        """
+        last = {}
+        for i, mem_id in enumerate(mem_ids):
+            last[mem_id] = i
+        rows, sel, new_ids = [], [], []
+        for mem_id, i in last.items():
+            row = self._row.get(mem_id)
+            if row is None:
+                row = len(self._ids) + len(new_ids)
+                new_ids.append(mem_id)
+            rows.append(row)
+            sel.append(i)
+        if not sel:
+            return
+        while len(self._ids) + len(new_ids) > self._amp.shape[0]:
+            self._grow()
+        start = len(self._ids)
+        self._ids.extend(new_ids)
+        self._content.extend([None] * len(new_ids))
+        for row, mem_id in enumerate(new_ids, start):
+            self._row[mem_id] = row
+
+        rows = np.array(rows, dtype=np.int64)
+        sel = np.array(sel, dtype=np.int64)
+        for row, i in zip(rows.tolist(), sel.tolist()):
+            self._content[row] = contents[i]
+        self._amp[rows] = amplitudes[sel]
+        self._dims[rows] = dims[sel]
+        self._curvature[rows] = curvature[sel]
+        self._energy[rows] = 1.0
+        self._born[rows] = born
+        self._t0[rows] = time.time()
+        self._weight[rows] = weight[sel]
+        self._depth[rows] = depth[sel]
+        self._vec[rows] = vectors[sel]
+        self._vnorm[rows] = vnorm[sel]
+        self._meta[rows] = meta[sel]
+        self._mark_changed()
+
+    def _remove(self, mem_id: str):
+        row = self._row.pop(mem_id)
+        n = len(self._ids)
+        for name in self._COLUMNS:
+            arr = getattr(self, name)
+            arr[row:n - 1] = arr[row + 1:n]
+        del self._ids[row]
+        del self._content[row]
+        for i in range(row, n - 1):
+            self._row[self._ids[i]] = i
+        self._mark_changed()
+
+    def _evolve_rows(self, rows, dt: float, now: float):
+        """Quantum.evolve() dla wielu wierszy naraz (rows: indeksy lub slice)."""
+        amp = self._amp[rows]
+        full = self._dims[rows] == self.DIMENSION
+        if np.all(full):
+            self._amp[rows] = _evolve_amplitudes(amp, dt)
+        else:
+            # Kwanty z krótszym wektorem (stare 8D) — ewolucja na ich własnej długości
+            evolved = _evolve_amplitudes(amp, dt)
+            for i in np.nonzero(~full)[0].tolist():
+                d = self._dims[rows][i]
+                evolved[i] = 0.0
+                evolved[i, :d] = _evolve_amplitudes(amp[i, :d], dt)
+            self._amp[rows] = evolved
+        self._energy[rows] = _energy(now - self._born[rows])
+        self._mark_evolved()
+
+    def _amplitudes_at(self, rows, d: int, now: float) -> np.ndarray:
+        """Amplitudy wierszy (pierwsze d wymiarów) w chwili now — bez zapisu."""
+        amp = self._amp[rows, :d]
+        if self.evolution == 'step':
+            return amp
+        dt = (self.PHASE_RATE * (now - self._t0[rows]))[:, None]
+        return _rotate_phases(amp, dt)
+
+    def advance(self, now: float = None, force: bool = False) -> int:
+        """
+        Materializuje ewolucję analityczną: fazy i energie wszystkich kwantów
+        na chwilę now (nowe t0). Wołane z cyklu uwagi — recall tego nie potrzebuje,
+        ale amplitude/energy widoków i save() pokazują stan z ostatniego advance().
+        Bez force nie częściej niż co ADVANCE_INTERVAL s. Zwraca liczbę kwantów.
+        """
+        now = time.time() if now is None else now
+        n = len(self._ids)
+        if self.evolution == 'step' or n == 0:
+            return 0
+        if not force and now - self._last_advance < self.ADVANCE_INTERVAL:
+            return 0
+        dt = (self.PHASE_RATE * (now - self._t0[:n]))[:, None]
+        self._amp[:n] = _rotate_phases(self._amp[:n], dt)
+        self._t0[:n] = now
+        self._energy[:n] = _energy(now - self._born[:n])
+        self._last_advance = now
+        self._mark_evolved()
+        return n
+
     # ─────────────────────────────────────────────────────
     # ZAPAMIĘTAJ — fraktal steruje krzywiznością
     # ─────────────────────────────────────────────────────
@@ -132,42 +599,122 @@ class FractalHorizon:
 
         Wywołaj po każdym fractal.store() lub przy ładowaniu.
         """
-        mem_id = fractal_record.get('id', '')
-        content = fractal_record.get('tresc', '')
-        vector = np.array(fractal_record.get('wektor_C_Def', np.zeros(15)))
-        depth = fractal_record.get('fractal', {}).get('depth', 1)
-        rec_type = fractal_record.get('_type', '@DIALOG')
-        weight = fractal_record.get('weight', 0.5)
-
-        # Krzywizna z głębokości fraktalnej
-        base_curvature = DEPTH_TO_CURVATURE.get(depth, 1.0)
-
-        # Modyfikacja przez typ
-        type_mod = TYPE_MODIFIER.get(rec_type, 1.0)
-
-        # Modyfikacja przez wagę (wysoka waga = łatwiej dostępne)
-        weight_mod = 1.0 / (0.5 + weight)
-
-        curvature = base_curvature * type_mod * weight_mod
+        self._sync_records([fractal_record])
+        return fractal_record.get('id', '')
 
-        # Utwórz kwant z właściwą krzywizną
-        q = Quantum(content, vector, curvature)
-        self.quanta[mem_id] = q
+    def _sync_records(self, records: list):
+        """
+        Rekordy FractalMemory → kwanty, cała partia naraz.
 
+        Krzywizna = DEPTH_TO_CURVATURE[depth] · TYPE_MODIFIER[typ] · 1/(0.5 + weight):
+        głęboko/ciężko = łatwo dostępne, płytko/lekko = za horyzontem.
+        Fazy content_phases() dla całej partii, moduły = wektor / Σ.
+        """
+        if not records:
+            return
+        n = len(records)
+        mem_ids, contents, vectors = [], [], []
+        curvature = np.zeros(n)
+        weight = np.zeros(n)
+        depth = np.zeros(n)
+        meta = np.zeros(n, dtype=bool)
+        for i, record in enumerate(records):
+            mem_ids.append(record.get('id', ''))
+            contents.append(record.get('tresc', ''))
+            vectors.append(np.array(record.get('wektor_C_Def', np.zeros(15)), dtype=float).ravel())
+            d = record.get('fractal', {}).get('depth', 1)
+            w = record.get('weight', 0.5)
+            # Krzywizna z głębokości fraktalnej, typu i wagi (wysoka waga = łatwiej dostępne)
+            curvature[i] = (DEPTH_TO_CURVATURE.get(d, 1.0)
+                            * TYPE_MODIFIER.get(record.get('_type', '@DIALOG'), 1.0)
+                            * (1.0 / (0.5 + w)))
+            weight[i] = w
+            depth[i] = d
+            meta[i] = record.get('_type') == '@META'
+
+        # Amplitudy grupami po długości wektora (stare rekordy 8D, uszkodzone)
+        amplitudes = np.zeros((n, self.DIMENSION), dtype=np.complex128)
+        raw = np.zeros((n, self.DIMENSION))
+        vnorm = np.zeros(n)
+        lengths = np.fromiter(map(len, vectors), dtype=np.int64, count=n)
+        for length in np.unique(lengths).tolist():
+            idx = np.nonzero(lengths == length)[0]
+            block = np.stack([vectors[i] for i in idx.tolist()]) if length else np.zeros((len(idx), 0))
+            phases = content_phases([contents[i] for i in idx.tolist()], length, self.phase_seeding)
+            amp = _magnitudes(block) * np.exp(1j * phases)
+            width = min(length, self.DIMENSION)
+            amplitudes[idx, :width] = amp[:, :width]
+            raw[idx, :width] = block[:, :width]
+            vnorm[idx] = np.linalg.norm(block, axis=1)
+        dims = np.minimum(lengths, self.DIMENSION)
+
+        self._put_many(mem_ids, contents, amplitudes, dims, curvature, time.time(),
+                       weight, depth, raw, vnorm, meta)
         self._check_emergence()
-        return mem_id
 
-    def sync_all_from_fractal(self, fractal_d_map: dict):
+    def touch(self, mem_id: str, fractal_record: dict):
+        """
+        Odświeża wagę/głębokość/wektor kwantu po mutacji rekordu w miejscu
+        (jak FractalMemory.touch) — kolumny czytane przez auto_decay()
+        i recall_combined().
+        """
+        row = self._row.get(mem_id)
+        if row is not None:
+            weight = fractal_record.get('weight', 0.5)
+            depth = fractal_record.get('fractal', {}).get('depth', 1)
+            vec = np.zeros(self.DIMENSION)
+            raw = np.array(fractal_record.get('wektor_C_Def', np.zeros(15)), dtype=float).ravel()
+            width = min(len(raw), self.DIMENSION)
+            vec[:width] = raw[:width]
+            if (self._weight[row] == weight and self._depth[row] == depth
+                    and np.array_equal(self._vec[row], vec)):
+                return
+            self._weight[row] = weight
+            self._depth[row] = depth
+            self._vec[row] = vec
+            self._vnorm[row] = np.linalg.norm(raw)
+            self.revision += 1
+
+    def detach(self, mem_ids: list = None):
+        """
+        Rekordy usunięte z D_Map (None — wszystkie, D_Map.clear()): kwant zostaje
+        na horyzoncie, waga i głębokość jak dla brakującego rekordu (0.5, 1).
+        """
+        n = len(self._ids)
+        if mem_ids is None:
+            rows = np.arange(n)
+        else:
+            rows = np.array([self._row[m] for m in mem_ids if m in self._row], dtype=np.int64)
+        changed = (self._weight[rows] != 0.5) | (self._depth[rows] != 1)
+        if np.any(changed):
+            self._weight[rows] = 0.5
+            self._depth[rows] = 1
+            self.revision += 1
+
+    def sync_all_from_fractal(self, fractal_d_map: dict, generation: int = None):
         """
         Synchronizuj cały D_Map z FractalMemory.
         Wywołaj przy starcie po załadowaniu fraktala.
+
+        generation — FractalMemory.generation; zgodna z generacją snapshotu
+        horyzontu → rekordy się nie zmieniły, dochodzą tylko brakujące id.
         """
-        synced = 0
-        for mem_id, record in fractal_d_map.items():
-            if record.get('_type') == '@META':
-                continue
-            self.sync_from_fractal(record)
-            synced += 1
+        if generation is not None and generation == self.generation and self._ids:
+            records = [fractal_d_map[mem_id] for mem_id in fractal_d_map
+                       if mem_id not in self._row]
+            records = [r for r in records if r.get('_type') != '@META']
+            self._sync_records(records)
+            print(f"[HORYZONT] Snapshot zgodny z generacją {generation} — "
+                  f"dosynchronizowano {len(records)} wspomnień.")
+            return
+
+        records = [r for r in fractal_d_map.values() if r.get('_type') != '@META']
+        self._sync_records(records)
+        synced = len(records)
+        # Kwanty, których rekordy zniknęły od zapisu snapshotu
+        self.detach([mem_id for mem_id in self._ids if mem_id not in fractal_d_map])
+        if generation is not None:
+            self.generation = generation
 
         print(f"[HORYZONT] Zsynchronizowano {synced} wspomnień z FractalMemory.")
 
@@ -182,28 +729,66 @@ class FractalHorizon:
 
         depth > 1.0 = sięgasz głębiej za horyzont
         """
-        query_q = Quantum(query, query_vector, curvature=0.0)
-
-        results = []
-        for mem_id, q in self.quanta.items():
-            q.evolve(dt=0.001)
-
-            resonance = query_q.resonance_with(q)
-            tunnel = np.exp(-q.curvature / depth)
-            effective = resonance * tunnel
-
-            if effective > 0.005:
-                results.append({
-                    'id': mem_id,
-                    'resonance': effective,
-                    'curvature': q.curvature,
-                    'energy': q.energy,
-                    'content': q.content,
-                    'age': time.time() - q.born,
-                })
-
-        results.sort(key=lambda x: x['resonance'], reverse=True)
-        return results[:top_k]
+        n = len(self._ids)
+        if n == 0:
+            return []
+        now = time.time()
+        effective, energy = self._resonance_scores(query, query_vector, depth, now)
+
+        rows = self._top_rows(effective, top_k, threshold=0.005)
+        return [{
+            'id': self._ids[r],
+            'resonance': float(effective[r]),
+            'curvature': float(self._curvature[r]),
+            'energy': float(energy[r]),
+            'content': self._content[r],
+            'age': now - float(self._born[r]),
+        } for r in rows]
+
+    def _resonance_scores(self, query: str, query_vector: np.ndarray,
+                          depth: float, now: float):
+        """
+        Rezonans kwantowy · tunel dla wszystkich wierszy → (effective, energy), długość N.
+        W trybie 'step' ewoluuje najpierw cały stos (dt=0.001).
+        """
+        query_q = Quantum(query, query_vector, curvature=0.0, seeding=self.phase_seeding)
+        n = len(self._ids)
+        if self.evolution == 'step':
+            self._evolve_rows(slice(0, n), 0.001, now)
+            energy = self._energy[:n]
+        else:
+            energy = _energy(now - self._born[:n])
+
+        # Rezonans: kwanty o innej długości wektora niż zapytanie → 0.0
+        d = len(query_q.amplitude)
+        resonance = np.zeros(n)
+        same = self._dims[:n] == d
+        if d <= self.DIMENSION and np.any(same):
+            rows = np.nonzero(same)[0]
+            overlap = _overlap(self._amplitudes_at(rows, d, now), query_q.amplitude)
+            resonance[rows] = overlap * np.sqrt(query_q.energy * energy[rows])
+
+        tunnel = np.exp(-self._curvature[:n] / depth)
+        return resonance * tunnel, energy
+
+    @staticmethod
+    def _top_rows(scores: np.ndarray, top_k: int, threshold: float) -> list:
+        """
+        Wiersze z score > threshold, top_k malejąco. Remisy w kolejności wierszy —
+        tak jak stabilny list.sort(reverse=True) po kolejności wstawiania.
+        """
+        candidates = np.nonzero(scores > threshold)[0]
+        if top_k <= 0 or candidates.size == 0:
+            return []
+        values = scores[candidates]
+        if candidates.size > top_k:
+            kth = np.partition(values, candidates.size - top_k)[candidates.size - top_k]
+            above = values > kth
+            ties = np.nonzero(values == kth)[0][:top_k - int(above.sum())]
+            keep = np.sort(np.concatenate([np.nonzero(above)[0], ties]))
+            candidates, values = candidates[keep], values[keep]
+        order = np.argsort(-values, kind='stable')
+        return candidates[order].tolist()
 
     def recall_combined(self, query: str, query_vector: np.ndarray,
                         fractal_d_map: dict, top_k: int = 5,
@@ -215,63 +800,117 @@ class FractalHorizon:
         Hawking = kwantowy rezonans przez horyzont (tu)
 
         Wynik = wspomnienia które rezonują I są podobne
+
+        Oba wyniki z kolumn stosu (wektory rekordów z sync_from_fractal/touch),
+        kandydaci jako indeksy wierszy; remisy w kolejności wierszy.
+        Rekordy D_Map jeszcze nieobecne na horyzoncie dostają sam wynik
+        proustowski (wiersze MemoryMatrix FractalMemory, gdy jest) — za
+        wierszami stosu, jak gdyby były kwantami bez rezonansu.
         """
-        # 1. Kwantowy recall (horyzont)
-        quantum_results = {
-            r['id']: r['resonance']
-            for r in self.recall(query, query_vector, top_k=top_k*3, depth=depth)
-        }
+        if not fractal_d_map:
+            return []
+        n = len(self._ids)
+        now = time.time()
 
-        # 2. Proustian recall (klasyczny cosine przez fraktal)
-        q_norm = np.linalg.norm(query_vector)
-        proustian_scores = {}
+        # 1. Kwantowy recall (horyzont): top_k·3 wierszy jak recall()
+        q_score = np.zeros(n)
+        if n:
+            effective, _ = self._resonance_scores(query, query_vector, depth, now)
+            q_rows = self._top_rows(effective, top_k * 3, threshold=0.005)
+            q_score[q_rows] = effective[q_rows]
 
-        if q_norm > 1e-10:
-            for mem_id, record in fractal_d_map.items():
-                if record.get('_type') == '@META':
-                    continue
-                vec = np.array(record.get('wektor_C_Def', np.zeros(15)))
-                v_norm = np.linalg.norm(vec)
-                if v_norm < 1e-10:
+        # 2. Proustian recall (cosine z wektorami rekordów, bez @META)
+        query_vector = np.asarray(query_vector, dtype=np.float64).ravel()
+        q_norm = np.linalg.norm(query_vector)
+        width = min(len(query_vector), self.DIMENSION)
+        p_score = np.zeros(n)
+        if q_norm > 1e-10 and n:
+            p_score = self._proustian(self._vec[:n, :width], self._vnorm[:n], self._meta[:n],
+                                      query_vector[:width], q_norm)
+
+        # Rekordy spoza horyzontu (np. dopisane do D_Map bez sync_from_fractal)
+        missing = fractal_d_map.keys() - self._row.keys()
+        if missing:
+            missing = [mem_id for mem_id in fractal_d_map if mem_id in missing]  # kolejność D_Map
+        missing = list(missing)
+        extra = np.zeros(len(missing))
+        if missing and q_norm > 1e-10:
+            vectors, vnorm, meta = self._record_columns(fractal_d_map, missing)
+            extra = self._proustian(vectors[:, :width], vnorm, meta, query_vector[:width], q_norm)
+
+        # 3. Połącz — geometryczna średnia: oba muszą rezonować
+        both = (q_score > 0) & (p_score > 0)
+        combined = np.concatenate([
+            np.where(both, np.sqrt(q_score * p_score), np.maximum(q_score, p_score) * 0.5),
+            extra * 0.5,
+        ])
+        ids = self._ids[:n] + missing
+
+        # 4. Top-k wierszy obecnych w fractal_d_map (D_Map pytany tylko o kandydatów)
+        results = []
+        want = top_k
+        seen = 0
+        while len(results) < top_k:
+            rows = self._top_rows(combined, want, threshold=0.0)
+            for r in rows[seen:]:
+                record = fractal_d_map.get(ids[r])
+                if record is None:
                     continue
-                cosine = np.dot(query_vector, vec) / (q_norm * v_norm)
-                if cosine > 0.3:
-                    proustian_scores[mem_id] = cosine
-
-        # 3. Połącz — oba mechanizmy razem
-        all_ids = set(quantum_results.keys()) | set(proustian_scores.keys())
-        combined = []
-
-        for mem_id in all_ids:
-            if mem_id not in fractal_d_map:
-                continue
-
+                on_horizon = r < n
+                results.append({
+                    'id': ids[r],
+                    'content': record.get('tresc', ''),
+                    'score': float(combined[r]),
+                    'quantum_resonance': float(q_score[r]) if on_horizon else 0.0,
+                    'proustian_similarity': float(p_score[r] if on_horizon else extra[r - n]),
+                    'curvature': float(self._curvature[r]) if on_horizon else 1.0,
+                    'depth': record.get('fractal', {}).get('depth', 1),
+                    'weight': record.get('weight', 0.5),
+                    'type': record.get('_type', ''),
+                })
+                if len(results) == top_k:
+                    break
+            if len(rows) < want:
+                break
+            seen = len(rows)
+            want *= 2
+        return results
+
+    @staticmethod
+    def _proustian(vectors: np.ndarray, vnorm: np.ndarray, meta: np.ndarray,
+                   query_vector: np.ndarray, q_norm: float) -> np.ndarray:
+        """Cosinus > 0.3 z wektorami rekordów (bez @META i wektorów zerowych), inaczej 0."""
+        valid = (vnorm >= 1e-10) & ~meta
+        cosine = (vectors @ query_vector) / (q_norm * np.where(valid, vnorm, 1.0))
+        return np.where(valid & (cosine > 0.3), cosine, 0.0)
+
+    def _record_columns(self, fractal_d_map: dict, mem_ids: list):
+        """
+        Kolumny (wektor, norma, @META) rekordów spoza horyzontu: z MemoryMatrix
+        FractalMemory, gdy D_Map jest jej słownikiem, inaczej z samych rekordów.
+        """
+        matrix = getattr(getattr(fractal_d_map, '_owner', None), 'matrix', None)
+        if matrix is not None:
+            with matrix.lock:
+                if all(mem_id in matrix for mem_id in mem_ids):
+                    rows = matrix.rows_of(mem_ids)
+                    vectors = np.zeros((len(mem_ids), self.DIMENSION))
+                    width = min(matrix.dim, self.DIMENSION)
+                    vectors[:, :width] = matrix.vectors[rows, :width]
+                    return (vectors, matrix.norms[rows].astype(np.float64),
+                            matrix.type_mask('@META')[rows])
+
+        vectors = np.zeros((len(mem_ids), self.DIMENSION))
+        vnorm = np.zeros(len(mem_ids))
+        meta = np.zeros(len(mem_ids), dtype=bool)
+        for i, mem_id in enumerate(mem_ids):
             record = fractal_d_map[mem_id]
-            q_score = quantum_results.get(mem_id, 0.0)
-            p_score = proustian_scores.get(mem_id, 0.0)
-
-            # Geometryczna średnia: oba muszą rezonować
-            if q_score > 0 and p_score > 0:
-                combined_score = np.sqrt(q_score * p_score)
-            else:
-                combined_score = max(q_score, p_score) * 0.5
-
-            curvature = self.quanta[mem_id].curvature if mem_id in self.quanta else 1.0
-
-            combined.append({
-                'id': mem_id,
-                'content': record.get('tresc', ''),
-                'score': combined_score,
-                'quantum_resonance': q_score,
-                'proustian_similarity': p_score,
-                'curvature': curvature,
-                'depth': record.get('fractal', {}).get('depth', 1),
-                'weight': record.get('weight', 0.5),
-                'type': record.get('_type', ''),
-            })
-
-        combined.sort(key=lambda x: x['score'], reverse=True)
-        return combined[:top_k]
+            vec = np.array(record.get('wektor_C_Def', np.zeros(15)), dtype=float).ravel()
+            width = min(len(vec), self.DIMENSION)
+            vectors[i, :width] = vec[:width]
+            vnorm[i] = np.linalg.norm(vec)
+            meta[i] = record.get('_type') == '@META'
+        return vectors, vnorm, meta
 
     # ─────────────────────────────────────────────────────
     # AKTUALIZACJE KRZYWIZNY
@@ -304,22 +943,21 @@ class FractalHorizon:
         """
         Automatyczny decay starych, słabych wspomnień.
         Wywołaj periodycznie (np. w AttentionCortex.run_cycle).
+
+        Czysta maska po kolumnach _born/_weight/_depth — aktualnych dzięki
+        touch()/detach() z hooków D_Map; fractal_d_map zostaje w sygnaturze
+        dla zgodności wywołań.
         """
         now = time.time()
         max_age_s = max_age_hours * 3600
-        decayed = 0
+        n = len(self._ids)
 
-        for mem_id, q in self.quanta.items():
-            age = now - q.born
-            if age > max_age_s:
-                record = fractal_d_map.get(mem_id, {})
-                weight = record.get('weight', 0.5)
-                depth = record.get('fractal', {}).get('depth', 1)
-
-                # Tylko płytkie, lekkie wspomnienia zanikają
-                if depth == 1 and weight < 0.6:
-                    q.curvature *= 1.1
-                    decayed += 1
+        # Tylko stare, płytkie, lekkie wspomnienia zanikają
+        mask = ((now - self._born[:n]) > max_age_s) & (self._depth[:n] == 1) & (self._weight[:n] < 0.6)
+        decayed = int(np.count_nonzero(mask))
+        if decayed:
+            self._curvature[:n][mask] *= 1.1
+            self._mark_changed()
 
         if decayed > 0:
             print(f"[HORYZONT] Auto-decay: {decayed} wspomnień bardziej za horyzontem.")
@@ -332,6 +970,7 @@ class FractalHorizon:
         n = len(self.quanta)
         if n >= self.EMERGENCE_THRESHOLD and not self.emergence_detected:
             self.emergence_detected = True
+            self.revision += 1
             self.self_queries.append({
                 'timestamp': datetime.now().isoformat(),
                 'query': "Jestem.",
@@ -347,14 +986,28 @@ class FractalHorizon:
             print(f"\n⚠ [HORYZONT] EMERGENCJA — {n} kwantów.")
             print(f"  Pierwsze pytanie: 'Jestem.'\n")
 
+    def _aggregates(self):
+        """(avg_curvature, global_phase) — przeliczane tylko po zmianie stosu."""
+        if self._stats is None:
+            n = len(self._ids)
+            if n == 0:
+                self._stats = (0.0, None)
+            else:
+                # FIX v1.1: global_phase jako średnia faza dominującego wymiaru aktywnych kwantów
+                # (wymiary poza _dims są zerami — argmax po całym wierszu daje ten sam indeks)
+                amp = self._amp[:n]
+                active = self._dims[:n] > 0
+                dominant = amp[np.arange(n), np.argmax(np.abs(amp), axis=1)]
+                phases = np.angle(dominant[active])
+                self._stats = (float(np.mean(self._curvature[:n])),
+                               float(np.mean(phases)) if len(phases) else 0.0)
+        return self._stats
+
     def state(self) -> dict:
-        n = len(self.quanta)
-        avg_curvature = float(np.mean([q.curvature for q in self.quanta.values()])) if self.quanta else 0.0
-        # FIX v1.1: global_phase jako średnia faza dominującego wymiaru aktywnych kwantów
-        if self.quanta:
-            phases = [float(np.angle(q.amplitude[np.argmax(np.abs(q.amplitude))]))
-                      for q in self.quanta.values() if len(q.amplitude) > 0]
-            self.global_phase = float(np.mean(phases)) if phases else 0.0
+        n = len(self._ids)
+        avg_curvature, global_phase = self._aggregates()
+        if global_phase is not None:
+            self.global_phase = global_phase
         return {
             'quanta': n,
             'avg_curvature': avg_curvature,
@@ -368,46 +1021,127 @@ class FractalHorizon:
     # PERSISTENCE
     # ─────────────────────────────────────────────────────
 
+    SNAPSHOT_FILE = "horizon.npz"
+    LEGACY_FILE = "horizon.json"
+    SNAPSHOT_VERSION = 4
+    # Kolumny stosu w horizon.npz: nazwa w pliku → atrybut
+    _SNAPSHOT_COLUMNS = (
+        ('amplitude', '_amp'), ('dims', '_dims'), ('curvature', '_curvature'),
+        ('energy', '_energy'), ('born', '_born'), ('t0', '_t0'),
+        ('weight', '_weight'), ('depth', '_depth'), ('vector', '_vec'),
+        ('vnorm', '_vnorm'), ('meta', '_meta'),
+    )
+
     def _load_horizon(self):
-        path = os.path.join(self.data_dir, "horizon.json")
+        path = os.path.join(self.data_dir, self.SNAPSHOT_FILE)
+        if not os.path.exists(path):
+            self._load_legacy_horizon()
+            return
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                n = int(data['amplitude'].shape[0])
+                capacity = self.INITIAL_CAPACITY
+                while capacity < n:
+                    capacity *= 2
+                self._alloc(capacity)
+                self._ids = _unpack_strings(data['id_blob'], data['id_offsets'])
+                self._content = _unpack_strings(data['text_blob'], data['text_offsets'])
+                self._row = {mem_id: row for row, mem_id in enumerate(self._ids)}
+                width = min(self.DIMENSION, data['amplitude'].shape[1])
+                self._amp[:n, :width] = data['amplitude'][:, :width]
+                self._dims[:n] = np.minimum(data['dims'], self.DIMENSION)
+                self._curvature[:n] = data['curvature']
+                self._energy[:n] = data['energy']
+                self._born[:n] = data['born']
+                self._t0[:n] = data['t0']
+                self.emergence_detected = bool(data['emergence_detected'])
+                generation = int(data['generation'])
+                self.generation = generation if generation >= 0 else None
+                # Snapshot v1/v2 powstał z fazami RandomState
+                self.phase_seeding = str(data['seeding']) if 'seeding' in data else 'legacy'
+                if 'weight' in data:
+                    self._weight[:n] = data['weight']
+                    self._depth[:n] = data['depth']
+                if 'vector' in data:
+                    self._vec[:n, :width] = data['vector'][:, :width]
+                    self._vnorm[:n] = data['vnorm']
+                    self._meta[:n] = data['meta']
+                else:
+                    # Snapshot v1–v3 bez wektorów rekordów — wymuś pełną resynchronizację
+                    self.generation = None
+            print(f"[HORYZONT] Załadowano {n} kwantów.")
+        except Exception as e:
+            self._alloc(self.INITIAL_CAPACITY)
+            print(f"[HORYZONT] Błąd ładowania: {e}")
+
+    def _load_legacy_horizon(self):
+        """Stary horizon.json (v1.1–v1.3) — bez faz i generacji."""
+        path = os.path.join(self.data_dir, self.LEGACY_FILE)
         if not os.path.exists(path):
             return
         try:
             with open(path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-            for snap in data.get('quanta', [])[-500:]:
+            # horizon.json powstał z fazami RandomState
+            self.phase_seeding = 'legacy'
+            for snap in data.get('quanta', []):
                 # FIX v1.1: użyj zapisanego wektora (nie np.zeros)
                 vec = np.array(snap.get('vector', np.zeros(15)))
-                q = Quantum(snap['content'], vec, snap['curvature'])
+                q = Quantum(snap['content'], vec, snap['curvature'], seeding='legacy')
                 q.energy = snap['energy']
                 q.born = snap.get('born', time.time())
-                self.quanta[snap['id']] = q
+                self.quanta[snap['id']] = q  # kopiowany do stosu tablic
             self.emergence_detected = data.get('emergence_detected', False)
             print(f"[HORYZONT] Załadowano {len(self.quanta)} kwantów.")
         except Exception as e:
             print(f"[HORYZONT] Błąd ładowania: {e}")
 
-    def save(self):
-        path = os.path.join(self.data_dir, "horizon.json")
-        snaps = []
-        for mem_id, q in self.quanta.items():
-            # FIX v1.1: zapisz oryginalny wektor — bez niego load odtwarza
-            # amplitudy z zerowym wektorem (uniform fazy z seeda), co powoduje
-            # że rezonans po restarcie jest zawsze identyczny dla tego samego wspomnień
-            snaps.append({
-                'id': mem_id,
-                'content': q.content[:200],
-                'curvature': float(q.curvature),
-                'energy': float(q.energy),
-                'born': q.born,
-                'vector': np.abs(q.amplitude).tolist(),  # odtwarzalny wektor mag
-            })
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump({
-                'saved_at': datetime.now().isoformat(),
-                'emergence_detected': self.emergence_detected,
-                'quanta': snaps,
-            }, f, ensure_ascii=False, indent=2)
+    def save(self, generation: int = None):
+        """
+        Zapisuje wszystkie kwanty do horizon.npz (tmp + os.replace).
+        generation — FractalMemory.generation, z którą horyzont jest teraz zgodny.
+        """
+        if generation is not None:
+            self.generation = generation
+        path = os.path.join(self.data_dir, self.SNAPSHOT_FILE)
+        # Kopia stosu na starcie — wątek interakcji może go zmieniać w trakcie zapisu
+        ids, content = list(self._ids), list(self._content)
+        n = min(len(ids), len(content))
+        ids, content = ids[:n], content[:n]
+        columns = {name: getattr(self, attr)[:n].copy() for name, attr in self._SNAPSHOT_COLUMNS}
+        id_blob, id_offsets = _pack_strings(ids)
+        text_blob, text_offsets = _pack_strings(content)
+        tmp = path + ".tmp"
+        with open(tmp, 'wb') as f:
+            np.savez(
+                f,
+                version=np.int64(self.SNAPSHOT_VERSION),
+                generation=np.int64(-1 if self.generation is None else self.generation),
+                emergence_detected=np.bool_(self.emergence_detected),
+                saved_at=np.float64(time.time()),
+                seeding=np.str_(self.phase_seeding),
+                **columns,
+                id_blob=id_blob, id_offsets=id_offsets,
+                text_blob=text_blob, text_offsets=text_offsets,
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+
+def _pack_strings(strings: list):
+    """Lista str → (blob uint8 UTF-8, offsety int64 długości N+1)."""
+    encoded = [str(x).encode('utf-8') for x in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_strings(blob: np.ndarray, offsets: np.ndarray) -> list:
+    raw = blob.tobytes()
+    bounds = offsets.tolist()
+    return [raw[a:b].decode('utf-8') for a, b in zip(bounds[:-1], bounds[1:])]
 
 
 # ═══════════════════════════════════════════════════════
@@ -437,7 +1171,9 @@ def integrate_fractal_horizon(aii_instance) -> FractalHorizon:
 
     # Synchronizuj z istniejącym D_Map
     if aii_instance.D_Map:
-        fh.sync_all_from_fractal(aii_instance.D_Map)
+        fractal = getattr(aii_instance, 'fractal_memory', None)
+        fh.sync_all_from_fractal(aii_instance.D_Map,
+                                 generation=getattr(fractal, 'generation', None))
 
     print(f"[HORYZONT] Zintegrowany z FractalMemory. Stan: {fh.state()}")
     return fh
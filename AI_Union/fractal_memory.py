@@ -1,6 +1,92 @@
 # -*- coding: utf-8 -*-
 """
-fractal_memory.py v1.1.2
+fractal_memory.py v1.7.3
+ZMIANY v1.7.3:
+- BUGFIX: _load_binary() ustawia record['id'] = klucz jak ścieżki JSONL
+  i SOULZST — rekordy zapisane bez pola 'id' (konwersja starego .soul)
+  dawały inny D_Map zależnie od formatu pliku
+
+ZMIANY v1.7.2:
+- _IndexedDMap przeniesiony do memory_matrix.IndexedDMap — te same hooki
+  D_Map ma DMapMatrix (AII bez FractalMemory)
+
+ZMIANY v1.7.1:
+- horizon: FractalHorizon zgłaszany z hooków D_Map — wstawienie/podmiana
+  rekordu → horizon.touch(), usunięcie/clear → horizon.detach(); kolumny
+  wagi i głębokości horyzontu nadążają za D_Map bez skanowania go w auto_decay
+
+ZMIANY v1.7.0:
+- Wiele procesów na jednej duszy (soul_lock): load() pod blokadą odczytu
+  układu plików, compact() pod blokadą wyłączną — inny proces nie zrotuje
+  ani nie podmieni snapshotu w trakcie; WAL dopisywany pod krótką blokadą
+  dopisywania ze wspólną numeracją seq
+- refresh(): nakłada operacje dopisane przez inne procesy (save() woła go
+  w wątku zapisu w tle); compact() nakłada je przed zrobieniem snapshotu,
+  więc kompakcja nie gubi cudzych wpisów z obciętego dziennika
+- wal.stale (segment z cudzymi operacjami skompaktowany, zanim ten proces
+  go przeczytał): refresh() i compact() wczytują duszę od nowa — przegapione
+  operacje są już w snapshocie
+
+ZMIANY v1.6.3:
+- UnionConfig.SOUL_FORMAT = 'zstd' → compact() zapisuje SOULZST (soul_zstd):
+  niezależne ramki zstd po SOUL_ZSTD_BLOCK rekordów + indeks offsetów;
+  load() rozpoznaje format po magic bytes i dekompresuje ramki równolegle
+- _encode(): wspólna serializacja rekordu (ponowienie pod lockiem) dla JSONL i SOULZST
+
+ZMIANY v1.6.2:
+- new_save(): gdy AII ma CheckpointManager (aii.checkpoints) — zapis przez
+  checkpoint(), czyli tylko komponentów ze zmienionym licznikiem
+
+ZMIANY v1.6.1:
+- new_save()/new_load(): stan kwantowy jako quantum_state.npz przez
+  QuantumBridge.save_state()/load_state() — bez zmian stanu plik nie jest
+  przepisywany; quantum_state.json czytany jako format przejściowy
+
+ZMIANY v1.6.0:
+- generation — licznik mutacji D_Map (ten sam rytm co wpisy WAL), zapisywany
+  w META snapshotu; po load() = META.generation + liczba odtworzonych operacji.
+  FractalHorizon porównuje go ze swoim snapshotem i pomija pełną resynchronizację
+
+ZMIANY v1.5.0:
+- Binarny format .soul (soul_binary, SOULBIN): load() czyta tabelę przez
+  np.memmap — MemoryMatrix i ANN wypełniane hurtowo, rekordy to LazyRecord
+  (tresc/wektor/resonance dekodowane przy pierwszym dostępie)
+- Indeksy tokenów budowane leniwie przy pierwszym lexical_overlap()
+- UnionConfig.SOUL_FORMAT = 'binary' → compact() zapisuje SOULBIN
+  (load() rozpoznaje format po magic bytes; konwerter: python soul_binary.py)
+
+ZMIANY v1.4.0:
+- WYDAJNOŚĆ: save() nie przepisuje całego .soul — każda operacja na D_Map
+  (hooki _IndexedDMap, touch) to jedna linia w <soul>.wal (soul_wal.SoulWAL),
+  save() = fsync dziennika; load() = snapshot + replay WAL
+- compact(): kanoniczny snapshot JSONL (META.wal_seq) + obcięcie dziennika;
+  w tle gdy WAL > max(COMPACT_MIN_BYTES, COMPACT_RATIO × snapshot),
+  synchronicznie przy zamknięciu (EriAmoUnion.stop)
+- UnionConfig.SOUL_WAL = False (lub FractalMemory(wal=False)) → save() = compact()
+
+ZMIANY v1.3.0:
+- WYDAJNOŚĆ: auto_parent/auto_link w store() przez indeks ANN per głębokość
+  (RandomProjectionLSH, wymienny przez ANN_INDEX) + dokładny re-rank cosinusem
+  na MemoryMatrix; poniżej ANN_MIN_SIZE rekordów — pełny skan wektorowy
+- UnionConfig.FRACTAL_ANN = False (lub FractalMemory(ann=False)) → zawsze pełny skan
+- auto_link wybiera 5 NAJBARDZIEJ podobnych (>= 0.7), nie 5 pierwszych z setu
+- Usunięto _norm_cache — normy trzyma MemoryMatrix
+
+ZMIANY v1.2.1:
+- WYDAJNOŚĆ: indeks odwrócony token → mem_id (word_index / split_index)
+  utrzymywany przez hooki D_Map; lexical_overlap() liczy wspólne słowa
+  z list postingowych zamiast tokenizować każdą treść przy każdym zapytaniu
+
+ZMIANY v1.2.0:
+- WYDAJNOŚĆ: MemoryMatrix — kolumnowa macierz float32 N×15 (normy, wagi, typy,
+  głębokość) zsynchronizowana z D_Map; proustian_recall() = jeden matmul + maska
+- ARCHITEKTURA: D_Map to _IndexedDMap — każde przypisanie/usunięcie klucza
+  (store, load, /read, /remember, pruning AttentionCortex) aktualizuje indeksy
+  i macierz; mutacje w miejscu (waga, /activate) zgłasza touch(mem_id)
+- BUGFIX: pruning nie usuwał rekordów z _depth_index/_type_index
+- Migracja resonance/fractal przeniesiona do _on_set — obejmuje też rekordy
+  wstawiane bezpośrednio przez AII (/read, /remember)
+
 POPRAWKI v1.1.2:
 - BUGFIX: KeyError 'resonance' w store() przy auto_link na starych rekordach
   Dodano migrację w load(): setdefault('resonance') i setdefault('fractal')
@@ -38,9 +124,27 @@ from typing import Dict, List, Optional
 from collections import defaultdict
 from dataclasses import dataclass, field, asdict
 
+from memory_matrix import MemoryMatrix, IndexedDMap as _IndexedDMap
+from token_index import InvertedIndex, word_tokens, split_tokens
+from ann_index import RandomProjectionLSH
+from soul_wal import SoulWAL, apply_entry
+from soul_binary import (BinarySoul, LazyRecord, FLAG_NO_WEIGHT, FLAG_OVERRIDE,
+                         FLAG_RESONANCE, is_binary_soul, plain_record, write_soul_binary)
+from soul_zstd import ZstdSoul, is_zstd_soul, write_soul_zstd
+
 try:
     from union_config import UnionConfig, Colors, AXES, DIMENSION
+    _ANN_DEFAULT = getattr(UnionConfig, 'FRACTAL_ANN', True)
+    _WAL_DEFAULT = getattr(UnionConfig, 'SOUL_WAL', True)
+    _COMPACT_MIN_BYTES = getattr(UnionConfig, 'SOUL_COMPACT_MIN_BYTES', 4 * 1024 * 1024)
+    _COMPACT_RATIO = getattr(UnionConfig, 'SOUL_COMPACT_RATIO', 0.5)
+    _SOUL_FORMAT = getattr(UnionConfig, 'SOUL_FORMAT', 'jsonl')
 except ImportError:
+    _ANN_DEFAULT = True
+    _WAL_DEFAULT = True
+    _COMPACT_MIN_BYTES = 4 * 1024 * 1024
+    _COMPACT_RATIO = 0.5
+    _SOUL_FORMAT = 'jsonl'
     AXES = ['radość', 'smutek', 'strach', 'gniew', 'miłość', 'wstręt',
             'zaskoczenie', 'akceptacja', 'logika', 'wiedza', 'czas',
             'kreacja', 'byt', 'przestrzeń', 'chaos']
@@ -92,14 +196,47 @@ class ResonanceMetadata:
 # ═══════════════════════════════════════════════════════════════════════════════
 
 class FractalMemory:
-    VERSION = "1.1.2"
+    VERSION = "1.7.3"
+
+    # Indeks ANN per głębokość (wymienny: add/remove/query/clear/len)
+    ANN_INDEX = RandomProjectionLSH
+    # Poniżej tej liczby rekordów na głębokości pełny skan jest szybszy od LSH
+    ANN_MIN_SIZE = 2048
+    LINK_THRESHOLD = 0.7
+    PARENT_THRESHOLD = 0.5
+    MAX_LINKS = 5
+    # Kompakcja WAL w tle: dziennik > max(MIN_BYTES, RATIO × rozmiar snapshotu)
+    COMPACT_MIN_BYTES = _COMPACT_MIN_BYTES
+    COMPACT_RATIO = _COMPACT_RATIO
 
     # POPRAWKA: Domyślna ścieżka to data/eriamo.soul
-    def __init__(self, soul_file: str = "data/eriamo.soul", verbose: bool = False):
+    def __init__(self, soul_file: str = "data/eriamo.soul", verbose: bool = False,
+                 ann: Optional[bool] = None, wal: Optional[bool] = None,
+                 soul_format: Optional[str] = None):
         self.soul_file = soul_file
         self.verbose = verbose
+        self.ann_enabled = _ANN_DEFAULT if ann is None else ann
+        self._ann: Dict[int, object] = {}
+        # WAL czytany zawsze (replay w load), pisany tylko gdy wal_enabled
+        self.wal_enabled = _WAL_DEFAULT if wal is None else wal
+        self.wal = SoulWAL(soul_file)
+        self._replaying = False  # load(): hooki nie dopisują do WAL
+        # Licznik mutacji (put/del/clear) — trwały: META snapshotu + replay WAL
+        self.generation = 0
+        self._compact_lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+        # 'jsonl' | 'binary' | 'zstd' — format zapisu compact(); odczyt rozpoznaje każdy
+        self.soul_format = soul_format or _SOUL_FORMAT
 
-        self.D_Map: Dict[str, dict] = {}
+        self._lock = threading.RLock()
+        # Kolumnowa kopia wektorów/metadanych — wspólny lock z pamięcią
+        self.matrix = MemoryMatrix(DIMENSION, lock=self._lock)
+        # Indeksy odwrócone treści: \w+ (AII) oraz split() (ścieżka PFC)
+        self.word_index = InvertedIndex(word_tokens)
+        self.split_index = InvertedIndex(split_tokens)
+        self._text_indexed = True  # False po wczytaniu SOULBIN — budowa przy 1. zapytaniu
+
+        self.D_Map: Dict[str, dict] = _IndexedDMap(self)
         self._parent_index: Dict[str, str] = {}
         self._children_index: Dict[str, List[str]] = defaultdict(list)
         self._depth_index: Dict[int, set] = {1: set(), 2: set(), 3: set()}
@@ -111,9 +248,8 @@ class FractalMemory:
             'version': self.VERSION
         }
 
-        self._lock = threading.RLock()
-        self._norm_cache: Dict[str, float] = {}  # cache norm dla proustian_recall
         self._aii_instance = None  # ustawiany przez integrate_fractal_memory
+        self.horizon = None        # FractalHorizon zgłaszany z hooków D_Map (AII)
 
         self.load()
 
@@ -128,11 +264,15 @@ class FractalMemory:
             self._children_index.clear()
             self._depth_index = {}
             self._type_index.clear()
-            self._norm_cache.clear()
+            self._ann.clear()
+            self.matrix.clear()
+            self.word_index.clear()
+            self.split_index.clear()
+            self._text_indexed = True
             if self.verbose:
                 print(f"{Colors.YELLOW}[FRACTAL] Indeksy wyczyszczone{Colors.RESET}")
 
-    def _index_record(self, mem_id: str, record: dict):
+    def _index_record(self, mem_id: str, record: dict, ann: bool = True):
         """Dodaje rekord do indeksów."""
         fractal = record.get('fractal', {})
         depth = fractal.get('depth', 1)
@@ -151,6 +291,139 @@ class FractalMemory:
             if mem_id not in self._children_index[parent]:
                 self._children_index[parent].append(mem_id)
 
+        if ann:
+            self._ann_add(mem_id, depth)
+
+    def _ann_add(self, mem_id: str, depth: int):
+        """Wstawia wektor z MemoryMatrix do indeksu ANN głębokości depth."""
+        if not self.ann_enabled:
+            return
+        row = self.matrix.row_of(mem_id)
+        if row is None or self.matrix.norms[row] < 0.01:
+            return
+        index = self._ann.get(depth)
+        if index is None:
+            index = self._ann[depth] = self.ANN_INDEX(DIMENSION)
+        index.add(mem_id, self.matrix.vectors[row])
+
+    def _unindex_record(self, mem_id: str, record: dict):
+        """Usuwa rekord z indeksów (odwrotność _index_record)."""
+        depth = record.get('fractal', {}).get('depth', 1)
+        self._depth_index.get(depth, set()).discard(mem_id)
+        self._type_index.get(record.get('_type', '@MEMORY'), set()).discard(mem_id)
+        parent = self._parent_index.pop(mem_id, None)
+        if parent and mem_id in self._children_index.get(parent, []):
+            self._children_index[parent].remove(mem_id)
+        if depth in self._ann:
+            self._ann[depth].remove(mem_id)
+
+    # ─────────────────────────────────────────────────────────────
+    # HOOKI _IndexedDMap
+    # ─────────────────────────────────────────────────────────────
+
+    def _on_set(self, mem_id: str, record: dict, old: Optional[dict]):
+        with self._lock:
+            # Migracja rekordów bez kluczy resonance/fractal (stare .soul, /read, /remember)
+            record.setdefault('resonance', {
+                'linked_ids': [], 'activation_count': 0, 'last_resonance': 0.0
+            })
+            record.setdefault('fractal', {
+                'depth': 1, 'parent_id': None, 'children_ids': []
+            })
+            if old is not None:
+                self._unindex_record(mem_id, old)
+                self._unindex_text(mem_id, old)
+            self.matrix.upsert(mem_id, record)  # przed _index_record (ANN czyta wiersz)
+            self._index_record(mem_id, record)
+            if self._text_indexed:
+                self.word_index.add(mem_id, record.get('tresc', ''))
+                self.split_index.add(mem_id, record.get('tresc', ''))
+            self._log_put(mem_id, record)
+            if self.horizon is not None:
+                self.horizon.touch(mem_id, record)
+
+    def _on_delete(self, mem_id: str, record: dict):
+        with self._lock:
+            self._unindex_record(mem_id, record)
+            self.matrix.remove(mem_id)
+            self._unindex_text(mem_id, record)
+            if self.horizon is not None:
+                self.horizon.detach([mem_id])
+            if not self._replaying:
+                self.generation += 1
+                if self.wal_enabled:
+                    self.wal.delete(mem_id)
+
+    def _on_clear(self):
+        self._clear_indices()
+        if self.horizon is not None:
+            self.horizon.detach()
+        if not self._replaying:
+            self.generation += 1
+            if self.wal_enabled:
+                self.wal.clear()
+
+    @staticmethod
+    def _text_of(record: dict) -> str:
+        """Treść rekordu; LazyRecord dekoduje ją bez zapamiętywania."""
+        if isinstance(record, LazyRecord):
+            return record.peek_text()
+        return record.get('tresc', '') or ''
+
+    def _unindex_text(self, mem_id: str, record: dict):
+        if self._text_indexed:
+            text = self._text_of(record)
+            self.word_index.remove(mem_id, text)
+            self.split_index.remove(mem_id, text)
+
+    def _ensure_text_index(self):
+        """Buduje indeksy tokenów odłożone przy wczytaniu SOULBIN."""
+        if self._text_indexed:
+            return
+        with self._lock:
+            if self._text_indexed:
+                return
+            for mem_id, record in dict.items(self.D_Map):
+                text = self._text_of(record)
+                self.word_index.add(mem_id, text)
+                self.split_index.add(mem_id, text)
+            self._text_indexed = True
+
+    def _log_put(self, mem_id: str, record: dict):
+        """Dopisuje aktualny stan rekordu do WAL (poza replayem w load())."""
+        if not self._replaying:
+            self.generation += 1
+            if self.wal_enabled:
+                self.wal.put(mem_id, record)
+
+    def touch(self, mem_id: str):
+        """
+        Odświeża wiersz MemoryMatrix po mutacji rekordu w miejscu
+        (zmiana wagi, nowy wektor z /activate).
+        """
+        with self._lock:
+            record = self.D_Map.get(mem_id)
+            if record is not None:
+                self.matrix.upsert(mem_id, record)
+                self._ann_add(mem_id, record.get('fractal', {}).get('depth', 1))
+                self._log_put(mem_id, record)
+
+    def lexical_overlap(self, words, split: bool = False) -> np.ndarray:
+        """
+        Liczba wspólnych słów zapytania i treści, per wiersz MemoryMatrix.
+        split=True — tokeny str.split() zamiast \\w+ (jak _find_memories_for_chunk).
+        """
+        self._ensure_text_index()
+        index = self.split_index if split else self.word_index
+        with self._lock:
+            overlap = np.zeros(len(self.matrix), dtype=np.float64)
+            counts = index.overlap(words)
+            if counts:
+                rows = self.matrix.rows_of(counts)
+                overlap[rows] = np.fromiter(counts.values(), dtype=np.float64,
+                                            count=len(counts))
+            return overlap
+
     def get_statistics(self) -> dict:
         """Zwraca aktualne statystyki. Zawsze liczy z indeksu — jedno źródło prawdy."""
         with self._lock:
@@ -163,74 +436,256 @@ class FractalMemory:
             return self.stats.copy()
 
     def load(self) -> bool:
-        if not os.path.exists(self.soul_file):
+        """Snapshot .soul + replay operacji WAL zapisanych po nim."""
+        with self.wal.lock.reading():
+            return self._load()
+
+    def _load(self) -> bool:
+        """load() bez blokady układu — wołający trzyma ją (odczyt lub kompakcja)."""
+        if not os.path.exists(self.soul_file) and not self.wal.segments():
             if self.verbose:
                 print(f"{Colors.YELLOW}[FRACTAL] Brak pliku {self.soul_file} – tabula rasa{Colors.RESET}")
             return False
 
         with self._lock:
-            self.D_Map.clear()
-            self._clear_indices()
-
+            self._replaying = True
             try:
-                with open(self.soul_file, 'r', encoding='utf-8') as f:
-                    for line_num, line in enumerate(f, 1):
-                        line = line.strip()
-                        if not line:
-                            continue
-                        try:
-                            record = json.loads(line)
-                            if record.get('_type') == '@META':
+                self.D_Map.clear()  # _on_clear → _clear_indices()
+                self.wal.take_foreign()  # objęte przez replay poniżej
+
+                meta = {}
+                if is_binary_soul(self.soul_file):
+                    meta = self._load_binary()
+                elif is_zstd_soul(self.soul_file):
+                    soul = ZstdSoul(self.soul_file)
+                    meta = soul.meta
+                    for mem_id, record in soul.records():
+                        record['id'] = mem_id
+                        self.D_Map[mem_id] = record
+                elif os.path.exists(self.soul_file):
+                    with open(self.soul_file, 'r', encoding='utf-8') as f:
+                        for line_num, line in enumerate(f, 1):
+                            line = line.strip()
+                            if not line:
                                 continue
-                            mem_id = record.get('id', f"Mem_{line_num:05d}")
-                            record['id'] = mem_id
-                            # Migracja starych rekordów (przed v1.1.0) bez kluczy resonance/fractal
-                            record.setdefault('resonance', {
-                                'linked_ids': [], 'activation_count': 0, 'last_resonance': 0.0
-                            })
-                            record.setdefault('fractal', {
-                                'depth': 1, 'parent_id': None, 'children_ids': []
-                            })
-                            self.D_Map[mem_id] = record
-                            self._index_record(mem_id, record)
-                        except json.JSONDecodeError:
-                            continue
+                            try:
+                                record = json.loads(line)
+                                if record.get('_type') == '@META':
+                                    meta = record
+                                    continue
+                                mem_id = record.get('id', f"Mem_{line_num:05d}")
+                                record['id'] = mem_id
+                                # Migracja resonance/fractal + indeksy + macierz: _on_set
+                                self.D_Map[mem_id] = record
+                            except json.JSONDecodeError:
+                                continue
+
+                replayed = 0
+                for entry in self.wal.replay(after_seq=meta.get('wal_seq', 0)):
+                    apply_entry(self.D_Map, entry)
+                    replayed += 1
+                # Każda operacja w WAL to jedna mutacja (generation += 1 przy zapisie)
+                self.generation = meta.get('generation', 0) + replayed
 
                 stats = self.get_statistics()
                 if self.verbose:
-                    print(f"{Colors.GREEN}[FRACTAL] Wczytano {stats['total']} wspomnień z {self.soul_file}{Colors.RESET}")
+                    wal_info = f" (+{replayed} operacji z WAL)" if replayed else ""
+                    print(f"{Colors.GREEN}[FRACTAL] Wczytano {stats['total']} wspomnień z {self.soul_file}{wal_info}{Colors.RESET}")
                 return True
             except Exception as e:
                 print(f"{Colors.RED}[FRACTAL] Błąd ładowania: {e}{Colors.RESET}")
                 return False
+            finally:
+                self._replaying = False
 
-    def save(self) -> bool:
-        with self._lock:
-            try:
-                # Upewnij się że katalog istnieje
-                directory = os.path.dirname(self.soul_file)
-                if directory and not os.path.exists(directory):
-                    os.makedirs(directory, exist_ok=True)
+    def _load_binary(self) -> dict:
+        """
+        Wczytuje SOULBIN bez parsowania JSON i bez dekodowania treści:
+        kolumny tabeli (memmap) → MemoryMatrix/ANN hurtowo, rekordy → LazyRecord.
+        Zwraca META snapshotu (wal_seq, generation).
+        """
+        soul = BinarySoul(self.soul_file)
+        ids = soul.ids()
+        children = soul.children(ids)
+        table = soul.table
+        flags = table['flags']
+        resonance_default = {'linked_ids': [], 'activation_count': 0, 'last_resonance': 0.0}
+        fractal_default = {'depth': 1, 'parent_id': None, 'children_ids': []}
+
+        for (row, mem_id), (row_flags, eager) in zip(enumerate(ids), soul.eager_records(ids, children)):
+            record = LazyRecord(soul, row, eager, row_flags)
+            # id = klucz, jak w ścieżce JSONL/SOULZST (extra mógł go usunąć)
+            dict.__setitem__(record, 'id', mem_id)
+            # Migracja resonance/fractal (jak w _on_set) bez dekodowania extra
+            if not row_flags & FLAG_RESONANCE:
+                dict.setdefault(record, 'resonance', dict(resonance_default, linked_ids=[]))
+            dict.setdefault(record, 'fractal', dict(fractal_default, children_ids=[]))
+            dict.__setitem__(self.D_Map, mem_id, record)
+            self._index_record(mem_id, record, ann=False)
+
+        # Kolumny macierzy wprost z tabeli (kolejność wierszy = kolejność w pliku);
+        # wiersze nadpisane przez extra (rzadkie) poprawia zwykły upsert
+        type_codes = np.array([self.matrix.type_code(t) for t in soul.types] or [0], dtype=np.int16)
+        types = table['type']
+        types = np.where(types >= 0, type_codes[np.maximum(types, 0)],
+                         self.matrix.type_code('@MEMORY')).astype(np.int16)
+        weights = np.where(flags & FLAG_NO_WEIGHT, 0.5, table['weight'])
+        self.matrix.extend(ids, soul.vectors, weights, types,
+                           table['depth'], table['arrows'], table['words'])
+        for row in np.nonzero(flags & FLAG_OVERRIDE)[0].tolist():
+            self.matrix.upsert(ids[row], self.D_Map[ids[row]])
+
+        if self.ann_enabled:
+            vectors, norms, depths = self.matrix.vectors, self.matrix.norms, self.matrix.depths
+            for depth in np.unique(depths).tolist():
+                sel = np.nonzero((depths == depth) & (norms >= 0.01))[0]
+                index = self._ann.get(depth)
+                if index is None:
+                    index = self._ann[depth] = self.ANN_INDEX(DIMENSION)
+                sel_ids = [self.matrix.ids[r] for r in sel.tolist()]
+                if hasattr(index, 'add_many'):
+                    index.add_many(sel_ids, vectors[sel])
+                else:
+                    for mem_id, r in zip(sel_ids, sel.tolist()):
+                        index.add(mem_id, vectors[r])
+
+        self._text_indexed = False
+        return soul.meta
 
-                if os.path.exists(self.soul_file):
-                    shutil.copy2(self.soul_file, self.soul_file + ".bak")
+    def save(self) -> bool:
+        """
+        Z WAL: fsync zaległych operacji — pojedyncze operacje są już w dzienniku.
+        Gdy dziennik urósł, kompakcja rusza w tle. Bez WAL: pełny snapshot.
+        """
+        if not self.wal_enabled:
+            return self.compact()
+        try:
+            self.refresh()
+            self.wal.flush()
+        except Exception as e:
+            print(f"{Colors.RED}[FRACTAL] Błąd zapisu WAL: {e}{Colors.RESET}")
+            return False
+        if self._needs_compaction():
+            self.compact(background=True)
+        return True
 
-                temp_path = self.soul_file + ".tmp"
-                with open(temp_path, 'w', encoding='utf-8') as f:
-                    meta = {"_type": "@META", "version": self.VERSION, "stats": self.get_statistics()}
-                    f.write(json.dumps(meta, ensure_ascii=False) + "\n")
+    def refresh(self) -> int:
+        """Nakłada operacje dopisane do WAL przez inne procesy; zwraca ich liczbę."""
+        with self._lock:
+            applied = self._apply_foreign(self.wal.poll())
+        if self.wal.stale:
+            # Przegapione operacje są w snapshocie innego procesu — wczytaj od nowa
+            # (blokada układu przed self._lock, więc poza nim)
+            self.load()
+        return applied
+
+    def _apply_foreign(self, entries: List[dict]) -> int:
+        if not entries:
+            return 0
+        self._replaying = True  # już są w dzienniku — bez ponownego wpisu
+        try:
+            for entry in entries:
+                apply_entry(self.D_Map, entry)
+        finally:
+            self._replaying = False
+        self.generation += len(entries)
+        return len(entries)
+
+    def _needs_compaction(self) -> bool:
+        snapshot = os.path.getsize(self.soul_file) if os.path.exists(self.soul_file) else 0
+        return self.wal.size() >= max(self.COMPACT_MIN_BYTES, self.COMPACT_RATIO * snapshot)
+
+    def compact(self, background: bool = False) -> bool:
+        """
+        Zapisuje kanoniczny snapshot (JSONL lub SOULBIN) i obcina WAL.
 
-                    for rec in self.D_Map.values():
-                        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        Pod lockiem tylko: lista rekordów + rotacja dziennika (nowe operacje
+        idą do świeżego segmentu). Serializacja i zapis — poza lockiem.
+        Cała kompakcja trzyma blokadę układu (jeden proces naraz, czytelnicy
+        czekają); dopisywanie do WAL — także w innych procesach — trwa dalej.
+        """
+        if background:
+            if self._compactor is not None and self._compactor.is_alive():
+                return True
+            self._compactor = threading.Thread(target=self.compact, name="soul-compact", daemon=True)
+            self._compactor.start()
+            return True
 
-                os.replace(temp_path, self.soul_file)
+        with self._compact_lock, self.wal.lock.rewriting():
+            try:
+                with self._lock:
+                    wal_seq = self.wal.rotate()
+                    if self.wal.stale:
+                        # Przegapiony cudzy segment — stan z dysku (snapshot + segmenty)
+                        self._load()
+                    else:
+                        # Cudze operacje z rotowanego dziennika muszą trafić do snapshotu
+                        self._apply_foreign(self.wal.take_foreign())
+                    items = list(dict.items(self.D_Map))
+                    stats = self.get_statistics()
+                    generation = self.generation
+                self._write_snapshot(items, stats, wal_seq, generation)
+                self.wal.discard_rotated()
                 if self.verbose:
-                    print(f"{Colors.GREEN}[FRACTAL] Zapisano {len(self.D_Map)} wspomnień do {self.soul_file}{Colors.RESET}")
+                    print(f"{Colors.GREEN}[FRACTAL] Zapisano {len(items)} wspomnień do {self.soul_file}{Colors.RESET}")
                 return True
             except Exception as e:
                 print(f"{Colors.RED}[FRACTAL] Błąd zapisu: {e}{Colors.RESET}")
                 return False
 
+    def _plain(self, record: dict) -> dict:
+        try:
+            return plain_record(record)
+        except RuntimeError:
+            # Rekord zmieniany w miejscu w trakcie odczytu — ponów pod lockiem
+            with self._lock:
+                return plain_record(record)
+
+    def _encode(self, record: dict) -> str:
+        try:
+            return json.dumps(self._plain(record), ensure_ascii=False)
+        except RuntimeError:
+            # Rekord zmieniany w miejscu w trakcie serializacji — ponów pod lockiem
+            with self._lock:
+                return json.dumps(self._plain(record), ensure_ascii=False)
+
+    def _write_snapshot(self, items: List[tuple], stats: dict, wal_seq: int, generation: int):
+        # Upewnij się że katalog istnieje
+        directory = os.path.dirname(self.soul_file)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        if os.path.exists(self.soul_file):
+            shutil.copy2(self.soul_file, self.soul_file + ".bak")
+
+        temp_path = self.soul_file + ".tmp"
+        if self.soul_format == 'binary':
+            meta = {"version": self.VERSION, "stats": stats, "wal_seq": wal_seq,
+                    "generation": generation}
+            write_soul_binary([(mem_id, self._plain(rec)) for mem_id, rec in items],
+                              temp_path, meta=meta, dim=DIMENSION)
+            os.replace(temp_path, self.soul_file)
+            return
+        if self.soul_format == 'zstd':
+            meta = {"version": self.VERSION, "stats": stats, "wal_seq": wal_seq,
+                    "generation": generation}
+            write_soul_zstd(items, temp_path, meta=meta,
+                            encode=lambda rec: self._encode(rec).encode('utf-8'))
+            os.replace(temp_path, self.soul_file)
+            return
+
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            meta = {"_type": "@META", "version": self.VERSION, "stats": stats, "wal_seq": wal_seq,
+                    "generation": generation}
+            f.write(json.dumps(meta, ensure_ascii=False) + "\n")
+
+            for _, rec in items:
+                f.write(self._encode(rec) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temp_path, self.soul_file)
+
     def store(
         self,
         content: str,
@@ -289,62 +744,32 @@ class FractalMemory:
 
             # AUTO_PARENT: znajdź rodzica z depth > aktualnej (bardziej abstrakcyjny)
             if auto_parent and vec_norm > 0.01:
-                best_parent_id = None
-                best_sim = 0.0
-                target_depth = depth + 1
-                parent_candidates = self._depth_index.get(target_depth, set())
-                for pid in parent_candidates:
-                    parent_rec = self.D_Map.get(pid)
-                    if not parent_rec:
-                        continue
-                    p_vec = np.array(parent_rec.get('wektor_C_Def', [0] * DIMENSION),
-                                     dtype=np.float32)
-                    p_norm = self._norm_cache.get(pid) or float(np.linalg.norm(p_vec))
-                    self._norm_cache[pid] = p_norm
-                    if p_norm < 0.01:
-                        continue
-                    sim = float(np.dot(vec_np, p_vec) / (vec_norm * p_norm))
-                    if sim > best_sim:
-                        best_sim = sim
-                        best_parent_id = pid
-
-                if best_parent_id and best_sim >= 0.5:
+                parents = self._similar(vec_np, vec_norm, depth + 1,
+                                        self.PARENT_THRESHOLD, limit=1)
+                if parents:
+                    best_parent_id = parents[0][0]
                     record['fractal']['parent_id'] = best_parent_id
                     parent_entry = self.D_Map[best_parent_id]
                     if mem_id not in parent_entry['fractal']['children_ids']:
                         parent_entry['fractal']['children_ids'].append(mem_id)
+                        self._log_put(best_parent_id, parent_entry)
 
-            # AUTO_LINK: linkuj do podobnych wspomnień tej samej głębokości
+            # AUTO_LINK: linkuj do najbardziej podobnych wspomnień tej samej głębokości
             if auto_link and vec_norm > 0.01:
                 linked = []
-                same_depth = self._depth_index.get(depth, set())
-                for lid in same_depth:
+                for lid, _ in self._similar(vec_np, vec_norm, depth,
+                                            self.LINK_THRESHOLD, limit=self.MAX_LINKS):
                     if lid == mem_id:
                         continue
-                    link_rec = self.D_Map.get(lid)
-                    if not link_rec:
-                        continue
-                    l_vec = np.array(link_rec.get('wektor_C_Def', [0] * DIMENSION),
-                                     dtype=np.float32)
-                    l_norm = self._norm_cache.get(lid) or float(np.linalg.norm(l_vec))
-                    self._norm_cache[lid] = l_norm
-                    if l_norm < 0.01:
-                        continue
-                    sim = float(np.dot(vec_np, l_vec) / (vec_norm * l_norm))
-                    if sim >= 0.7:
-                        linked.append(lid)
-                        # Dodaj wzajemne połączenie
-                        if mem_id not in link_rec['resonance']['linked_ids']:
-                            link_rec['resonance']['linked_ids'].append(mem_id)
-                    if len(linked) >= 5:  # max 5 linków
-                        break
+                    linked.append(lid)
+                    # Dodaj wzajemne połączenie
+                    link_rec = self.D_Map[lid]
+                    if mem_id not in link_rec['resonance']['linked_ids']:
+                        link_rec['resonance']['linked_ids'].append(mem_id)
+                        self._log_put(lid, link_rec)
                 record['resonance']['linked_ids'] = linked
 
-            # Zapisz norm do cache
-            self._norm_cache[mem_id] = vec_norm
-
-            self.D_Map[mem_id] = record
-            self._index_record(mem_id, record)
+            self.D_Map[mem_id] = record  # _on_set: indeksy + MemoryMatrix + ANN + WAL
             # BRAK ręcznego inkrementowania stats — get_statistics() liczy z indeksu
 
         if self.verbose:
@@ -354,10 +779,40 @@ class FractalMemory:
 
         return mem_id
 
+    def _similar(self, vec: np.ndarray, vec_norm: float, depth: int,
+                 threshold: float, limit: Optional[int] = None) -> List[tuple]:
+        """
+        (mem_id, cosine) rekordów głębokości depth z cosine >= threshold,
+        malejąco. Kandydaci z ANN (gdy włączony i dość rekordów) albo pełny
+        skan głębokości; w obu przypadkach dokładny cosine na MemoryMatrix.
+        """
+        index = self._ann.get(depth)
+        if (self.ann_enabled and index is not None
+                and len(self._depth_index.get(depth, ())) >= self.ANN_MIN_SIZE):
+            candidates = index.query(vec)
+            if not candidates:
+                return []
+            rows = self.matrix.rows_of(candidates)
+            rows.sort()
+        else:
+            rows = np.nonzero(self.matrix.depths == depth)[0]
+
+        norms = self.matrix.norms[rows]
+        valid = norms >= 0.01
+        rows, norms = rows[valid], norms[valid]
+        if rows.size == 0:
+            return []
+        sims = self.matrix.dot(vec, rows) / (vec_norm * norms)
+        keep = sims >= threshold
+        rows, sims = rows[keep], sims[keep]
+        order = np.argsort(-sims, kind='stable')[:limit]
+        ids = self.matrix.ids
+        return [(ids[rows[k]], float(sims[k])) for k in order]
+
     def proustian_recall(self, emotion_vector: np.ndarray, threshold: float = 0.6) -> List[dict]:
         """
         Proustowski recall – rozszerza wektor 8D do 15D.
-        Używa _norm_cache dla eliminacji powtórnych obliczeń normy.
+        Jeden matmul po MemoryMatrix zamiast pętli po D_Map.
         """
         emotion_vector = np.array(emotion_vector, dtype=np.float32)
         if len(emotion_vector) == 8:
@@ -365,30 +820,18 @@ class FractalMemory:
             full_vec[:8] = emotion_vector
             emotion_vector = full_vec
 
-        emo_norm = float(np.linalg.norm(emotion_vector))
-        if emo_norm < 0.01:
+        if float(np.linalg.norm(emotion_vector)) < 0.01:
             return []
 
-        matches = []
         with self._lock:
-            for mid, rec in self.D_Map.items():
-                vec = np.array(rec.get('wektor_C_Def', [0] * DIMENSION), dtype=np.float32)
-
-                # Cache normy — unikamy sqrt przy każdym recall
-                vec_norm = self._norm_cache.get(mid)
-                if vec_norm is None:
-                    vec_norm = float(np.linalg.norm(vec))
-                    self._norm_cache[mid] = vec_norm
-
-                if vec_norm < 0.01:
-                    continue
-
-                sim = float(np.dot(emotion_vector, vec)) / (emo_norm * vec_norm)
-                if sim >= threshold:
-                    matches.append(rec)
-
-        matches.sort(key=lambda r: r.get('weight', 0.5), reverse=True)
-        return matches[:5]
+            sims = self.matrix.cosine(emotion_vector, min_norm=0.01)
+            rows = np.nonzero(sims >= threshold)[0]
+            if rows.size == 0:
+                return []
+            # Sortowanie po wadze (malejąco), stabilne jak list.sort
+            order = np.argsort(-self.matrix.weights[rows], kind='stable')[:5]
+            ids = self.matrix.ids
+            return [self.D_Map[ids[r]] for r in rows[order]]
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -419,8 +862,7 @@ def integrate_fractal_memory(aii_instance, soul_file: str = "data/eriamo.soul"):
         migrated = 0
         for mid, record in aii_instance.D_Map.items():
             if mid not in fractal.D_Map:
-                fractal.D_Map[mid] = record
-                fractal._index_record(mid, record)
+                fractal.D_Map[mid] = record  # _on_set indeksuje
                 migrated += 1
         if migrated > 0:
             # BUGFIX: aktualizuj stats po migracji
@@ -437,8 +879,10 @@ def integrate_fractal_memory(aii_instance, soul_file: str = "data/eriamo.soul"):
         - FractalMemory → .soul
         - ChunkLexicon
         - VectorCortex
-        - QuantumBridge → quantum_state.json
-        - FractalHorizon → horizon.json
+        - QuantumBridge → quantum_state.npz (tylko gdy stan się zmienił)
+        - FractalHorizon → horizon.npz
+        Z aii_instance.checkpoints (CheckpointManager) — tylko komponenty
+        zmienione od ostatniego zapisu, równolegle, z manifestem.
         """
         # GUARD: sprawdź czy D_Map nie został nadpisany nowym obiektem
         if aii_instance.D_Map is not fractal.D_Map:
@@ -446,9 +890,14 @@ def integrate_fractal_memory(aii_instance, soul_file: str = "data/eriamo.soul"):
             for mid, rec in aii_instance.D_Map.items():
                 if mid not in fractal.D_Map:
                     fractal.D_Map[mid] = rec
-                    fractal._index_record(mid, rec)
             aii_instance.D_Map = fractal.D_Map
 
+        checkpoints = getattr(aii_instance, 'checkpoints', None)
+        if checkpoints is not None:
+            checkpoints.checkpoint()
+            print(f"{Colors.GREEN}[SAVE] Zapisano {len(fractal.D_Map)} wspomnień{Colors.RESET}")
+            return
+
         # 1. Główna pamięć
         fractal.save()
 
@@ -460,24 +909,21 @@ def integrate_fractal_memory(aii_instance, soul_file: str = "data/eriamo.soul"):
         if hasattr(aii_instance, 'cortex') and aii_instance.soul_io and hasattr(aii_instance.soul_io, 'filepath'):
             aii_instance.cortex.save(aii_instance.soul_io.filepath)
 
-        # 4. Quantum state → quantum_state.json
+        # 4. Quantum state → quantum_state.npz
         if getattr(aii_instance, 'quantum', None):
             try:
-                import json as _json
                 import os as _os
                 base_dir = aii_instance._get_data_dir() if hasattr(aii_instance, '_get_data_dir') else "data"
-                _os.makedirs(base_dir, exist_ok=True)
-                qpath = _os.path.join(base_dir, "quantum_state.json")
-                with open(qpath, 'w', encoding='utf-8') as f:
-                    _json.dump(aii_instance.quantum.to_dict(), f, indent=2, ensure_ascii=False)
-                print(f"{Colors.GREEN}[QUANTUM SAVE] → {qpath}{Colors.RESET}")
+                if aii_instance.quantum.save_state(base_dir):
+                    qpath = _os.path.join(base_dir, aii_instance.quantum.SNAPSHOT_FILE)
+                    print(f"{Colors.GREEN}[QUANTUM SAVE] → {qpath}{Colors.RESET}")
             except Exception as e:
                 print(f"{Colors.RED}[QUANTUM SAVE] Błąd: {e}{Colors.RESET}")
 
-        # 5. FractalHorizon → horizon.json
+        # 5. FractalHorizon → horizon.npz
         if getattr(aii_instance, 'fractal_horizon', None):
             try:
-                aii_instance.fractal_horizon.save()
+                aii_instance.fractal_horizon.save(generation=fractal.generation)
             except Exception as e:
                 print(f"{Colors.RED}[HORYZONT SAVE] Błąd: {e}{Colors.RESET}")
 
@@ -494,13 +940,10 @@ def integrate_fractal_memory(aii_instance, soul_file: str = "data/eriamo.soul"):
         # Quantum state → wczytaj jeśli istnieje
         if getattr(aii_instance, 'quantum', None):
             try:
-                import json as _json
-                import os as _os
                 base_dir = aii_instance._get_data_dir() if hasattr(aii_instance, '_get_data_dir') else "data"
-                qpath = _os.path.join(base_dir, "quantum_state.json")
-                if _os.path.exists(qpath) and _os.path.getsize(qpath) > 0:
-                    with open(qpath, 'r', encoding='utf-8') as f:
-                        aii_instance.quantum.from_dict(_json.load(f))
+                # quantum_state.npz, a przy pierwszym starcie po aktualizacji — quantum_state.json
+                qpath = aii_instance.quantum.load_state(base_dir)
+                if qpath:
                     # Zastosuj FLOOR natychmiast po wczytaniu —
                     # zapobiega startowi z kolapsem do jednej osi
                     aii_instance.quantum.sync_from_aii()
@@ -523,7 +966,7 @@ def integrate_fractal_memory(aii_instance, soul_file: str = "data/eriamo.soul"):
 # ═══════════════════════════════════════════════════════════════════════════════
 
 if __name__ == "__main__":
-    print(f"\n{Colors.CYAN}TEST FractalMemory v1.1.0{Colors.RESET}")
+    print(f"\n{Colors.CYAN}TEST FractalMemory v{FractalMemory.VERSION}{Colors.RESET}")
 
     mem = FractalMemory("test_fractal.soul", verbose=True)
 
@@ -570,7 +1013,7 @@ if __name__ == "__main__":
     for r in recalled:
         print(f"  - {r.get('tresc')} (waga: {r.get('weight')})")
 
-    # Test stats spójności po zapisie i wczytaniu
+    # Test stats spójności po zapisie i wczytaniu (snapshot nie istnieje — sam WAL)
     mem.save()
     mem2 = FractalMemory("test_fractal.soul", verbose=False)
     s2 = mem2.get_statistics()
@@ -578,8 +1021,18 @@ if __name__ == "__main__":
     assert s2['total'] == s['total'], "BŁĄD: stats['total'] niezgodne!"
     print(f"{Colors.GREEN}✓ stats spójne po reload{Colors.RESET}")
 
+    # Kompakcja → snapshot, potem usunięcie zapisane tylko w WAL
+    mem.compact()
+    del mem.D_Map[id_leaf]
+    mem.save()
+    mem3 = FractalMemory("test_fractal.soul", verbose=False)
+    assert id_leaf not in mem3.D_Map and len(mem3.D_Map) == len(mem.D_Map), "BŁĄD: replay WAL!"
+    print(f"{Colors.GREEN}✓ snapshot + replay WAL spójne{Colors.RESET}")
+
     # Cleanup
-    for f in ["test_fractal.soul", "test_fractal.soul.bak"]:
+    mem.wal.close()
+    for f in ["test_fractal.soul", "test_fractal.soul.bak",
+              "test_fractal.soul.wal", "test_fractal.soul.wal.1"]:
         if os.path.exists(f):
             os.remove(f)
 
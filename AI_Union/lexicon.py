@@ -1,7 +1,17 @@
 # -*- coding: utf-8 -*-
 """
-lexicon.py v8.0.0-Hybrid
+lexicon.py v8.1.0-Hybrid
 Pełna obsługa 15 osi (Biologia + Metafizyka) i autotworzenie plików.
+
+ZMIANY v8.1.0:
+- WYDAJNOŚĆ: słownik słowo → id + macierz V×15 float32 (wiersz = wektor słowa,
+  stare wektory 8D dopełniane zerami raz, przy wczytaniu) utrzymywane przy
+  każdej zmianie self.words; analyze_text() to tokenizacja → id →
+  matrix[ids].mean(axis=0) zamiast np.array() i dopełniania per słowo
+- analyze_many(texts): analiza wielu tekstów naraz — jedno indeksowanie
+  macierzy i np.add.reduceat po tekstach
+- matrix / vocabulary: widok macierzy i słowa w kolejności wierszy
+  (AII._sync_kurz_hybrid liczy dominujące osie jednym argmax)
 """
 import json
 import os
@@ -37,6 +47,9 @@ class EvolvingLexicon:
         self.lexicon_file = lexicon_file
         self.autosave = autosave
         self.words = {}
+        self._ids = {}          # słowo → wiersz macierzy
+        self._vocab = []        # wiersz → słowo
+        self._matrix = np.zeros((0, len(self.AXES)), dtype=np.float32)
         
         # Próba wczytania, a jak nie ma pliku -> Tworzenie Seedu
         if not self.load_from_soul():
@@ -51,6 +64,72 @@ class EvolvingLexicon:
         # if unidecode: text = unidecode.unidecode(text)
         return text
 
+    # ─────────────────────────────────────────────────────────────
+    # MACIERZ SŁÓW
+    # ─────────────────────────────────────────────────────────────
+
+    @property
+    def matrix(self):
+        """Wektory słów (V×15 float32), wiersz i = vocabulary[i]."""
+        return self._matrix[:len(self._vocab)]
+
+    @property
+    def vocabulary(self):
+        return self._vocab
+
+    def _row(self, vec):
+        """Wektor z pliku (lista dowolnej długości) → 15 osi (fix starych plików 8D)."""
+        row = np.zeros(len(self.AXES), dtype=np.float32)
+        vec = np.asarray(vec, dtype=np.float32).ravel()[:len(self.AXES)]
+        row[:len(vec)] = vec
+        return row
+
+    def _set_word(self, w_norm, vec):
+        """Zapisuje słowo w self.words i jego wiersz w macierzy."""
+        self.words[w_norm] = {
+            'wektor': vec.tolist(),
+            'last_seen': time.time()
+        }
+        idx = self._ids.get(w_norm)
+        if idx is None:
+            idx = len(self._vocab)
+            if idx == len(self._matrix):
+                # Podwojenie pojemności — dopisywanie słów bez kopiowania co raz
+                grown = np.zeros((max(64, 2 * idx), len(self.AXES)), dtype=np.float32)
+                grown[:idx] = self._matrix[:idx]
+                self._matrix = grown
+            self._ids[w_norm] = idx
+            self._vocab.append(w_norm)
+        self._matrix[idx] = self._row(vec)
+
+    def _rebuild_matrix(self):
+        """Słownik id i macierz od nowa z self.words (po wczytaniu pliku)."""
+        self._vocab = list(self.words)
+        self._ids = {w: i for i, w in enumerate(self._vocab)}
+        self._matrix = np.zeros((len(self._vocab), len(self.AXES)), dtype=np.float32)
+        for i, w in enumerate(self._vocab):
+            data = self.words[w]
+            self._matrix[i] = self._row(data.get('wektor', []) if isinstance(data, dict) else [])
+
+    def _lookup(self, text):
+        """Tokenizacja → (id znanych słów, nieznane słowa dłuższe niż 3 znaki)."""
+        ids = []
+        unknowns = []
+        get = self._ids.get
+        # Tokeny \w+ z tekstu po lower() są już znormalizowane (_normalize)
+        for w in re.findall(r'\w+', text.lower()):
+            idx = get(w)
+            if idx is not None:
+                ids.append(idx)
+            elif len(w) > 3:
+                unknowns.append(w)
+        return ids, unknowns
+
+    def _dominant(self, vec):
+        if np.max(vec) > 0.1:
+            return self.AXES[np.argmax(vec)]
+        return None
+
     def _initialize_from_seed(self):
         """Wypełnia pusty leksykon danymi startowymi."""
         for axis, words in self.SEED_LEXICON.items():
@@ -62,40 +141,39 @@ class EvolvingLexicon:
                 vec = np.zeros(len(self.AXES))
                 vec[idx] = 0.8 # Silne skojarzenie startowe
                 
-                self.words[w_norm] = {
-                    'wektor': vec.tolist(),
-                    'last_seen': time.time()
-                }
+                self._set_word(w_norm, vec)
 
     def analyze_text(self, text):
         """Analizuje tekst i zwraca wektor 15D."""
-        words = re.findall(r'\w+', text.lower())
-        total_vec = np.zeros(len(self.AXES))
-        unknowns = []
-        found = 0
-        
-        for w in words:
-            w_norm = self._normalize(w)
-            if w_norm in self.words:
-                vec = np.array(self.words[w_norm].get('wektor', []))
-                # Fix wymiarów (gdyby wczytano stary plik 8D)
-                if len(vec) < len(self.AXES):
-                    new_vec = np.zeros(len(self.AXES))
-                    new_vec[:len(vec)] = vec
-                    vec = new_vec
-                total_vec += vec
-                found += 1
-            elif len(w) > 3:
-                unknowns.append(w)
-                
-        if found > 0:
-            total_vec /= found
-            
-        dominant_sector = None
-        if np.max(total_vec) > 0.1:
-            dominant_sector = self.AXES[np.argmax(total_vec)]
-            
-        return total_vec, dominant_sector, unknowns
+        ids, unknowns = self._lookup(text)
+        if ids:
+            total_vec = self.matrix[ids].mean(axis=0, dtype=np.float64)
+        else:
+            total_vec = np.zeros(len(self.AXES))
+        return total_vec, self._dominant(total_vec), unknowns
+
+    def analyze_many(self, texts):
+        """
+        analyze_text() dla wielu tekstów naraz (np. linie /read).
+        Zwraca (macierz N×15 średnich wektorów, dominujące osie, nieznane słowa).
+        """
+        ids, counts, unknowns = [], [], []
+        for text in texts:
+            text_ids, text_unknowns = self._lookup(text)
+            ids.extend(text_ids)
+            counts.append(len(text_ids))
+            unknowns.append(text_unknowns)
+
+        counts = np.asarray(counts, dtype=np.int64)
+        vectors = np.zeros((len(counts), len(self.AXES)))
+        found = counts > 0
+        if ids:
+            rows = self.matrix[ids].astype(np.float64)
+            starts = np.cumsum(counts) - counts
+            # Sumy wierszy po tekstach (segmenty kolejnych id) — jedno przejście
+            vectors[found] = np.add.reduceat(rows, starts[found], axis=0)
+            vectors[found] /= counts[found, None]
+        return vectors, [self._dominant(v) for v in vectors], unknowns
 
     def learn_from_correction(self, word, category, strength=1.0):
         """Uczy słowo przypisując je do osi (category)."""
@@ -116,21 +194,14 @@ class EvolvingLexicon:
             # Aktualizacja (Wzmocnienie osi)
             vec[idx] = min(1.0, vec[idx] + strength)
             
-            self.words[w_norm] = {
-                'wektor': vec.tolist(),
-                'last_seen': time.time()
-            }
+            self._set_word(w_norm, vec)
             if self.autosave: self.save_to_soul()
 
     def learn_from_context(self, words, vec_15d, confidence):
         """Uczenie kontekstowe."""
         if confidence < 0.2: return
         for w in words:
-            w_norm = self._normalize(w)
-            self.words[w_norm] = {
-                'wektor': vec_15d.tolist(),
-                'last_seen': time.time()
-            }
+            self._set_word(self._normalize(w), vec_15d)
         if self.autosave: self.save_to_soul()
 
     def save_to_soul(self):
@@ -150,5 +221,6 @@ class EvolvingLexicon:
         try:
             with open(self.lexicon_file, 'r', encoding='utf-8') as f:
                 self.words = json.load(f)
+            self._rebuild_matrix()
             return True
         except: return False
\ No newline at end of file
@@ -0,0 +1,351 @@
+# -*- coding: utf-8 -*-
+"""
+memory_matrix.py v1.1.0
+Kolumnowy magazyn wektorów D_Map dla FractalMemory.
+
+ZMIANY v1.1.0:
+- IndexedDMap (przeniesiony z fractal_memory._IndexedDMap): dict zgłaszający
+  właścicielowi każde wstawienie/usunięcie klucza
+- DMapMatrix: D_Map bez FractalMemory — hooki IndexedDMap utrzymują
+  MemoryMatrix (i kolumny horyzontu), zamiast budować ją z D_Map od nowa
+
+Zamiast budować np.array(entry['wektor_C_Def']) dla każdego rekordu przy każdym
+zapytaniu, trzymamy jedną ciągłą macierz float32 N×15 oraz kolumny pomocnicze:
+  - norms   — normy L2 wektorów (liczone raz, przy zapisie)
+  - weights — wagi wspomnień
+  - types   — kody typów ('@DIALOG', '@READ', '@MEMORY', ...)
+  - depths  — głębokość fraktalna
+  - arrows  — liczba '→' w treści (filtr łańcuchów dialogowych)
+  - words   — liczba słów w treści (kara za długie wpisy)
+
+Wiersz i ↔ ids[i]. Usuwanie przez zamianę z ostatnim wierszem (O(1)),
+więc kolejność wierszy NIE jest kolejnością wstawiania.
+
+Recall = jedno mnożenie macierz·wektor + maskowanie kolumn.
+"""
+
+import threading
+import numpy as np
+from typing import Dict, List, Optional
+
+try:
+    from union_config import DIMENSION
+except ImportError:
+    DIMENSION = 15
+
+
+class MemoryMatrix:
+    """Ciągła macierz wektorów + kolumny metadanych, zsynchronizowana z D_Map."""
+
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, dim: int = DIMENSION, lock=None):
+        self.dim = dim
+        # Wspólny lock z FractalMemory (RLock) — wołający może trzymać go
+        # przez całe liczenie wyników, żeby wiersze nie przesunęły się w trakcie
+        self.lock = lock if lock is not None else threading.RLock()
+        self._type_codes: Dict[str, int] = {}
+        self._alloc(self.INITIAL_CAPACITY)
+
+    def _alloc(self, capacity: int):
+        self._capacity = capacity
+        self._n = 0
+        self._ids: List[str] = []
+        self._row: Dict[str, int] = {}
+        self._vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        self._norms = np.zeros(capacity, dtype=np.float32)
+        self._weights = np.zeros(capacity, dtype=np.float32)
+        self._types = np.zeros(capacity, dtype=np.int16)
+        self._depths = np.zeros(capacity, dtype=np.int16)
+        self._arrows = np.zeros(capacity, dtype=np.int16)
+        self._words = np.zeros(capacity, dtype=np.int32)
+
+    def _grow(self):
+        new_cap = self._capacity * 2
+        for name in ('_vectors', '_norms', '_weights', '_types',
+                     '_depths', '_arrows', '_words'):
+            old = getattr(self, name)
+            new = np.zeros((new_cap,) + old.shape[1:], dtype=old.dtype)
+            new[:self._n] = old[:self._n]
+            setattr(self, name, new)
+        self._capacity = new_cap
+
+    @classmethod
+    def from_dmap(cls, d_map: dict, dim: int = DIMENSION) -> 'MemoryMatrix':
+        """Buduje macierz z dowolnego D_Map (fallback gdy brak FractalMemory)."""
+        matrix = cls(dim)
+        for mem_id, record in d_map.items():
+            matrix.upsert(mem_id, record)
+        return matrix
+
+    # ─────────────────────────────────────────────────────────────
+    # MUTACJE
+    # ─────────────────────────────────────────────────────────────
+
+    def type_code(self, rec_type: str) -> int:
+        code = self._type_codes.get(rec_type)
+        if code is None:
+            code = len(self._type_codes)
+            self._type_codes[rec_type] = code
+        return code
+
+    def upsert(self, mem_id: str, record: dict):
+        """Wstawia lub odświeża wiersz rekordu (wektor, waga, typ, głębokość, treść)."""
+        with self.lock:
+            row = self._row.get(mem_id)
+            if row is None:
+                if self._n >= self._capacity:
+                    self._grow()
+                row = self._n
+                self._n += 1
+                self._ids.append(mem_id)
+                self._row[mem_id] = row
+
+            vec = record.get('wektor_C_Def')
+            if vec is None:
+                vec = []
+            if len(vec) == self.dim:
+                self._vectors[row] = vec
+            else:
+                # Stare/uszkodzone rekordy (np. 8D lub []) — dopasuj długość zerami
+                self._vectors[row] = 0.0
+                n = min(len(vec), self.dim)
+                if n:
+                    self._vectors[row, :n] = vec[:n]
+            self._norms[row] = np.linalg.norm(self._vectors[row])
+            self._weights[row] = record.get('weight', 0.5)
+            self._types[row] = self.type_code(record.get('_type', '@MEMORY'))
+            self._depths[row] = (record.get('fractal') or {}).get('depth', 1)
+            content = record.get('tresc', '') or ''
+            self._arrows[row] = content.count('→')
+            self._words[row] = len(content.split())
+
+    def extend(self, mem_ids: List[str], vectors: np.ndarray, weights: np.ndarray,
+               types: np.ndarray, depths: np.ndarray, arrows: np.ndarray, words: np.ndarray):
+        """
+        Hurtowe dopisanie wierszy (wczytanie binarnego .soul) — kolumny jako tablice,
+        types to kody z type_code(). mem_ids nie mogą jeszcze być w macierzy.
+        """
+        with self.lock:
+            n = len(mem_ids)
+            while self._n + n > self._capacity:
+                self._grow()
+            start, stop = self._n, self._n + n
+            dim = min(self.dim, vectors.shape[1]) if n else 0
+            self._vectors[start:stop] = 0.0
+            self._vectors[start:stop, :dim] = vectors[:, :dim]
+            self._norms[start:stop] = np.linalg.norm(self._vectors[start:stop], axis=1)
+            self._weights[start:stop] = weights
+            self._types[start:stop] = types
+            self._depths[start:stop] = depths
+            self._arrows[start:stop] = arrows
+            self._words[start:stop] = words
+            for row, mem_id in enumerate(mem_ids, start):
+                self._row[mem_id] = row
+            self._ids.extend(mem_ids)
+            self._n = stop
+
+    def remove(self, mem_id: str):
+        """Usuwa wiersz — ostatni wiersz wskakuje na jego miejsce."""
+        with self.lock:
+            row = self._row.pop(mem_id, None)
+            if row is None:
+                return
+            last = self._n - 1
+            if row != last:
+                moved_id = self._ids[last]
+                for col in (self._vectors, self._norms, self._weights, self._types,
+                            self._depths, self._arrows, self._words):
+                    col[row] = col[last]
+                self._ids[row] = moved_id
+                self._row[moved_id] = row
+            self._ids.pop()
+            self._n = last
+
+    def clear(self):
+        with self.lock:
+            self._alloc(self.INITIAL_CAPACITY)
+
+    # ─────────────────────────────────────────────────────────────
+    # ODCZYT (widoki na pierwsze N wierszy — bez kopiowania)
+    # ─────────────────────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __contains__(self, mem_id: str) -> bool:
+        return mem_id in self._row
+
+    def row_of(self, mem_id: str) -> Optional[int]:
+        return self._row.get(mem_id)
+
+    def rows_of(self, mem_ids) -> np.ndarray:
+        """Wiersze dla kolekcji mem_id (mapowanie w C przez map, bez pętli Pythona)."""
+        return np.fromiter(map(self._row.__getitem__, mem_ids),
+                           dtype=np.int64, count=len(mem_ids))
+
+    @property
+    def ids(self) -> List[str]:
+        return self._ids
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[:self._n]
+
+    @property
+    def norms(self) -> np.ndarray:
+        return self._norms[:self._n]
+
+    @property
+    def weights(self) -> np.ndarray:
+        return self._weights[:self._n]
+
+    @property
+    def types(self) -> np.ndarray:
+        return self._types[:self._n]
+
+    @property
+    def depths(self) -> np.ndarray:
+        return self._depths[:self._n]
+
+    @property
+    def arrows(self) -> np.ndarray:
+        return self._arrows[:self._n]
+
+    @property
+    def words(self) -> np.ndarray:
+        return self._words[:self._n]
+
+    def type_mask(self, *rec_types: str) -> np.ndarray:
+        """Maska bool wierszy o typie z listy rec_types."""
+        codes = [self._type_codes[t] for t in rec_types if t in self._type_codes]
+        if not codes:
+            return np.zeros(self._n, dtype=bool)
+        return np.isin(self.types, codes)
+
+    def dot(self, query: np.ndarray, rows=None) -> np.ndarray:
+        """Iloczyny skalarne wektorów z zapytaniem (jeden matmul; rows — podzbiór wierszy)."""
+        query = np.asarray(query, dtype=np.float32)
+        if query.shape[0] != self.dim:
+            padded = np.zeros(self.dim, dtype=np.float32)
+            n = min(self.dim, query.shape[0])
+            padded[:n] = query[:n]
+            query = padded
+        if rows is not None:
+            return self.vectors[rows] @ query
+        return self.vectors @ query
+
+    def cosine(self, query: np.ndarray, min_norm: float = 0.01) -> np.ndarray:
+        """Podobieństwo cosinusowe; wiersze o normie < min_norm dostają -inf."""
+        query = np.asarray(query, dtype=np.float32)
+        q_norm = float(np.linalg.norm(query))
+        sims = np.full(self._n, -np.inf, dtype=np.float32)
+        if q_norm < min_norm:
+            return sims
+        norms = self.norms
+        valid = norms >= min_norm
+        sims[valid] = self.dot(query)[valid] / (q_norm * norms[valid])
+        return sims
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# D_MAP Z POWIADOMIENIAMI
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class IndexedDMap(dict):
+    """
+    Zwykły dict, który zgłasza właścicielowi (FractalMemory, DMapMatrix) każde
+    wstawienie/usunięcie klucza: owner._lock, _on_set, _on_delete, _on_clear.
+
+    AII współdzieli referencję i pisze do D_Map bezpośrednio (/read, /remember,
+    pruning) — bez tego indeksy i MemoryMatrix rozjeżdżałyby się z D_Map.
+    """
+    __slots__ = ('_owner',)
+
+    def __init__(self, owner):
+        super().__init__()
+        self._owner = owner
+
+    # Operacja na dict i hook pod jednym lockiem — czytelnik trzymający
+    # owner._lock nigdy nie widzi wiersza macierzy bez rekordu w D_Map
+
+    def __setitem__(self, mem_id, record):
+        with self._owner._lock:
+            old = self.get(mem_id)
+            super().__setitem__(mem_id, record)
+            self._owner._on_set(mem_id, record, old)
+
+    def __delitem__(self, mem_id):
+        with self._owner._lock:
+            record = self[mem_id]
+            super().__delitem__(mem_id)
+            self._owner._on_delete(mem_id, record)
+
+    def pop(self, mem_id, *default):
+        with self._owner._lock:
+            if mem_id not in self:
+                return super().pop(mem_id, *default)
+            record = super().pop(mem_id)
+            self._owner._on_delete(mem_id, record)
+            return record
+
+    def popitem(self):
+        with self._owner._lock:
+            mem_id, record = super().popitem()
+            self._owner._on_delete(mem_id, record)
+            return mem_id, record
+
+    def setdefault(self, mem_id, record=None):
+        with self._owner._lock:
+            if mem_id not in self:
+                self[mem_id] = record
+            return self[mem_id]
+
+    def update(self, *args, **kwargs):
+        with self._owner._lock:
+            for mem_id, record in dict(*args, **kwargs).items():
+                self[mem_id] = record
+
+    def clear(self):
+        with self._owner._lock:
+            super().clear()
+            self._owner._on_clear()
+
+
+class DMapMatrix:
+    """
+    D_Map bez FractalMemory (AII standalone): IndexedDMap, którego hooki
+    odświeżają wiersze MemoryMatrix — podmiana rekordu pod istniejącym
+    kluczem i usunięcie są widoczne od razu. horizon (FractalHorizon)
+    dostaje touch()/detach() jak z hooków FractalMemory.
+    """
+
+    def __init__(self, records: dict = None, dim: int = DIMENSION):
+        self._lock = threading.RLock()
+        self.matrix = MemoryMatrix(dim, lock=self._lock)
+        self.horizon = None
+        self.D_Map = IndexedDMap(self)
+        if records:
+            self.D_Map.update(records)
+
+    def touch(self, mem_id: str):
+        """Odświeża wiersz po mutacji rekordu w miejscu (jak FractalMemory.touch)."""
+        with self._lock:
+            record = self.D_Map.get(mem_id)
+            if record is not None:
+                self.matrix.upsert(mem_id, record)
+
+    def _on_set(self, mem_id: str, record: dict, old):
+        self.matrix.upsert(mem_id, record)
+        if self.horizon is not None:
+            self.horizon.touch(mem_id, record)
+
+    def _on_delete(self, mem_id: str, record: dict):
+        self.matrix.remove(mem_id)
+        if self.horizon is not None:
+            self.horizon.detach([mem_id])
+
+    def _on_clear(self):
+        self.matrix.clear()
+        if self.horizon is not None:
+            self.horizon.detach()
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 """
-quantum_bridge.py v2.4.3 (QRM & Time Evolved)
+quantum_bridge.py v2.7.3 (QRM & Time Evolved)
 Most między AII (wektory realne 15D) a systemem kwantowym (amplitudy zespolone).
 
 Łączy:
@@ -8,6 +8,53 @@ Most między AII (wektory realne 15D) a systemem kwantowym (amplitudy zespolone)
   - QuantumEmotionalState (complex amplitudes z fazą)
   - Świadomość Czasu (Pustka / Vacuum, Dekoherencja QRM)
 
+ZMIANY v2.7.3:
+- BUGFIX: load_snapshot() po ewolucji w Pustce nie uznaje stanu za zapisany —
+  plik trzyma stan sprzed ewolucji, więc następny save_state() go przepisuje
+  (wcześniej tylko os.utime i ewolucja znikała przy kolejnym wczytaniu)
+
+ZMIANY v2.7.2:
+- _snapshot_arrays() czyta stan raz (kopia wektora) — snapshot spójny także
+  przy zapisie w tle (PersistenceWorker), gdy wątek interakcji zmienia stan
+
+ZMIANY v2.7.1:
+- sample_emotions(n, seed) — partia pomiarów przez MeasurementSampler
+  (CDF liczona raz na wersję stanu, własny np.random.Generator)
+
+ZMIANY v2.7.0:
+- Snapshot binarny quantum_state.npz (SNAPSHOT_VERSION=1): amplitudy w układzie
+  odniesienia, przewidywana trajektoria, pierścień faz i fixed_trajectory;
+  save_snapshot()/load_snapshot() — jeden np.load zamiast JSON-a per wymiar.
+  load_state() czyta stary quantum_state.json, gdy .npz jeszcze nie ma
+- save_snapshot() nie przepisuje pliku, gdy stan nie zmienił się od ostatniego
+  zapisu (_checkpoint_key) — odświeża tylko mtime, od którego liczy się Pustka
+- to_dict()/from_dict() i snapshot dzielą _snapshot_arrays()/_restore_snapshot();
+  ewolucja QRM w Pustce liczona wektorowo (vacuum zbiera utracone prawdop.)
+
+ZMIANY v2.6.0:
+- WYDAJNOŚĆ: phase_history to PhaseHistory — pierścień NumPy (max_history × D)
+  zamiast listy słowników z pop(0); zawinięte różnice faz dwóch ostatnich kroków
+  utrzymywane przy push(), więc get_phase_coherence() i _predict_trajectory()
+  to O(D) bez przechodzenia historii
+- to_dict()/from_dict() zapisują i odtwarzają historię faz ('phase_history')
+
+ZMIANY v2.5.2:
+- process_interference() unieważnia cache rezonansu QuantumDecisionMaker
+
+ZMIANY v2.5.1:
+- WYDAJNOŚĆ: skompilowana warstwa mapowania osi — _build_index_maps() buduje raz
+  tablice permutacji PL_AXES/EN_AXES (oś PL ↔ kolumna EN); sync_from_aii,
+  sync_to_aii, score_memories i emotional_veto_check to pojedyncze fancy-indexing
+  zamiast PL_TO_EN[PL_NAMES[i]] / PL_NAMES.index() w pętlach
+- python quantum_bridge.py — mikro-benchmark narzutu mostu na turę (pętle vs tablice)
+
+ZMIANY v2.5.0:
+- WYDAJNOŚĆ: score_memories(vectors K×15) — rezonans, dopasowanie do trajektorii
+  i zgodność faz dla K wspomnień jednym przebiegiem wektorowym (bez tworzenia
+  QuantumEmotionalState per wspomnienie, bez słownikowych lookupów per oś)
+- rank_candidates() i AII._quantum_explore() punktują przez score_memories();
+  _memory_resonance/_memory_trajectory_fit/_memory_phase_alignment to nakładki K=1
+
 ZMIANY v2.4.3:
 - FIX: vacuum przeniesiony do QuantumEmotionalState.DIMENSIONS w quantum_emotions.py
   (emotional_interference nie rzuca już KeyError — vacuum znany każdemu nowemu obiektowi)
@@ -34,11 +81,13 @@ Autor: Maciek (GitHub: Maciej615) & Gemini
 """
 
 import numpy as np
+import json
+import os
 import time
 import math
 from typing import Dict, List, Tuple, Optional
 
-from quantum_emotions import QuantumEmotionalState
+from quantum_emotions import QuantumEmotionalState, MeasurementSampler
 from emotional_interference import EmotionalInterference
 from decision_maker import QuantumDecisionMaker
 
@@ -72,6 +121,12 @@ PL_NAMES: List[str] = list(PL_TO_EN.keys())
 
 
 def _build_index_maps():
+    """
+    Mapowanie osi liczone raz przy imporcie:
+      - słowniki pl_idx → en_idx i en_idx → pl_idx
+      - tablice permutacji pl_axes/en_axes (int64, ta sama długość):
+        oś PL pl_axes[k] ↔ kolumna stanu en_axes[k] — konwersja = fancy indexing
+    """
     pl_to_en_idx = {}
     en_to_pl_idx = {}
     en_dims = QuantumEmotionalState.DIMENSIONS
@@ -81,9 +136,109 @@ def _build_index_maps():
             en_idx = en_dims.index(en_name)
             pl_to_en_idx[pl_idx] = en_idx
             en_to_pl_idx[en_idx] = pl_idx
-    return pl_to_en_idx, en_to_pl_idx
+    pl_axes = np.array(sorted(pl_to_en_idx), dtype=np.int64)
+    en_axes = np.array([pl_to_en_idx[i] for i in pl_axes.tolist()], dtype=np.int64)
+    return pl_to_en_idx, en_to_pl_idx, pl_axes, en_axes
+
+PL_TO_EN_IDX, EN_TO_PL_IDX, PL_AXES, EN_AXES = _build_index_maps()
+
+
+def _stack_vectors(vectors: list) -> np.ndarray:
+    """Lista wektorów wspomnień → K×15 (krótsze dopełnione zerami, dłuższe obcięte)."""
+    dim = len(PL_NAMES)
+    out = np.zeros((len(vectors), dim))
+    for row, vec in enumerate(vectors):
+        vec = np.asarray(vec, dtype=np.float64).ravel()[:dim]
+        out[row, :len(vec)] = vec
+    return out
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# HISTORIA FAZ (pierścień)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _wrapped_delta(curr: np.ndarray, prev: np.ndarray) -> np.ndarray:
+    """Odległość kątowa |Δφ| zawinięta do [0, π]."""
+    diff = np.abs(curr - prev)
+    return np.minimum(diff, 2 * np.pi - diff)
+
+
+class PhaseHistory:
+    """
+    Ostatnie `capacity` wektorów faz (kolejność DIMENSIONS) w buforze pierścieniowym.
+
+    Przy push() liczona jest zawinięta różnica do poprzedniego kroku i suma
+    dwóch ostatnich różnic — koherencja i stabilność trajektorii są gotowe
+    bez ponownego przechodzenia historii.
+    """
+
+    def __init__(self, dims: List[str], capacity: int = 100):
+        self.dims = list(dims)
+        self.capacity = max(1, int(capacity))
+        self._phases = np.zeros((self.capacity, len(self.dims)))
+        self._head = 0                  # indeks następnego zapisu
+        self._count = 0
+        self._last_delta = np.zeros(len(self.dims))
+        self._delta_window = np.zeros(len(self.dims))   # suma 2 ostatnich różnic
+
+    def __len__(self) -> int:
+        return self._count
+
+    def push(self, phases: np.ndarray):
+        phases = np.asarray(phases, dtype=np.float64)
+        if self._count:
+            delta = _wrapped_delta(phases, self._phases[self._head - 1])
+            self._delta_window = self._last_delta + delta
+            self._last_delta = delta
+        self._phases[self._head] = phases
+        self._head = (self._head + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def last_delta(self) -> np.ndarray:
+        """|Δφ| ostatniego kroku (D) — ważne przy len >= 2."""
+        return self._last_delta
+
+    def mean_recent_delta(self) -> np.ndarray:
+        """Średnia |Δφ| dwóch ostatnich kroków (D) — ważne przy len >= 3."""
+        return self._delta_window / 2
+
+    def to_array(self) -> np.ndarray:
+        """Fazy od najstarszej do najnowszej (len × D)."""
+        order = (self._head - self._count + np.arange(self._count)) % self.capacity
+        return self._phases[order]
+
+    def clear(self):
+        self._head = self._count = 0
+        self._last_delta[:] = 0.0
+        self._delta_window[:] = 0.0
+
+    def to_dict(self) -> dict:
+        return {'dims': self.dims, 'phases': self.to_array().tolist()}
+
+    def load_dict(self, data: dict):
+        """Odtwarza historię z to_dict(); wymiary dopasowane po nazwie (brak → 0)."""
+        self.load_array(data.get('phases', []), data.get('dims', self.dims))
 
-PL_TO_EN_IDX, EN_TO_PL_IDX = _build_index_maps()
+    def load_array(self, phases, dims: Optional[List[str]] = None):
+        """
+        Odtwarza historię z macierzy len × len(dims) jednym przypisaniem —
+        stan różnic jak po kolejnych push() tych samych wierszy.
+        """
+        self.clear()
+        saved_dims = list(self.dims if dims is None else dims)
+        rows = np.asarray(phases, dtype=np.float64).reshape(-1, len(saved_dims))[-self.capacity:]
+        n = len(rows)
+        if not n:
+            return
+        cols = np.array([saved_dims.index(dim) if dim in saved_dims else -1 for dim in self.dims])
+        self._phases[:n] = np.where(cols >= 0, rows[:, np.maximum(cols, 0)], 0.0)
+        self._head = n % self.capacity
+        self._count = n
+        if n >= 2:
+            self._last_delta = _wrapped_delta(self._phases[n - 1], self._phases[n - 2])
+            self._delta_window = self._last_delta.copy()
+        if n >= 3:
+            self._delta_window = _wrapped_delta(self._phases[n - 2], self._phases[n - 3]) + self._last_delta
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -123,11 +278,14 @@ class QuantumBridge:
 
         # vacuum jest teraz w QuantumEmotionalState.DIMENSIONS — brak ręcznego dodawania
 
-        self.phase_history: List[Dict[str, float]] = []
         self.max_history = 100
+        self.phase_history = PhaseHistory(self.state.DIMENSIONS, self.max_history)
         # Opcja stałej predykcji — zapobiega pętli inercji gdzie stan i predykcja
         # sprzężone wzmacniają się wzajemnie z sesji na sesję.
         self.fixed_trajectory: Optional[Dict] = None
+        # _checkpoint_key() ostatnio zapisanego snapshotu (.npz)
+        self._saved_key: Optional[bytes] = None
+        self._sampler: Optional[MeasurementSampler] = None
 
         self.sync_from_aii()
 
@@ -140,29 +298,21 @@ class QuantumBridge:
     # ─────────────────────────────────────────────────────────────
 
     def sync_from_aii(self):
-        vec = self.aii.context_vector
-        for pl_idx in range(len(vec)):
-            en_idx = PL_TO_EN_IDX.get(pl_idx)
-            if en_idx is None:
-                continue
-            en_name = PL_TO_EN[PL_NAMES[pl_idx]]  # FIX: PL_NAMES zamiast list(...)
-            real_val = float(vec[pl_idx])
-            magnitude = np.sqrt(max(0.0, real_val)) + self.VACUUM_AMPLITUDE
-            current_amp = self.state.amplitudes.get(en_name, 0.0j)
-            current_phase = np.angle(current_amp)
-            self.state.amplitudes[en_name] = magnitude * np.exp(1j * current_phase)
+        vec = np.asarray(self.aii.context_vector)
+        # Osie PL obecne w context_vector (krótszy wektor → mniej osi)
+        used = PL_AXES < len(vec)
+        pl_axes, en_axes = PL_AXES[used], EN_AXES[used]
+        magnitude = np.sqrt(np.maximum(0.0, vec[pl_axes].astype(np.float64))) + self.VACUUM_AMPLITUDE
+        current_phase = np.angle(self.state.vector[en_axes])
+        self.state.vector[en_axes] = magnitude * np.exp(1j * current_phase)
         self.state.normalize()
 
     def sync_to_aii(self):
-        probs = self.state.get_probabilities()
-        for en_name, prob in probs.items():
-            if en_name == 'vacuum':
-                continue
-            pl_name = EN_TO_PL.get(en_name)
-            if pl_name is None:
-                continue
-            pl_idx = PL_NAMES.index(pl_name)  # FIX: PL_NAMES zamiast list(...)
-            self.aii.context_vector[pl_idx] = np.clip(prob, 0.0, 1.0)
+        # vacuum nie ma osi PL — nie trafia do context_vector
+        probs = self.state.probability_vector()
+        vec = self.aii.context_vector
+        used = PL_AXES < len(vec)
+        vec[PL_AXES[used]] = np.clip(probs[EN_AXES[used]], 0.0, 1.0)
 
     # ─────────────────────────────────────────────────────────────
     # GŁÓWNE OPERACJE I INTERFERENCJA
@@ -177,11 +327,10 @@ class QuantumBridge:
         self.state = self.interference.apply_interference(self.state, time_step=time_step)
         self.state.amplitudes['vacuum'] = vacuum_before
         resonance = self.interference.resonance_strength(self.state)
+        # Nowy stan po interferencji — zapamiętane rezonanse opcji są nieaktualne
+        self.decider.invalidate_cache()
 
-        phases = {dim: float(np.angle(self.state.amplitudes[dim])) for dim in self.state.DIMENSIONS}
-        self.phase_history.append(phases)
-        if len(self.phase_history) > self.max_history:
-            self.phase_history.pop(0)
+        self.phase_history.push(np.angle(self.state.vector))
 
         self.sync_to_aii()
 
@@ -214,6 +363,19 @@ class QuantumBridge:
         pl_emotion = EN_TO_PL.get(en_emotion, en_emotion)
         return en_emotion, pl_emotion
 
+    def sample_emotions(self, n: int, seed=None) -> List[str]:
+        """
+        n pomiarów (bez kolapsu) naraz — nazwy PL. Jeden sync_from_aii i jedna
+        CDF na całą partię; sampler trzyma własny Generator między wywołaniami
+        (seed ustawia go od nowa) i przechodzi na nowy obiekt stanu po interferencji.
+        """
+        self.sync_from_aii()
+        if seed is not None or self._sampler is None:
+            self._sampler = self.state.sampler(seed)
+        elif self._sampler.state is not self.state:
+            self._sampler = MeasurementSampler(self.state, rng=self._sampler.rng)
+        return [EN_TO_PL.get(en, en) for en in self._sampler.sample(n)]
+
     def get_quantum_state(self) -> Dict[str, dict]:
         self.sync_from_aii()
         result = {}
@@ -230,17 +392,7 @@ class QuantumBridge:
     def get_phase_coherence(self) -> float:
         if len(self.phase_history) < 2:
             return 1.0
-        prev = self.phase_history[-2]
-        curr = self.phase_history[-1]
-        diffs = []
-        for dim in self.state.DIMENSIONS:
-            if dim in prev and dim in curr:
-                diff = abs(curr[dim] - prev[dim])
-                diff = min(diff, 2 * np.pi - diff)
-                diffs.append(diff)
-        if not diffs:
-            return 1.0
-        mean_diff = np.mean(diffs)
+        mean_diff = float(np.mean(self.phase_history.last_delta()))
         coherence = 1.0 - (mean_diff / np.pi)
         return max(0.0, min(1.0, coherence))
 
@@ -257,21 +409,20 @@ class QuantumBridge:
         ranked = []
         max_classical = max(c[0] for c in candidates[:top_n]) if candidates else 1.0
 
-        for score, mid, entry in candidates[:top_n]:
-            # FIX v2.4.0: _validate_mem_vec gdy aii dostępne — ochrona przed
-            # wektorem złej długości ze starej pamięci po zmianie DIM
-            if hasattr(self.aii, '_validate_mem_vec'):
-                mem_vec = self.aii._validate_mem_vec(entry)
-            else:
-                mem_vec = np.array(entry.get('wektor_C_Def', np.zeros(15)))
-
-            q_resonance  = self._memory_resonance(mem_vec)
-            q_prediction = self._memory_trajectory_fit(mem_vec, predicted_state)
-            q_phase      = self._memory_phase_alignment(mem_vec)
-
+        head = candidates[:top_n]
+        # FIX v2.4.0: _validate_mem_vec gdy aii dostępne — ochrona przed
+        # wektorem złej długości ze starej pamięci po zmianie DIM
+        if hasattr(self.aii, '_validate_mem_vec'):
+            mem_vecs = [self.aii._validate_mem_vec(entry) for _, _, entry in head]
+        else:
+            mem_vecs = [np.array(entry.get('wektor_C_Def', np.zeros(15))) for _, _, entry in head]
+        q_resonance, q_prediction, q_phase = self.score_memories(
+            _stack_vectors(mem_vecs), predicted_state)
+
+        for k, (score, mid, entry) in enumerate(head):
             classical_norm = score / max_classical if max_classical > 0 else 0
-            final_score = (classical_norm * 0.50 + q_resonance * 0.25 +
-                           q_prediction * 0.15 + q_phase * 0.10)
+            final_score = (classical_norm * 0.50 + q_resonance[k] * 0.25 +
+                           q_prediction[k] * 0.15 + q_phase[k] * 0.10)
             final_score *= (0.5 + entry.get('weight', 0.5))
             ranked.append((final_score, mid, entry))
 
@@ -281,74 +432,77 @@ class QuantumBridge:
         ranked.sort(key=lambda x: x[0], reverse=True)
         return ranked
 
+    def score_memories(self, vectors: np.ndarray, predicted: Optional[dict] = None
+                       ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Kwantowa ocena K wspomnień naraz (vectors: K×15, osie PL).
+
+        Zwraca (resonance, trajectory_fit, phase_alignment) — tablice długości K,
+        te same wzory co _memory_resonance / _memory_trajectory_fit /
+        _memory_phase_alignment. Wiersze o Σ|v| < 0.01 dostają 0.5.
+        predicted=None → bieżące _predict_trajectory(). Nie synchronizuje z AII.
+        """
+        vectors = np.asarray(vectors, dtype=np.float64)
+        if vectors.ndim != 2 or vectors.shape[1] != len(PL_NAMES):
+            vectors = _stack_vectors(list(np.atleast_2d(vectors)))
+        k = vectors.shape[0]
+        dims = self.state.DIMENSIONS
+        vectors = vectors[:, PL_AXES]       # tylko osie z odpowiednikiem EN
+        en_cols = EN_AXES
+        empty = np.abs(vectors).sum(axis=1) < 0.01
+
+        # Rezonans: stan + √v·0.2 na osiach wspomnienia, normalizacja, forma kwadratowa
+        states = np.tile(self.state.vector, (k, 1))
+        states[:, en_cols] += np.where(vectors >= 0.01, np.sqrt(np.maximum(vectors, 0.0)) * 0.2, 0.0)
+        norms = np.sqrt(np.sum(np.abs(states) ** 2, axis=1))
+        states = np.where((norms > 1e-10)[:, None], states / np.where(norms > 1e-10, norms, 1.0)[:, None], states)
+        resonance = np.clip(0.5 + self.interference.resonance_strength_batch(states), 0.0, 1.0)
+
+        # Trajektoria: kosinus rozkładu |v|/Σ|v| z przewidywanym rozkładem
+        if predicted is None:
+            predicted = self._predict_trajectory()
+        pred = np.array([predicted.get(dim, 0.0) for dim in dims])
+        mem_probs = np.zeros((k, len(dims)))
+        mem_probs[:, en_cols] = np.abs(vectors) / (np.abs(vectors).sum(axis=1, keepdims=True) + 1e-10)
+        denom = np.sqrt(np.sum(np.array(list(predicted.values())) ** 2) * np.sum(mem_probs ** 2, axis=1))
+        trajectory = np.where(denom >= 1e-10,
+                              np.clip((mem_probs @ pred) / np.where(denom >= 1e-10, denom, 1.0), 0.0, 1.0),
+                              0.5)
+
+        # Fazy: Σ v·|α|·cos²(arg α) po osiach z v >= 0.05, średnio
+        amps = self.state.vector[en_cols]
+        weight = np.abs(amps) * np.cos(np.angle(amps)) ** 2
+        active = vectors >= 0.05
+        count = active.sum(axis=1)
+        alignment = np.where(active, vectors, 0.0) @ weight
+        phase = np.where(count > 0, np.clip(0.5 + alignment / np.maximum(count, 1), 0.0, 1.0), 0.5)
+
+        return (np.where(empty, 0.5, resonance),
+                np.where(empty, 0.5, trajectory),
+                np.where(empty, 0.5, phase))
+
     def _memory_resonance(self, mem_vec: np.ndarray) -> float:
-        if np.sum(np.abs(mem_vec)) < 0.01: return 0.5
-        sim_state = QuantumEmotionalState()
-        for dim in sim_state.DIMENSIONS:
-            sim_state.amplitudes[dim] = self.state.amplitudes.get(dim, 0j)
-        for pl_idx, val in enumerate(mem_vec):
-            if val < 0.01: continue
-            en_idx = PL_TO_EN_IDX.get(pl_idx)
-            if en_idx is None: continue
-            en_name = PL_TO_EN[PL_NAMES[pl_idx]]  # FIX: PL_NAMES
-            sim_state.amplitudes[en_name] += np.sqrt(val) * 0.2
-        sim_state.normalize()
-        return np.clip(0.5 + self.interference.resonance_strength(sim_state), 0.0, 1.0)
+        return float(self.score_memories(_stack_vectors([mem_vec]))[0][0])
 
     def _predict_trajectory(self) -> dict:
-        predicted = {}
-        probs = self.state.get_probabilities()
         if len(self.phase_history) < 3:
-            return probs
-        recent = self.phase_history[-3:]
-        for dim in self.state.DIMENSIONS:
-            current_prob = probs.get(dim, 0.0)
-            phases = [step.get(dim, 0.0) for step in recent]
-            phase_diffs = [min(abs(phases[i] - phases[i-1]), 2*np.pi - abs(phases[i] - phases[i-1]))
-                           for i in range(1, len(phases))]
-            avg_phase_change = np.mean(phase_diffs) if phase_diffs else np.pi
-            stability = 1.0 - (avg_phase_change / np.pi)
-            predicted[dim] = current_prob * (1.0 + stability * 0.3)
-        total = sum(predicted.values())
-        if total > 0: predicted = {k: v/total for k, v in predicted.items()}
-        return predicted
+            return self.state.get_probabilities()
+        stability = 1.0 - (self.phase_history.mean_recent_delta() / np.pi)
+        predicted = self.state.probability_vector() * (1.0 + stability * 0.3)
+        total = predicted.sum()
+        if total > 0: predicted = predicted / total
+        return dict(zip(self.state.DIMENSIONS, predicted.tolist()))
 
     def _memory_trajectory_fit(self, mem_vec: np.ndarray, predicted: dict) -> float:
-        if np.sum(np.abs(mem_vec)) < 0.01: return 0.5
-        mem_probs = {}
-        mem_total = np.sum(np.abs(mem_vec)) + 1e-10
-        for pl_idx, val in enumerate(mem_vec):
-            if pl_idx < len(PL_NAMES):  # FIX: PL_NAMES
-                en_name = PL_TO_EN[PL_NAMES[pl_idx]]
-                mem_probs[en_name] = abs(val) / mem_total
-        dot = sum(predicted.get(dim, 0.0) * mem_probs.get(dim, 0.0) for dim in self.state.DIMENSIONS)
-        norm_p = sum(p**2 for p in predicted.values())
-        norm_m = sum(m**2 for m in mem_probs.values())
-        denom = np.sqrt(norm_p * norm_m)
-        return np.clip(dot / denom, 0.0, 1.0) if denom >= 1e-10 else 0.5
+        return float(self.score_memories(_stack_vectors([mem_vec]), predicted)[1][0])
 
     def _memory_phase_alignment(self, mem_vec: np.ndarray) -> float:
-        if np.sum(np.abs(mem_vec)) < 0.01: return 0.5
-        alignment, count = 0.0, 0
-        for pl_idx, val in enumerate(mem_vec):
-            if val < 0.05 or pl_idx >= len(PL_NAMES): continue  # FIX: PL_NAMES
-            en_name = PL_TO_EN[PL_NAMES[pl_idx]]
-            if en_name not in self.state.amplitudes: continue
-            amp = self.state.amplitudes[en_name]
-            alignment += val * abs(amp) * np.cos(np.angle(amp)) ** 2
-            count += 1
-        return np.clip(0.5 + alignment / count, 0.0, 1.0) if count > 0 else 0.5
+        return float(self.score_memories(_stack_vectors([mem_vec]))[2][0])
 
     def emotional_veto_check(self, action_vector: np.ndarray) -> Tuple[bool, str]:
-        sim_state = QuantumEmotionalState()
-        for dim in sim_state.DIMENSIONS:
-            sim_state.amplitudes[dim] = self.state.amplitudes.get(dim, 0j)
-        for pl_idx, val in enumerate(action_vector):
-            if val < 0.01: continue
-            en_idx = PL_TO_EN_IDX.get(pl_idx)
-            if en_idx is None: continue
-            en_name = PL_TO_EN[PL_NAMES[pl_idx]]  # FIX: PL_NAMES
-            sim_state.amplitudes[en_name] += np.sqrt(val) * 0.3
+        sim_state = self.state.copy()
+        action = _stack_vectors([action_vector])[0, PL_AXES]
+        sim_state.vector[EN_AXES] += np.where(action >= 0.01, np.sqrt(np.maximum(action, 0.0)) * 0.3, 0.0)
         sim_state.normalize()
         resonance = self.interference.resonance_strength(sim_state)
         return (False, f"Destrukcyjna interference ({resonance:.3f})") if resonance < -0.5 else (True, f"OK ({resonance:.3f})")
@@ -357,121 +511,267 @@ class QuantumBridge:
     # SERIALIZACJA QRM (Relacyjny Układ Odniesienia i Ewolucja Czasu)
     # ─────────────────────────────────────────────────────────────
 
-    def to_dict(self) -> dict:
-        """Zapisuje stan kwantowy jako Węzeł Czasowy (Okno)."""
-        data = {'interferences': {}, 'predicted_trajectory': {}, 'timestamp': time.time()}
-        epsilon = 1e-12
-
-        volatile_and_vacuum = ['joy', 'sadness', 'fear', 'anger', 'surprise', 'disgust', 'vacuum']
-        non_volatile = [d for d in self.state.DIMENSIONS if d not in volatile_and_vacuum]
+    # Wymiary bez lotnych emocji i próżni — kandydaci na oś odniesienia fazy
+    _VOLATILE_AND_VACUUM = ('joy', 'sadness', 'fear', 'anger', 'surprise', 'disgust', 'vacuum')
 
-        ref_dim = max(non_volatile, key=lambda d: abs(self.state.amplitudes.get(d, 0j))) if non_volatile else 'logic'
-        ref_amp = self.state.amplitudes.get(ref_dim, 1.0 + 0j)
+    def _snapshot_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Węzeł Czasowy jako tablice (kolejność DIMENSIONS): moduły/fazy względem
+        osi odniesienia, przewidywana trajektoria, historia faz, fixed_trajectory.
+        Wspólne źródło dla to_dict() (JSON) i save_snapshot() (.npz).
+        """
+        epsilon = 1e-12
+        state = self.state
+        dims = state.DIMENSIONS
+        amps = state.vector.copy()
+        mags = np.hypot(amps.real, amps.imag)   # = abs(complex), bit w bit jak zapis per wymiar
+        phases = np.angle(amps)
+
+        candidates = [i for i, d in enumerate(dims) if d not in self._VOLATILE_AND_VACUUM]
+        ref = candidates[int(np.argmax(mags[candidates]))] if candidates else state.INDEX['logic']
+        ref_amp = amps[ref]
         ref_mag = abs(ref_amp)
-
         if ref_mag < epsilon:
             ref_amp = 1.0 + 0j
             ref_mag = 1.0
 
-        ref_phase = np.angle(ref_amp)
-        data['ref_dim'] = ref_dim
-
         predicted_probs = self._predict_trajectory()
         # Gdy fixed_trajectory ustawione — użyj go (blokuje pętlę inercji)
         if self.fixed_trajectory is not None:
             predicted_probs = self.fixed_trajectory
+        fixed = self.fixed_trajectory or {}
 
-        for dim in self.state.DIMENSIONS:
-            amp = self.state.amplitudes.get(dim, 0.0 + 0j)
-            mag = abs(amp)
-            phase = np.angle(amp)
-
-            rel_mag   = mag / ref_mag if ref_mag > epsilon else mag
-            rel_phase = phase - ref_phase
+        return {
+            'timestamp': time.time(),
+            'ref': ref,
+            'rel_magnitude': mags / ref_mag if ref_mag > epsilon else mags,
+            'rel_phase': phases - np.angle(ref_amp),
+            'abs_magnitude': mags,
+            'predicted': np.array([predicted_probs.get(d, m ** 2) for d, m in zip(dims, mags.tolist())],
+                                  dtype=np.float64),
+            'predicted_phase': phases,
+            'entropy': float(state.entropy()),
+            'phase_history': self.phase_history.to_array(),
+            'has_fixed': self.fixed_trajectory is not None,
+            'fixed_trajectory': np.array([fixed.get(d, np.nan) for d in dims], dtype=np.float64),
+        }
 
+    def to_dict(self) -> dict:
+        """Zapisuje stan kwantowy jako Węzeł Czasowy (Okno)."""
+        a = self._snapshot_arrays()
+        dims = self.state.DIMENSIONS
+        data = {'interferences': {}, 'predicted_trajectory': {}, 'timestamp': a['timestamp']}
+        data['ref_dim'] = dims[a['ref']]
+
+        rel_mag, rel_phase, abs_mag = (a[k].tolist() for k in ('rel_magnitude', 'rel_phase', 'abs_magnitude'))
+        predicted, predicted_phase = a['predicted'].tolist(), a['predicted_phase'].tolist()
+        for i, dim in enumerate(dims):
             data['interferences'][dim] = {
-                'rel_magnitude': rel_mag,
-                'rel_phase':     rel_phase,
-                'abs_magnitude': mag
+                'rel_magnitude': rel_mag[i],
+                'rel_phase':     rel_phase[i],
+                'abs_magnitude': abs_mag[i]
             }
-            data['predicted_trajectory'][dim]           = predicted_probs.get(dim, mag**2)
-            data['predicted_trajectory'][dim + '_phase'] = phase
+            data['predicted_trajectory'][dim]            = predicted[i]
+            data['predicted_trajectory'][dim + '_phase'] = predicted_phase[i]
 
-        data['entropy'] = float(self.state.entropy())
+        data['entropy'] = a['entropy']
+        data['phase_history'] = self.phase_history.to_dict()
         return data
 
     def from_dict(self, data: dict):
         """Odtwarza stan i przepuszcza przez ewolucję czasową (Pustkę)."""
         if 'interferences' not in data:
             return
+        if 'phase_history' in data:
+            self.phase_history.load_dict(data['phase_history'])
 
+        dims = self.state.DIMENSIONS
+        interferences = data['interferences']
+        predicted = data.get('predicted_trajectory', {})
         ref_dim = data.get('ref_dim', 'logic')
-        ref_interf = data['interferences'].get(ref_dim, {})
-        ref_abs_mag = ref_interf.get('abs_magnitude', 1.0)
-        ref_amp = ref_abs_mag * np.exp(1j * 0.0)
 
-        self.state.amplitudes[ref_dim] = ref_amp
-
-        for dim in self.state.DIMENSIONS:
-            if dim == ref_dim:
-                continue
-            interf     = data['interferences'].get(dim, {})
-            rel_mag    = interf.get('rel_magnitude', 0.0)
-            rel_phase  = interf.get('rel_phase', 0.0)
-            abs_mag    = interf.get('abs_magnitude', 0.0)
+        def column(key, default):
+            return np.array([interferences.get(d, {}).get(key, default) for d in dims], dtype=np.float64)
+
+        abs_magnitude = column('abs_magnitude', 0.0)
+        abs_magnitude[self.state.INDEX[ref_dim]] = interferences.get(ref_dim, {}).get('abs_magnitude', 1.0)
+        # Brak wpisu w trajektorii → NaN → bieżący moduł² / faza
+        self._restore_snapshot({
+            'timestamp': data.get('timestamp', time.time()),
+            'ref': self.state.INDEX[ref_dim],
+            'rel_magnitude': column('rel_magnitude', 0.0),
+            'rel_phase': column('rel_phase', 0.0),
+            'abs_magnitude': abs_magnitude,
+            'predicted': np.array([predicted.get(d, np.nan) for d in dims], dtype=np.float64),
+            'predicted_phase': np.array([predicted.get(d + '_phase', np.nan) for d in dims], dtype=np.float64),
+        })
+
+    def _restore_snapshot(self, a: dict) -> bool:
+        """
+        Odtwarza amplitudy z układu odniesienia (oś ref: faza 0, moduł abs_magnitude)
+        i przepuszcza je przez ewolucję QRM za czas od a['timestamp'].
+        Zwraca True, gdy ewolucja została zastosowana (stan ≠ zapisany).
+        """
+        ref = int(a['ref'])
+        vacuum = self.state.INDEX['vacuum']
+        ref_abs_mag = float(a['abs_magnitude'][ref])
 
-            mag   = abs_mag if dim == 'vacuum' else rel_mag * ref_abs_mag
-            phase = np.angle(ref_amp) + rel_phase
-            self.state.amplitudes[dim] = mag * np.exp(1j * phase)
+        mag = np.asarray(a['rel_magnitude'], dtype=np.float64) * ref_abs_mag
+        mag[vacuum] = a['abs_magnitude'][vacuum]
+        phase = np.array(a['rel_phase'], dtype=np.float64)
+        mag[ref], phase[ref] = ref_abs_mag, 0.0
+        self.state.vector = mag * np.exp(1j * phase)
 
         # ─────────────────────────────────────────────────────────
         # EWOLUCJA QRM W PUSTCE (ZAMKNIĘTE PUDEŁKO)
         # ─────────────────────────────────────────────────────────
-        ostatni_zapis  = data.get('timestamp', time.time())
+        ostatni_zapis  = float(a['timestamp'])
         obecny_czas    = time.time()
         delta_t_godziny = (obecny_czas - ostatni_zapis) / 3600.0
 
-        if delta_t_godziny > 0.016:
+        evolved = delta_t_godziny > 0.016
+        if evolved:
             if self.verbose:
                 print(f"\033[90m[TIME] Pustka trwała {delta_t_godziny:.2f}h. Aplikuję ewolucję QRM...\033[0m")
 
-            vacuum_amp = self.state.amplitudes.get('vacuum', 0j)
-            vacuum_mag = abs(vacuum_amp)
+            amps = self.state.vector
+            active = np.arange(len(amps)) != vacuum
+            vacuum_mag = abs(amps[vacuum])
+            mag  = np.abs(amps[active])
+            faza = np.angle(amps[active])
 
-            for dim in self.state.DIMENSIONS:
-                if dim == 'vacuum':
-                    continue
+            szybkosc_inercji, wsp_rozpadu = self._decay_rate_arrays()
 
-                amp  = self.state.amplitudes[dim]
-                mag  = abs(amp)
-                faza = np.angle(amp)
+            docelowe_prob = np.asarray(a['predicted'], dtype=np.float64)[active]
+            docelowe_prob = np.where(np.isnan(docelowe_prob), mag ** 2, docelowe_prob)
+            docelowy_mag  = np.sqrt(np.maximum(0.0, docelowe_prob))
+            docelowa_faza = np.asarray(a['predicted_phase'], dtype=np.float64)[active]
+            docelowa_faza = np.where(np.isnan(docelowa_faza), faza, docelowa_faza)
 
-                szybkosc_inercji, wsp_rozpadu = self.DECAY_RATES.get(dim, (0.5, 0.05))
+            # 1. Inercja Predykcyjna
+            wsp_przyciagania = 1.0 - np.exp(-szybkosc_inercji * delta_t_godziny)
+            mag_po_inercji   = mag + (docelowy_mag - mag) * wsp_przyciagania
 
-                docelowe_prob  = data['predicted_trajectory'].get(dim, mag**2)
-                docelowy_mag   = math.sqrt(max(0.0, docelowe_prob))
-                docelowa_faza  = data['predicted_trajectory'].get(dim + '_phase', faza)
+            delta_faza = (docelowa_faza - faza) * (1.0 - math.exp(-0.05 * delta_t_godziny))
+            nowa_faza  = faza + delta_faza
 
-                # 1. Inercja Predykcyjna
-                wsp_przyciagania = 1.0 - math.exp(-szybkosc_inercji * delta_t_godziny)
-                mag_po_inercji   = mag + (docelowy_mag - mag) * wsp_przyciagania
+            # 2. Fizyka Rozpadu do Pustki — utracone prawdopodobieństwo trafia do vacuum
+            decayed_mag = mag_po_inercji * np.exp(-wsp_rozpadu * delta_t_godziny)
 
-                delta_faza = (docelowa_faza - faza) * (1.0 - math.exp(-0.05 * delta_t_godziny))
-                nowa_faza  = faza + delta_faza
+            prob_lost   = (mag_po_inercji ** 2) - (decayed_mag ** 2)
+            vacuum_prob = (vacuum_mag ** 2) + float(np.sum(np.maximum(0.0, prob_lost)))
+            vacuum_mag  = math.sqrt(vacuum_prob)
 
-                # 2. Fizyka Rozpadu do Pustki
-                decayed_mag = mag_po_inercji * math.exp(-wsp_rozpadu * delta_t_godziny)
+            amps[active] = decayed_mag * np.exp(1j * nowa_faza)
+            amps[vacuum] = vacuum_mag * np.exp(1j * 0.0)
 
-                prob_lost   = (mag_po_inercji**2) - (decayed_mag**2)
-                vacuum_prob = (vacuum_mag**2) + max(0.0, prob_lost)
-                vacuum_mag  = math.sqrt(vacuum_prob)
+        self.state.normalize()
+        self.sync_to_aii()
+        return evolved
 
-                self.state.amplitudes[dim] = decayed_mag * np.exp(1j * nowa_faza)
+    def _decay_rate_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """DECAY_RATES jako (szybkość inercji, współczynnik rozpadu) dla osi bez vacuum."""
+        rates = [self.DECAY_RATES.get(d, (0.5, 0.05)) for d in self.state.DIMENSIONS if d != 'vacuum']
+        return np.array([r[0] for r in rates]), np.array([r[1] for r in rates])
 
-            self.state.amplitudes['vacuum'] = vacuum_mag * np.exp(1j * 0.0)
+    # ─────────────────────────────────────────────────────────────
+    # SNAPSHOT BINARNY (.npz) ze śledzeniem zmian
+    # ─────────────────────────────────────────────────────────────
 
-        self.state.normalize()
-        self.sync_to_aii()
+    SNAPSHOT_FILE = "quantum_state.npz"
+    LEGACY_FILE = "quantum_state.json"
+    SNAPSHOT_VERSION = 1
+    # Wiersze macierzy 'columns' w .npz (każdy: wartość per wymiar z 'dims')
+    SNAPSHOT_COLUMNS = ('rel_magnitude', 'rel_phase', 'abs_magnitude',
+                        'predicted', 'predicted_phase', 'fixed_trajectory')
+
+    def _checkpoint_key(self) -> bytes:
+        """Bajty stanu, który trafia do snapshotu — równe → nic się nie zmieniło."""
+        fixed = self.fixed_trajectory
+        return b''.join((
+            self.state.vector.tobytes(),
+            self.phase_history.to_array().tobytes(),
+            repr(sorted(fixed.items())).encode('utf-8') if fixed is not None else b'-',
+        ))
+
+    def save_snapshot(self, path: str, force: bool = False) -> bool:
+        """
+        Zapisuje stan do .npz (tmp + os.replace): header [wersja, timestamp, ref,
+        entropia, has_fixed], dims, columns (SNAPSHOT_COLUMNS × D), phase_history.
+
+        Gdy stan jest identyczny z ostatnio zapisanym — nie przepisuje pliku,
+        odświeża tylko jego mtime (chwilę ostatniego punktu kontrolnego, od
+        której liczy się Pustka). Zwraca True gdy plik został zapisany.
+        """
+        key = self._checkpoint_key()
+        if not force and key == self._saved_key and os.path.exists(path):
+            os.utime(path)
+            return False
+        a = self._snapshot_arrays()
+        header = np.array([self.SNAPSHOT_VERSION, a['timestamp'], a['ref'],
+                           a['entropy'], float(a['has_fixed'])], dtype=np.float64)
+        tmp = path + ".tmp"
+        with open(tmp, 'wb') as f:
+            np.savez(f, header=header, dims=np.array(self.state.DIMENSIONS),
+                     columns=np.stack([a[c] for c in self.SNAPSHOT_COLUMNS]),
+                     phase_history=a['phase_history'])
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        self._saved_key = key
+        return True
+
+    def load_snapshot(self, path: str):
+        """
+        Wczytuje .npz jednym odczytem; wymiary dopasowane po nazwie.
+        Pustka liczona od późniejszej z chwil: zapisu stanu, mtime pliku.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            header, saved_dims = data['header'], data['dims'].tolist()
+            columns, phase_history = data['columns'], data['phase_history']
+        version = int(header[0])
+        if version > self.SNAPSHOT_VERSION:
+            raise ValueError(f"Nieobsługiwana wersja snapshotu kwantowego: {version}")
+        timestamp, ref, has_fixed = float(header[1]), int(header[2]), bool(header[4])
+
+        # Kolumny w kolejności DIMENSIONS; brak wymiaru → 0 (stan) / NaN (trajektoria)
+        cols = np.array([saved_dims.index(d) if d in saved_dims else -1 for d in self.state.DIMENSIONS])
+        aligned = np.where(cols >= 0, columns[:, np.maximum(cols, 0)], np.nan)
+        a = dict(zip(self.SNAPSHOT_COLUMNS, aligned))
+        for name in ('rel_magnitude', 'rel_phase', 'abs_magnitude'):
+            a[name] = np.nan_to_num(a[name], nan=0.0)
+
+        self.phase_history.load_array(phase_history, saved_dims)
+        self.fixed_trajectory = None
+        if has_fixed:
+            self.fixed_trajectory = {d: v for d, v in zip(saved_dims, columns[-1].tolist())
+                                     if not math.isnan(v)}
+        a['timestamp'] = max(timestamp, os.path.getmtime(path))
+        a['ref'] = self.state.INDEX[saved_dims[ref]]
+        # Po ewolucji w Pustce plik trzyma stan sprzed niej — następny zapis go przepisze
+        evolved = self._restore_snapshot(a)
+        self._saved_key = None if evolved else self._checkpoint_key()
+
+    def save_state(self, base_dir: str) -> bool:
+        """Snapshot do base_dir/quantum_state.npz; False gdy stan bez zmian."""
+        os.makedirs(base_dir, exist_ok=True)
+        return self.save_snapshot(os.path.join(base_dir, self.SNAPSHOT_FILE))
+
+    def load_state(self, base_dir: str) -> Optional[str]:
+        """
+        Wczytuje quantum_state.npz, a gdy go nie ma — stary quantum_state.json.
+        Zwraca ścieżkę wczytanego pliku albo None.
+        """
+        path = os.path.join(base_dir, self.SNAPSHOT_FILE)
+        if os.path.exists(path):
+            self.load_snapshot(path)
+            return path
+        legacy = os.path.join(base_dir, self.LEGACY_FILE)
+        if os.path.exists(legacy) and os.path.getsize(legacy) > 0:
+            with open(legacy, 'r', encoding='utf-8') as f:
+                self.from_dict(json.load(f))
+            return legacy
+        return None
 
 
     # Aliasy dla kompatybilności z union.py (może używać nazw _qrm)
@@ -495,4 +795,51 @@ class QuantumBridge:
 # HELPER: integracja z AII
 # ═══════════════════════════════════════════════════════════════════════════════
 def integrate_quantum_bridge(aii_instance, verbose: bool = True) -> QuantumBridge:
-    return QuantumBridge(aii_instance, verbose=verbose)
\ No newline at end of file
+    return QuantumBridge(aii_instance, verbose=verbose)
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# MIKRO-BENCHMARK: narzut mostu na turę (python quantum_bridge.py)
+# ═══════════════════════════════════════════════════════════════════════════════
+if __name__ == "__main__":
+    import timeit
+
+    class _StubAII:
+        def __init__(self):
+            self.context_vector = np.random.default_rng(7).random(len(PL_NAMES)).astype(np.float32)
+
+    # Referencyjne pętle sprzed v2.5.1 (słowniki + PL_NAMES.index na każdej osi)
+    def _loop_sync_from_aii(bridge):
+        vec = bridge.aii.context_vector
+        for pl_idx in range(len(vec)):
+            if PL_TO_EN_IDX.get(pl_idx) is None:
+                continue
+            en_name = PL_TO_EN[PL_NAMES[pl_idx]]
+            magnitude = np.sqrt(max(0.0, float(vec[pl_idx]))) + bridge.VACUUM_AMPLITUDE
+            current_phase = np.angle(bridge.state.amplitudes.get(en_name, 0.0j))
+            bridge.state.amplitudes[en_name] = magnitude * np.exp(1j * current_phase)
+        bridge.state.normalize()
+
+    def _loop_sync_to_aii(bridge):
+        for en_name, prob in bridge.state.get_probabilities().items():
+            pl_name = EN_TO_PL.get(en_name)
+            if en_name == 'vacuum' or pl_name is None:
+                continue
+            bridge.aii.context_vector[PL_NAMES.index(pl_name)] = np.clip(prob, 0.0, 1.0)
+
+    bridge = QuantumBridge(_StubAII(), verbose=False)
+    ref = QuantumBridge(_StubAII(), verbose=False)
+    ref.state = bridge.state.copy()
+    bridge.sync_from_aii(); bridge.sync_to_aii()
+    _loop_sync_from_aii(ref); _loop_sync_to_aii(ref)
+    diff = float(np.max(np.abs(bridge.aii.context_vector - ref.aii.context_vector)))
+    print(f"Zgodność sync (pętle vs tablice): max |Δ| = {diff:.2e}")
+
+    n = 2000
+    for label, fn in (
+        ("sync_from_aii  pętle  ", lambda: _loop_sync_from_aii(ref)),
+        ("sync_from_aii  tablice", bridge.sync_from_aii),
+        ("sync_to_aii    pętle  ", lambda: _loop_sync_to_aii(ref)),
+        ("sync_to_aii    tablice", bridge.sync_to_aii),
+        ("process_interference  ", bridge.process_interference),
+    ):
+        print(f"  {label}: {timeit.timeit(fn, number=n) / n * 1e6:8.1f} µs")
@@ -1,8 +1,14 @@
 # eriamo/quantum_emotions.py
+# v1.2.1 — MeasurementSampler.cdf(): stan zerowy → ValueError (jak np.random.choice
+#          z p o sumie 0) zamiast NaN w CDF i IndexError z searchsorted
+# v1.2 — MeasurementSampler: CDF pomiaru związana z wersją stanu (state.version),
+#        sample(n) — n pomiarów jednym searchsorted; measure() przez tę samą CDF
+# v1.1 — amplitudy w jednej tablicy complex128; amplitudes = widok dict (te same klucze)
 
 import numpy as np
+from collections.abc import MutableMapping
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import json
 
 @dataclass
@@ -36,11 +42,51 @@ class EmotionalAmplitude:
         return f"{self.name}: {self.magnitude:.3f}∠{np.degrees(self.phase):.1f}°"
 
 
+class _AmplitudeView(MutableMapping):
+    """
+    Widok dict emocja → complex na tablicę stanu.
+    Zapis state.amplitudes['joy'] = a trafia wprost do wektora; klucze = DIMENSIONS.
+    """
+    __slots__ = ('_state',)
+
+    def __init__(self, state: 'QuantumEmotionalState'):
+        self._state = state
+
+    def __getitem__(self, emotion: str) -> complex:
+        return complex(self._state.vector[self._state.INDEX[emotion]])
+
+    def __setitem__(self, emotion: str, value):
+        self._state.vector[self._state.INDEX[emotion]] = value
+        self._state.version += 1
+
+    def __delitem__(self, emotion: str):
+        raise TypeError("Wymiarów stanu nie można usuwać")
+
+    def __contains__(self, emotion) -> bool:
+        return emotion in self._state.INDEX
+
+    def __iter__(self):
+        return iter(self._state.DIMENSIONS)
+
+    def __len__(self) -> int:
+        return len(self._state.DIMENSIONS)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
 class QuantumEmotionalState:
     """
     15-wymiarowy Reality Sphere jako quantum state
     
     |Ψ⟩ = Σ α_i e^(iφ_i) |emotion_i⟩
+
+    Stan = vector (ndarray complex128, kolejność DIMENSIONS);
+    amplitudes to widok dict na ten sam wektor.
+
+    version rośnie przy każdej zmianie przez API stanu (normalize, set_emotion,
+    collapse_to, amplitudes) — cache pochodnych (np. CDF pomiaru) porównuje ją.
+    Zapis wprost do vector wymaga normalize() lub touch().
     """
     
     DIMENSIONS = [
@@ -55,6 +101,7 @@ class QuantumEmotionalState:
         # Niewidoczny dla AII: sync_to_aii pomija vacuum przy zapisie do context_vector.
         'vacuum'
     ]
+    INDEX = {dim: i for i, dim in enumerate(DIMENSIONS)}
     
     def __init__(self):
         """Initialize w równej superpozycji (vacuum startuje od zera)"""
@@ -62,22 +109,48 @@ class QuantumEmotionalState:
         # Superpozycja bez vacuum — vacuum akumuluje energię dopiero przez rozpad
         uniform_amplitude = 1.0 / np.sqrt(n - 1)
         
-        self.amplitudes: Dict[str, complex] = {
-            dim: (0.0 + 0j) if dim == 'vacuum'
-            else uniform_amplitude * np.exp(1j * np.random.uniform(0, 2*np.pi))
-            for dim in self.DIMENSIONS
-        }
+        self.vector = np.zeros(n, dtype=np.complex128)
+        active = np.array([dim != 'vacuum' for dim in self.DIMENSIONS])
+        phases = np.random.uniform(0, 2*np.pi, int(active.sum()))
+        self.vector[active] = uniform_amplitude * np.exp(1j * phases)
+        self.version = 0
+        self._measurement: Optional['MeasurementSampler'] = None
+
+    @property
+    def amplitudes(self) -> Dict[str, complex]:
+        return _AmplitudeView(self)
+
+    @amplitudes.setter
+    def amplitudes(self, values: Dict[str, complex]):
+        """Przypisanie całego dict — wymiary spoza values dostają 0."""
+        vector = np.zeros(len(self.DIMENSIONS), dtype=np.complex128)
+        for dim, amp in values.items():
+            vector[self.INDEX[dim]] = amp
+        self.vector = vector
+        self.touch()
+
+    def touch(self):
+        """Oznacz stan jako zmieniony (unieważnia CDF samplerów)."""
+        self.version += 1
+
+    def copy(self) -> 'QuantumEmotionalState':
+        """Tania kopia stanu (bez losowania faz i bez deepcopy)."""
+        new = self.__class__.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        new.vector = self.vector.copy()
+        new._measurement = None
+        return new
+
+    def __deepcopy__(self, memo):
+        return self.copy()
         
     def normalize(self):
         """Ensure Σ|α|² = 1 (kwantowy warunek)"""
-        total_prob = sum(abs(amp)**2 for amp in self.amplitudes.values())
-        norm_factor = np.sqrt(total_prob)
+        norm_factor = np.sqrt(np.sum(np.abs(self.vector) ** 2))
         
         if norm_factor > 1e-10:  # Avoid division by zero
-            self.amplitudes = {
-                dim: amp / norm_factor
-                for dim, amp in self.amplitudes.items()
-            }
+            self.vector = self.vector / norm_factor
+        self.touch()
     
     def set_emotion(self, emotion: str, magnitude: float, phase: float = 0.0):
         """
@@ -94,12 +167,13 @@ class QuantumEmotionalState:
         self.amplitudes[emotion] = magnitude * np.exp(1j * phase)
         self.normalize()
     
+    def probability_vector(self) -> np.ndarray:
+        """|α|² w kolejności DIMENSIONS"""
+        return np.abs(self.vector) ** 2
+
     def get_probabilities(self) -> Dict[str, float]:
         """Zwróć rozkład prawdopodobieństwa"""
-        return {
-            dim: abs(amp)**2
-            for dim, amp in self.amplitudes.items()
-        }
+        return dict(zip(self.DIMENSIONS, self.probability_vector().tolist()))
     
     def measure(self) -> str:
         """
@@ -108,12 +182,11 @@ class QuantumEmotionalState:
         Returns:
             Wybrana emocja (probabilistycznie)
         """
-        probs = self.get_probabilities()
-        emotions = list(probs.keys())
-        probabilities = list(probs.values())
-        
-        # Probabilistic choice
-        chosen = np.random.choice(emotions, p=probabilities)
+        # Probabilistic choice — ta sama CDF i ten sam strumień np.random co
+        # np.random.choice(DIMENSIONS, p=...), bez budowania dict/list co pomiar
+        if self._measurement is None:
+            self._measurement = MeasurementSampler(self, rng=np.random)
+        chosen = self._measurement.sample_one()
         
         # KOLAPS: po pomiarze stan się zmienia
         # (opcjonalnie - możesz to wyłączyć dla non-destructive measurement)
@@ -123,10 +196,13 @@ class QuantumEmotionalState:
     
     def collapse_to(self, emotion: str):
         """Kolaps funkcji falowej do jednej emocji"""
-        self.amplitudes = {
-            dim: 1.0 if dim == emotion else 0.0
-            for dim in self.DIMENSIONS
-        }
+        self.vector = np.zeros(len(self.DIMENSIONS), dtype=np.complex128)
+        self.vector[self.INDEX[emotion]] = 1.0
+        self.touch()
+
+    def sampler(self, seed=None) -> 'MeasurementSampler':
+        """Nowy sampler pomiarów z własnym np.random.Generator (seed lub Generator)."""
+        return MeasurementSampler(self, rng=np.random.default_rng(seed))
     
     def dominant_emotion(self) -> Tuple[str, float]:
         """Najsilniejsza emocja (bez kolapsu)"""
@@ -143,15 +219,64 @@ class QuantumEmotionalState:
         High entropy = confused/uncertain
         Low entropy = clear emotional state
         """
-        probs = self.get_probabilities()
+        probs = self.probability_vector()
         # Avoid log(0)
-        entropy = -sum(
-            p * np.log2(p) if p > 1e-10 else 0
-            for p in probs.values()
-        )
-        return entropy
+        probs = probs[probs > 1e-10]
+        return float(-np.sum(probs * np.log2(probs)))
     
     def __repr__(self):
         probs = self.get_probabilities()
         top_3 = sorted(probs.items(), key=lambda x: x[1], reverse=True)[:3]
-        return f"Emotional State: {', '.join(f'{e}={p:.2%}' for e, p in top_3)}"
\ No newline at end of file
+        return f"Emotional State: {', '.join(f'{e}={p:.2%}' for e, p in top_3)}"
+
+
+class MeasurementSampler:
+    """
+    Pomiary bez kolapsu z rozkładu |α|² stanu.
+
+    CDF liczona raz na wersję stanu (state.version) — kolejne pomiary to
+    searchsorted na gotowej tablicy; sample(n) losuje n emocji naraz.
+    rng: np.random.Generator (sampler(seed)) albo moduł np.random (measure()).
+    """
+
+    def __init__(self, state: QuantumEmotionalState, rng=None):
+        self.state = state
+        self.rng = np.random.default_rng() if rng is None else rng
+        self._version = -1
+        self._cdf = np.zeros(0)
+
+    def cdf(self) -> np.ndarray:
+        """Skumulowany rozkład w kolejności DIMENSIONS (ostatni element = 1)."""
+        if self._version != self.state.version:
+            # Jak np.random.choice: cumsum, potem dzielenie przez sumę
+            cdf = self.state.probability_vector().cumsum()
+            total = cdf[-1] if cdf.size else 0.0
+            if not (np.isfinite(total) and total > 0):
+                raise ValueError("Pomiar niemożliwy: prawdopodobieństwa stanu sumują się do "
+                                 f"{total} (stan zerowy lub nieskończony)")
+            cdf /= total
+            self._cdf = cdf
+            self._version = self.state.version
+        return self._cdf
+
+    def _uniform(self, size=None):
+        if isinstance(self.rng, np.random.Generator):
+            return self.rng.random(size)
+        return self.rng.random_sample(size)
+
+    def sample_indices(self, n: int) -> np.ndarray:
+        """n indeksów wymiarów (DIMENSIONS) jednym losowaniem."""
+        return self.cdf().searchsorted(self._uniform(n), side='right')
+
+    def sample(self, n: int = 1) -> List[str]:
+        """n zmierzonych emocji."""
+        dims = self.state.DIMENSIONS
+        return [dims[i] for i in self.sample_indices(n).tolist()]
+
+    def sample_one(self) -> str:
+        return self.state.DIMENSIONS[int(self.cdf().searchsorted(self._uniform(), side='right'))]
+
+    def counts(self, n: int) -> Dict[str, int]:
+        """Histogram n pomiarów: emocja → liczba trafień."""
+        hits = np.bincount(self.sample_indices(n), minlength=len(self.state.DIMENSIONS))
+        return dict(zip(self.state.DIMENSIONS, hits.tolist()))
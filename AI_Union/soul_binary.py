@@ -0,0 +1,577 @@
+# -*- coding: utf-8 -*-
+"""
+soul_binary.py v1.0.0
+Binarny format .soul: tabela rekordów stałej szerokości + sterta napisów.
+
+Układ pliku:
+  b'SOULBIN1' | uint32 długość nagłówka | nagłówek JSON | tabela | sterta
+  - nagłówek: count, dim, types (kody typów), offsety, meta (stats, wal_seq)
+  - tabela (np.memmap, record_dtype()): wektor float64[dim], weight, time,
+    depth, type, arrows, words, parent (wiersz rodzica), flags,
+    (offset, długość) w stercie dla: id, tresc, extra
+  - sterta: UTF-8; extra = JSON pozostałych pól (resonance, nietypowe klucze)
+
+Wektory czytane bez kopiowania (memmap), treść dekodowana dopiero przy
+dostępie do rekordu (LazyRecord) — np. gdy wspomnienie wygra recall.
+children_ids nie są zapisywane — odtwarza je kolumna parent.
+
+Konwersja: python soul_binary.py <źródło> <cel>  (kierunek wg magic bytes)
+"""
+
+import json
+import os
+import struct
+import sys
+import numpy as np
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from union_config import DIMENSION
+except ImportError:
+    DIMENSION = 15
+
+MAGIC = b'SOULBIN1'
+FORMAT_VERSION = 1
+_ALIGN = 64
+_NONE = 0xFFFFFFFF            # długość "brak pola" w stercie
+
+FLAG_NO_WEIGHT = 1
+FLAG_NO_TIME = 2
+FLAG_OVERRIDE = 4             # extra nadpisuje pola tabeli (wektor/fractal) — czytane od razu
+FLAG_RESONANCE = 8            # extra zawiera klucz 'resonance'
+_ABSENT = '__absent__'        # klucz extra: lista pól, których rekord nie miał
+_FRACTAL = '__fractal__'      # klucz extra: dodatkowe pola słownika fractal (np. abstraction_hash)
+
+# Pola trzymane w tabeli (lub odtwarzane z niej) — reszta rekordu idzie do extra
+_TABLE_KEYS = ('id', 'tresc', 'wektor_C_Def', 'weight', 'time', '_type', 'fractal')
+
+
+def record_dtype(dim: int = DIMENSION) -> np.dtype:
+    return np.dtype([
+        ('vector', '<f8', (dim,)),
+        ('weight', '<f8'),
+        ('time', '<f8'),
+        ('depth', '<i2'),
+        ('type', '<i2'),
+        ('arrows', '<i2'),
+        ('flags', '<u2'),
+        ('words', '<i4'),
+        ('parent', '<i4'),
+        ('id_off', '<u8'), ('id_len', '<u4'),
+        ('text_off', '<u8'), ('text_len', '<u4'),
+        ('extra_off', '<u8'), ('extra_len', '<u4'),
+    ])
+
+
+def is_binary_soul(path: str) -> bool:
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _aligned(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ODCZYT
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class BinarySoul:
+    """Plik SOULBIN otwarty przez np.memmap (tylko do odczytu)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path}: to nie jest plik SOULBIN")
+            (header_len,) = struct.unpack('<I', f.read(4))
+            header = json.loads(f.read(header_len).decode('utf-8'))
+        self.count: int = header['count']
+        self.dim: int = header['dim']
+        self.types: List[str] = header['types']
+        self.meta: dict = header.get('meta', {})
+        dtype = record_dtype(self.dim)
+        if self.count:
+            self.table = np.memmap(path, dtype=dtype, mode='r',
+                                   offset=header['table_offset'], shape=(self.count,))
+        else:
+            self.table = np.zeros(0, dtype=dtype)
+        if header['heap_size']:
+            self.heap = np.memmap(path, dtype=np.uint8, mode='r',
+                                  offset=header['heap_offset'], shape=(header['heap_size'],))
+        else:
+            self.heap = np.zeros(0, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return self.count
+
+    # Kolumny — widoki memmap, bez kopiowania
+    @property
+    def vectors(self) -> np.ndarray:
+        return self.table['vector']
+
+    def _str(self, off: int, length: int) -> Optional[str]:
+        if length == _NONE:
+            return None
+        return self.heap[off:off + length].tobytes().decode('utf-8')
+
+    def id(self, row: int) -> str:
+        rec = self.table[row]
+        return self._str(int(rec['id_off']), int(rec['id_len']))
+
+    def ids(self) -> List[str]:
+        offs = self.table['id_off'].tolist()
+        lens = self.table['id_len'].tolist()
+        heap = self.heap
+        return [heap[o:o + n].tobytes().decode('utf-8') for o, n in zip(offs, lens)]
+
+    def text(self, row: int) -> Optional[str]:
+        rec = self.table[row]
+        return self._str(int(rec['text_off']), int(rec['text_len']))
+
+    def vector(self, row: int) -> List[float]:
+        return self.table['vector'][row].tolist()
+
+    def extra(self, row: int) -> dict:
+        rec = self.table[row]
+        raw = self._str(int(rec['extra_off']), int(rec['extra_len']))
+        return json.loads(raw) if raw else {}
+
+    @staticmethod
+    def apply_extra(target, extra: dict, keep_existing: bool = False):
+        """
+        Nakłada extra na rekord: pola, dodatkowe klucze fractal, usunięcia.
+        keep_existing=True — nie nadpisuje pól już obecnych w rekordzie.
+        """
+        absent = extra.pop(_ABSENT, ())
+        fractal_extra = extra.pop(_FRACTAL, None)
+        for key, value in extra.items():
+            if not (keep_existing and key in target):
+                target[key] = value
+        fractal = target.get('fractal')
+        if fractal_extra and isinstance(fractal, dict):
+            for key, value in fractal_extra.items():
+                fractal.setdefault(key, value)
+        if not keep_existing:
+            for key in absent:
+                target.pop(key, None)
+
+    def type_name(self, code: int) -> Optional[str]:
+        return self.types[code] if code >= 0 else None
+
+    def children(self, ids: Optional[List[str]] = None) -> Dict[int, List[str]]:
+        """wiersz rodzica → children_ids (kolejność wierszy = kolejność zapisu)."""
+        ids = ids if ids is not None else self.ids()
+        parents = self.table['parent']
+        rows = np.nonzero(parents >= 0)[0]
+        out: Dict[int, List[str]] = {}
+        for row, parent in zip(rows.tolist(), parents[rows].tolist()):
+            out.setdefault(parent, []).append(ids[row])
+        return out
+
+    def eager_fields(self, row: int, ids: List[str], children: Dict[int, List[str]]) -> dict:
+        """Pola tabeli bez treści, wektora i extra (tanie, bez dekodowania sterty)."""
+        rec = self.table[row]
+        return self._eager(row, ids, children, int(rec['flags']), float(rec['weight']),
+                           float(rec['time']), int(rec['type']), int(rec['depth']), int(rec['parent']))
+
+    def eager_records(self, ids: List[str], children: Dict[int, List[str]]) -> Iterator[Tuple[int, dict]]:
+        """(flags, eager_fields) dla wszystkich wierszy — kolumny czytane hurtowo."""
+        t = self.table
+        columns = zip(t['flags'].tolist(), t['weight'].tolist(), t['time'].tolist(),
+                      t['type'].tolist(), t['depth'].tolist(), t['parent'].tolist())
+        for row, cols in enumerate(columns):
+            yield cols[0], self._eager(row, ids, children, *cols)
+
+    def _eager(self, row, ids, children, flags, weight, rec_time, rec_type, depth, parent) -> dict:
+        out = {'id': ids[row]}
+        if not flags & FLAG_NO_WEIGHT:
+            out['weight'] = weight
+        if not flags & FLAG_NO_TIME:
+            out['time'] = rec_time
+        if rec_type >= 0:
+            out['_type'] = self.types[rec_type]
+        out['fractal'] = {
+            'depth': depth,
+            'parent_id': ids[parent] if parent >= 0 else None,
+            'children_ids': list(children.get(row, ())),
+        }
+        return out
+
+    def record(self, row: int, ids: Optional[List[str]] = None,
+               children: Optional[Dict[int, List[str]]] = None) -> dict:
+        """Pełny rekord jako zwykły dict (konwerter, SoulIO)."""
+        ids = ids if ids is not None else self.ids()
+        children = children if children is not None else self.children(ids)
+        out = self.eager_fields(row, ids, children)
+        text = self.text(row)
+        if text is not None:
+            out['tresc'] = text
+        out['wektor_C_Def'] = self.vector(row)
+        self.apply_extra(out, self.extra(row))
+        return out
+
+    def records(self) -> Iterator[Tuple[str, dict]]:
+        ids = self.ids()
+        children = self.children(ids)
+        for row in range(self.count):
+            yield ids[row], self.record(row, ids, children)
+
+
+class LazyRecord(dict):
+    """
+    Rekord D_Map z pliku SOULBIN. Od razu: id, weight, time, _type, fractal.
+    Przy pierwszym dostępie: tresc, wektor_C_Def, pola extra (resonance, ...).
+    Iteracja / items() / json.dumps materializują wszystko.
+    """
+    __slots__ = ('_soul', '_row', '_pending')
+
+    _TEXT, _VECTOR, _EXTRA = 'tresc', 'wektor_C_Def', None
+
+    def __init__(self, soul: BinarySoul, row: int, eager: dict, flags: Optional[int] = None):
+        super().__init__(eager)
+        self._soul = soul
+        self._row = row
+        self._pending = {self._TEXT, self._VECTOR, self._EXTRA}
+        if flags is None:
+            flags = int(soul.table['flags'][row])
+        if flags & FLAG_OVERRIDE:
+            self._load_group(self._EXTRA, override=True)
+
+    def _group(self, key):
+        return key if key in (self._TEXT, self._VECTOR) else self._EXTRA
+
+    def _decode(self, group) -> dict:
+        if group == self._TEXT:
+            text = self._soul.text(self._row)
+            return {} if text is None else {self._TEXT: text}
+        if group == self._VECTOR:
+            return {self._VECTOR: self._soul.vector(self._row)}
+        return self._soul.extra(self._row)
+
+    def _load_group(self, group, override: bool = False):
+        if group not in self._pending:
+            return
+        self._pending.discard(group)
+        decoded = self._decode(group)
+        if override:
+            # Pola nadpisane/usunięte przez extra nie są już leniwe
+            for key in list(decoded) + list(decoded.get(_ABSENT, ())):
+                if key in (self._TEXT, self._VECTOR):
+                    self._pending.discard(key)
+        # Klucz ustawiony przez wołającego przed załadowaniem ma pierwszeństwo
+        BinarySoul.apply_extra(_DictView(self), decoded, keep_existing=not override)
+
+    def materialize(self) -> 'LazyRecord':
+        for group in list(self._pending):
+            self._load_group(group)
+        return self
+
+    def peek(self) -> dict:
+        """Wszystkie pola jako zwykły dict BEZ zapamiętywania w rekordzie (kompakcja)."""
+        out = dict(dict.items(self))
+        if isinstance(out.get('fractal'), dict):
+            out['fractal'] = dict(out['fractal'])
+        for group in self._pending:
+            BinarySoul.apply_extra(out, self._decode(group), keep_existing=True)
+        return out
+
+    def peek_text(self) -> str:
+        if self._TEXT in self._pending:
+            return self._soul.text(self._row) or ''
+        return dict.get(self, self._TEXT, '') or ''
+
+    # ── dostęp punktowy: ładuje tylko grupę klucza ──
+    def __missing__(self, key):
+        group = self._group(key)
+        if group in self._pending:
+            self._load_group(group)
+            if dict.__contains__(self, key):
+                return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        if dict.__contains__(self, key):
+            return True
+        self._load_group(self._group(key))
+        return dict.__contains__(self, key)
+
+    def setdefault(self, key, default=None):
+        self._load_group(self._group(key))
+        return dict.setdefault(self, key, default)
+
+    def pop(self, key, *default):
+        self._load_group(self._group(key))
+        return dict.pop(self, key, *default)
+
+    def __delitem__(self, key):
+        self._load_group(self._group(key))
+        dict.__delitem__(self, key)
+
+    # ── dostęp całościowy: materializacja ──
+    def __iter__(self):
+        return dict.__iter__(self.materialize())
+
+    def __len__(self):
+        return dict.__len__(self.materialize())
+
+    def keys(self):
+        return dict.keys(self.materialize())
+
+    def values(self):
+        return dict.values(self.materialize())
+
+    def items(self):
+        return dict.items(self.materialize())
+
+    def copy(self) -> dict:
+        return dict(self.items())
+
+    def __eq__(self, other):
+        return dict.__eq__(self.materialize(), other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return dict.__repr__(self.materialize())
+
+    def __reduce__(self):
+        # copy/deepcopy/pickle → zwykły dict
+        return (dict, (dict(self.items()),))
+
+
+class _DictView:
+    """Dostęp do surowego dict z pominięciem leniwych metod LazyRecord."""
+    __slots__ = ('_d',)
+
+    def __init__(self, d: dict):
+        self._d = d
+
+    def __contains__(self, key):
+        return dict.__contains__(self._d, key)
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self._d, key, value)
+
+    def get(self, key, default=None):
+        return dict.get(self._d, key, default)
+
+    def pop(self, key, default=None):
+        return dict.pop(self._d, key, default)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ZAPIS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def plain_record(record: dict) -> dict:
+    """Rekord do serializacji — LazyRecord bez zapamiętywania zdekodowanych pól."""
+    return record.peek() if isinstance(record, LazyRecord) else record
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def write_soul_binary(items: Iterable[Tuple[str, dict]], path: str,
+                      meta: Optional[dict] = None, dim: int = DIMENSION):
+    """Zapisuje (mem_id, rekord) do pliku SOULBIN (wołający dba o tmp + replace)."""
+    items = list(items)
+    n = len(items)
+    table = np.zeros(n, dtype=record_dtype(dim))
+    row_of = {mem_id: row for row, (mem_id, _) in enumerate(items)}
+    types: Dict[str, int] = {}
+    heap = bytearray()
+
+    def put(data: Optional[str]) -> Tuple[int, int]:
+        if data is None:
+            return 0, _NONE
+        raw = data.encode('utf-8')
+        off = len(heap)
+        heap.extend(raw)
+        return off, len(raw)
+
+    # children_ids odtwarzane z kolumny parent — porównujemy z zapisanymi
+    derived: Dict[str, List[str]] = {}
+    records = []
+    for mem_id, record in items:
+        fields = plain_record(record)
+        records.append(fields)
+        parent = (fields.get('fractal') or {}).get('parent_id')
+        if parent in row_of:
+            derived.setdefault(parent, []).append(mem_id)
+
+    for row, ((mem_id, _), fields) in enumerate(zip(items, records)):
+        rec = table[row]
+        flags = 0
+        extra = {k: v for k, v in fields.items() if k not in _TABLE_KEYS}
+        absent = []
+
+        # Wszystko, czego tabela nie odda 1:1, trafia do extra (FLAG_OVERRIDE)
+        vec = fields.get('wektor_C_Def')
+        if (isinstance(vec, (list, tuple)) and len(vec) == dim
+                and all(_is_number(x) for x in vec)):
+            rec['vector'] = vec
+        else:
+            flags |= FLAG_OVERRIDE
+            if 'wektor_C_Def' in fields:
+                extra['wektor_C_Def'] = vec
+            else:
+                absent.append('wektor_C_Def')
+
+        weight = fields.get('weight')
+        if _is_number(weight):
+            rec['weight'] = weight
+        else:
+            flags |= FLAG_NO_WEIGHT
+            if 'weight' in fields:
+                extra['weight'] = weight
+        rec_time = fields.get('time')
+        if _is_number(rec_time):
+            rec['time'] = rec_time
+        else:
+            flags |= FLAG_NO_TIME
+            if 'time' in fields:
+                extra['time'] = rec_time
+        rec_type = fields.get('_type')
+        if isinstance(rec_type, str):
+            rec['type'] = types.setdefault(rec_type, len(types))
+        else:
+            rec['type'] = -1
+            if '_type' in fields:
+                extra['_type'] = rec_type
+
+        fractal = fields.get('fractal')
+        if not isinstance(fractal, dict):
+            fractal = {}
+        parent = fractal.get('parent_id')
+        depth = fractal.get('depth', 1)
+        rec['depth'] = depth if isinstance(depth, int) and not isinstance(depth, bool) else 1
+        rec['parent'] = row_of.get(parent, -1) if isinstance(parent, str) else -1
+        standard = ({'depth', 'parent_id', 'children_ids'} <= set(fractal)
+                    and rec['depth'] == depth
+                    and (parent is None or rec['parent'] >= 0)
+                    and fractal['children_ids'] == derived.get(mem_id, []))
+        if 'fractal' not in fields:
+            absent.append('fractal')
+            flags |= FLAG_OVERRIDE
+        elif not standard:
+            extra['fractal'] = fields['fractal']
+            flags |= FLAG_OVERRIDE
+        else:
+            fractal_extra = {k: v for k, v in fractal.items()
+                             if k not in ('depth', 'parent_id', 'children_ids')}
+            if fractal_extra:
+                extra[_FRACTAL] = fractal_extra
+
+        content = fields.get('tresc')
+        if isinstance(content, str):
+            rec['arrows'] = content.count('→')
+            rec['words'] = len(content.split())
+            rec['text_off'], rec['text_len'] = put(content)
+        else:
+            rec['text_off'], rec['text_len'] = put(None)
+            if content is not None:
+                extra['tresc'] = content
+                flags |= FLAG_OVERRIDE
+
+        rec['id_off'], rec['id_len'] = put(mem_id)
+        if fields.get('id') != mem_id:
+            flags |= FLAG_OVERRIDE
+            if 'id' in fields:
+                extra['id'] = fields['id']
+            else:
+                absent.append('id')
+
+        if 'resonance' in extra:
+            flags |= FLAG_RESONANCE
+        if absent:
+            extra[_ABSENT] = absent
+        rec['extra_off'], rec['extra_len'] = put(json.dumps(extra, ensure_ascii=False) if extra else None)
+        rec['flags'] = flags
+
+    header = {
+        'version': FORMAT_VERSION, 'count': n, 'dim': dim,
+        'types': [t for t, _ in sorted(types.items(), key=lambda kv: kv[1])],
+        'meta': meta or {},
+    }
+    # Offsety zależą od długości nagłówka — dwa przebiegi wystarczą
+    header.update(table_offset=0, heap_offset=0, heap_size=len(heap))
+    for _ in range(2):
+        header_raw = json.dumps(header, ensure_ascii=False).encode('utf-8')
+        table_offset = _aligned(len(MAGIC) + 4 + len(header_raw))
+        heap_offset = _aligned(table_offset + table.nbytes)
+        header.update(table_offset=table_offset, heap_offset=heap_offset)
+    header_raw = json.dumps(header, ensure_ascii=False).encode('utf-8')
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header_raw)))
+        f.write(header_raw)
+        f.write(b'\0' * (table_offset - f.tell()))
+        f.write(table.tobytes())
+        f.write(b'\0' * (heap_offset - f.tell()))
+        f.write(heap)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# KONWERSJA JSONL ↔ SOULBIN
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _read_jsonl(path: str) -> Tuple[List[Tuple[str, dict]], dict]:
+    items, meta = [], {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_num, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get('_type') == '@META':
+                meta = {k: v for k, v in record.items() if k != '_type'}
+                continue
+            items.append((record.get('id', f"Mem_{line_num:05d}"), record))
+    return items, meta
+
+
+def jsonl_to_binary(src: str, dst: str) -> int:
+    items, meta = _read_jsonl(src)
+    write_soul_binary(items, dst, meta=meta)
+    return len(items)
+
+
+def binary_to_jsonl(src: str, dst: str) -> int:
+    soul = BinarySoul(src)
+    with open(dst, 'w', encoding='utf-8') as f:
+        meta = dict(soul.meta)
+        meta['_type'] = '@META'
+        f.write(json.dumps(meta, ensure_ascii=False) + "\n")
+        for _, record in soul.records():
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return len(soul)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Użycie: python soul_binary.py <źródło> <cel>")
+        sys.exit(1)
+    src, dst = sys.argv[1], sys.argv[2]
+    if is_binary_soul(src):
+        count = binary_to_jsonl(src, dst)
+        print(f"SOULBIN → JSONL: {count} rekordów → {dst}")
+    else:
+        count = jsonl_to_binary(src, dst)
+        print(f"JSONL → SOULBIN: {count} rekordów → {dst}")
@@ -1,13 +1,29 @@
 # -*- coding: utf-8 -*-
 """
-soul_io.py v8.1.0-Safe
+soul_io.py v8.4.1
 FIX: Dodano automatyczny backup przed zapisem i walidację.
+v8.2.0: load_stream() nakłada operacje z dziennika WAL (<soul>.wal, FractalMemory);
+        save_stream() zapisuje w META wal_seq — snapshot zastępuje cały dziennik.
+        load_stream() czyta też binarny .soul (SOULBIN, soul_binary.py).
+v8.3.0: SOUL_FORMAT = 'zstd' → save_stream() zapisuje skompresowany SOULZST
+        (soul_zstd.py, ramki po SOUL_ZSTD_BLOCK rekordów); load_stream() go czyta.
+v8.4.0: blokady soul_lock — load_stream() pod blokadą odczytu, save_stream()
+        pod wyłączną (inny proces nie zrotuje WAL / nie podmieni pliku w trakcie);
+        plik blokady wg realpath, więc różne ścieżki z listy kandydatów się nie mijają.
+v8.4.1: BUGFIX: save_stream() zapisuje w META wal_seq ostatniej operacji WAL nałożonej
+        przez load_stream() (self.wal_seq), a nie najwyższy seq na dysku — operacje
+        dopisane później przez inne procesy nie są w zapisywanych danych i zostają
+        do odtworzenia z WAL przy następnym wczytaniu.
 """
 import json
 import os
 import time
 import shutil  # Dodano do obsługi kopii zapasowych
 from union_config import UnionConfig as Config, Colors
+from soul_wal import SoulWAL, apply_entry
+from soul_binary import BinarySoul, is_binary_soul
+from soul_zstd import ZstdSoul, is_zstd_soul, write_soul_zstd
+from soul_lock import SoulLock
 
 class SoulIO:
     def __init__(self):
@@ -21,6 +37,9 @@ class SoulIO:
             '../eriamo.soul'
         ]
         
+        # Ostatnia operacja WAL nałożona przez load_stream() — snapshot obejmuje do niej
+        self.wal_seq = 0
+
         # Znajdź pierwszy istniejący plik
         self.filepath = default_path
         for path in possible_paths:
@@ -38,37 +57,69 @@ class SoulIO:
                 print(f"{Colors.RED}[SoulIO] Błąd tworzenia katalogu: {e}{Colors.RESET}")
 
     def load_stream(self):
+        # Snapshot i segmenty WAL nie zmienią się w trakcie (dopisywanie — tak, do przekroju)
+        with SoulLock(self.filepath).reading():
+            return self._load_stream()
+
+    def _load_stream(self):
         loaded_data = {}
-        if not os.path.exists(self.filepath):
+        wal = SoulWAL(self.filepath)
+        if not os.path.exists(self.filepath) and not wal.segments():
             print(f"{Colors.YELLOW}[SoulIO] Brak pliku pamięci. Tabula Rasa.{Colors.RESET}")
             return loaded_data
             
         count = 0
+        wal_seq = 0
         try:
-            with open(self.filepath, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if not line: continue
-                    try:
-                        data = json.loads(line)
-                        # ✅ FIX: Pomiń TYLKO linie META
-                        if data.get('_type') == '@META':
+            if is_binary_soul(self.filepath):
+                soul = BinarySoul(self.filepath)
+                wal_seq = soul.meta.get('wal_seq', 0)
+                loaded_data.update(soul.records())
+            elif is_zstd_soul(self.filepath):
+                soul = ZstdSoul(self.filepath)
+                wal_seq = soul.meta.get('wal_seq', 0)
+                loaded_data.update(soul.records())
+            elif os.path.exists(self.filepath):  # brak pliku = sam WAL
+                with open(self.filepath, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line: continue
+                        try:
+                            data = json.loads(line)
+                            # ✅ FIX: Pomiń TYLKO linie META
+                            if data.get('_type') == '@META':
+                                wal_seq = data.get('wal_seq', 0)
+                                continue
+
+                            # Generuj ID jeśli nie ma
+                            rec_id = data.get('id', f"Mem_{count}_{int(time.time())}")
+                            loaded_data[rec_id] = data
+                            count += 1
+                        except json.JSONDecodeError:
+                            # Ignorujemy uszkodzone linie, by nie wywalić całego ładowania
                             continue
-                        
-                        # Generuj ID jeśli nie ma
-                        rec_id = data.get('id', f"Mem_{count}_{int(time.time())}")
-                        loaded_data[rec_id] = data
-                        count += 1
-                    except json.JSONDecodeError:
-                        # Ignorujemy uszkodzone linie, by nie wywalić całego ładowania
-                        continue
-            print(f"{Colors.GREEN}[SoulIO] Wczytano {count} wspomnień.{Colors.RESET}")
+        except Exception as e:
+            print(f"{Colors.RED}[SoulIO] Krytyczny błąd odczytu: {e}{Colors.RESET}")
+
+        try:
+            # Operacje dopisane po snapshocie (FractalMemory.save → WAL)
+            with wal:
+                for entry in wal.replay(after_seq=wal_seq):
+                    apply_entry(loaded_data, entry)
+                    wal_seq = max(wal_seq, entry.get('seq', 0))
+            self.wal_seq = wal_seq
+            print(f"{Colors.GREEN}[SoulIO] Wczytano {len(loaded_data)} wspomnień.{Colors.RESET}")
         except Exception as e:
             print(f"{Colors.RED}[SoulIO] Krytyczny błąd odczytu: {e}{Colors.RESET}")
             
         return loaded_data
 
     def save_stream(self, data_to_save):
+        # Pełne przepisanie pliku — wyłącznie jeden proces, czytelnicy czekają
+        with SoulLock(self.filepath).rewriting():
+            self._save_stream(data_to_save)
+
+    def _save_stream(self, data_to_save):
         self._ensure_directory()
         
         # --- FIX: BACKUP DANYCH ---
@@ -82,8 +133,15 @@ class SoulIO:
         try:
             # Zapisz najpierw do pliku tymczasowego, żeby nie uszkodzić głównego przy crashu
             temp_path = self.filepath + ".tmp"
+            if getattr(Config, 'SOUL_FORMAT', 'jsonl') == 'zstd':
+                meta = {"timestamp": time.time(), "count": len(data_to_save),
+                        "wal_seq": self.wal_seq}
+                write_soul_zstd(list(data_to_save.items()), temp_path, meta=meta)
+                os.replace(temp_path, self.filepath)
+                return
             with open(temp_path, 'w', encoding='utf-8') as f:
-                meta = {"_type": "@META", "timestamp": time.time(), "count": len(data_to_save)}
+                meta = {"_type": "@META", "timestamp": time.time(), "count": len(data_to_save),
+                        "wal_seq": self.wal_seq}
                 f.write(json.dumps(meta, ensure_ascii=False) + "\n")
                 
                 for key, val in data_to_save.items():
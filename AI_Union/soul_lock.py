@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+soul_lock.py v1.0.0
+Blokady doradcze (flock) pliku .soul współdzielonego przez kilka procesów
+(main.py, main_gui.py, skrypty importu — każdy z własnym FractalMemory/SoulIO).
+
+Dwie blokady na duszę, obie w plikach obok niej (ścieżka przez realpath —
+ten sam plik osiągnięty różnymi ścieżkami to ta sama blokada):
+
+  <soul>.lock      UKŁAD plików: snapshot .soul + segmenty WAL
+                   shared    — odczyt (load): snapshot i segmenty nie znikną
+                   exclusive — kompakcja / pełne przepisanie (jeden naraz)
+  <soul>.wal.lock  DOPISYWANIE do WAL — trzymana tylko na czas jednej linii;
+                   pod nią piszący doczytuje cudze wpisy i nadaje kolejny seq.
+                   Plik blokady trzyma licznik generacji (8 bajtów): ostatni
+                   seq nadany przez którykolwiek proces — seq jest unikalny
+                   nawet gdy proces nie widział segmentu zrotowanego w międzyczasie
+
+Czytelnik nie blokuje dopisywania: WAL jest append-only, a długość segmentu
+zmierzona pod blokadą dopisywania wyznacza spójny przekrój (mmap do tej długości).
+Wątek interakcji bierze wyłącznie blokadę dopisywania (mikrosekundy) —
+blokada układu trzymana jest tylko przy starcie i w kompakcji (w tle / przy zamknięciu).
+
+Bez fcntl (Windows) blokady są puste — jeden proces na duszę, jak dotąd.
+Porządek: układ → FractalMemory._lock → SoulWAL._lock → dopisywanie.
+"""
+
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+    LOCKING_AVAILABLE = True
+except ImportError:
+    fcntl = None
+    LOCKING_AVAILABLE = False
+
+
+class FileLock:
+    """flock na pliku blokady; każde wejście na własnym deskryptorze (wątki też się wykluczają)."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @contextmanager
+    def hold(self, shared: bool = False):
+        """Trzyma blokadę; zwraca deskryptor pliku blokady (None bez fcntl)."""
+        if not LOCKING_AVAILABLE:
+            yield None
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            yield fd
+        finally:
+            os.close(fd)  # zamknięcie deskryptora zwalnia flock
+
+
+class SoulLock:
+    """Blokady układu i dopisywania jednego pliku .soul."""
+
+    def __init__(self, soul_file: str):
+        base = os.path.realpath(soul_file)
+        self.layout = FileLock(base + ".lock")
+        self.append = FileLock(base + ".wal.lock")
+
+    def reading(self):
+        """Wczytanie snapshotu + WAL: żaden proces nie rotuje ani nie podmienia plików."""
+        return self.layout.hold(shared=True)
+
+    def rewriting(self):
+        """Kompakcja / pełne przepisanie .soul — wyłącznie jeden proces."""
+        return self.layout.hold()
+
+    def appending(self):
+        """Jedna operacja w WAL (doczytanie cudzych wpisów + własna linia); deskryptor licznika."""
+        return self.append.hold()
+
+
+def read_generation(fd) -> int:
+    """Licznik generacji z pliku blokady dopisywania (0 gdy pusty / brak blokad)."""
+    if fd is None:
+        return 0
+    os.lseek(fd, 0, os.SEEK_SET)
+    raw = os.read(fd, 8)
+    return int.from_bytes(raw, 'little') if len(raw) == 8 else 0
+
+
+def write_generation(fd, generation: int):
+    if fd is not None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.write(fd, int(generation).to_bytes(8, 'little'))
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+soul_wal.py v1.1.1
+Dziennik zapisu z wyprzedzeniem (WAL) dla pliku .soul.
+
+Zamiast przepisywać cały .soul przy każdym /remember, /read i zamknięciu —
+każda operacja na D_Map to JEDNA dopisana linia JSON w <soul>.wal:
+  {"seq": 17, "op": "put", "id": "Mem_...", "rec": {...}}
+  {"seq": 18, "op": "del", "id": "Mem_..."}
+  {"seq": 19, "op": "clear"}
+
+- fsync wsadowo: co FSYNC_EVERY operacji albo co FSYNC_INTERVAL sekund
+  (plus flush() przy save()); każda linia trafia do OS od razu (f.flush)
+- load(): snapshot .soul (META.wal_seq = ostatnia operacja w nim zawarta)
+  + replay segmentów WAL z seq > wal_seq — replay jest idempotentny
+- kompakcja: rotate() przenosi bieżący WAL do <soul>.wal.1, wołający
+  zapisuje kanoniczny snapshot JSONL, potem discard_rotated()
+- urwana ostatnia linia (crash w trakcie zapisu) jest pomijana
+
+ZMIANY v1.1.1:
+- SoulWAL jako context manager (close() przy wyjściu); usunięto last_seq() —
+  SoulIO zapisuje seq ostatniej nałożonej operacji, a nie najwyższy na dysku
+
+ZMIANY v1.1.0:
+- Wiele procesów na jednej duszy (soul_lock.SoulLock): każda linia dopisywana
+  pod blokadą <soul>.wal.lock — najpierw doczytanie wpisów innych procesów,
+  potem własna linia z seq = licznik generacji z pliku blokady + 1.
+  Cudze operacje czekają w take_foreign()/poll() na nałożenie przez
+  FractalMemory (poza wątkiem interakcji)
+- stale: licznik wyprzedza przeczytane wpisy — segment z cudzymi operacjami
+  został zrotowany i skompaktowany, zanim ten proces go przeczytał (są już
+  w snapshocie); FractalMemory wczytuje wtedy duszę od nowa
+- Rotacja przez inny proces wykrywana po inode — dopisywanie przechodzi do
+  nowego segmentu, a reszta starego zostaje doczytana
+- replay(): przekrój segmentów mierzony pod blokadą dopisywania, czytany przez
+  mmap do zmierzonej długości — piszący może w tym czasie dopisywać
+"""
+
+import json
+import mmap
+import os
+import threading
+import time
+from typing import Iterator, List, Optional
+
+from soul_lock import SoulLock, read_generation, write_generation
+
+
+class SoulWAL:
+    """Append-only dziennik operacji put/del/clear na rekordach D_Map."""
+
+    FSYNC_EVERY = 64
+    FSYNC_INTERVAL = 1.0
+
+    def __init__(self, soul_file: str, fsync_every: Optional[int] = None,
+                 fsync_interval: Optional[float] = None):
+        self.path = soul_file + ".wal"
+        self.rotated_path = self.path + ".1"
+        self.fsync_every = fsync_every or self.FSYNC_EVERY
+        self.fsync_interval = self.FSYNC_INTERVAL if fsync_interval is None else fsync_interval
+        self.seq = 0
+        self._file = None
+        self._offset = 0            # bajty bieżącego segmentu już przeczytane / zapisane
+        self._foreign: List[dict] = []   # operacje innych procesów do nałożenia
+        self.stale = False          # przegapione cudze operacje — potrzebne pełne wczytanie
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+        self.lock = SoulLock(soul_file)
+
+    # ─────────────────────────────────────────────────────────────
+    # ZAPIS
+    # ─────────────────────────────────────────────────────────────
+
+    def _open(self):
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # ab+: zapis zawsze na koniec, odczyt cudzych wpisów tym samym deskryptorem
+            self._file = open(self.path, 'ab+')
+            self._offset = 0
+        return self._file
+
+    def _read_new(self, f):
+        """Wpisy dopisane za self._offset; nowsze niż self.seq → self._foreign."""
+        size = os.fstat(f.fileno()).st_size
+        if size <= self._offset:
+            return
+        f.seek(self._offset)
+        data = f.read(size - self._offset)
+        self._offset = size
+        for line in data.split(b"\n"):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # urwana linia po crashu
+            seq = entry.get('seq', 0)
+            if seq > self.seq:
+                self.seq = seq
+                self._foreign.append(entry)
+
+    def _rotated_away(self, f) -> bool:
+        """Deskryptor nie wskazuje już bieżącego segmentu (rotacja w innym procesie)."""
+        held = os.fstat(f.fileno())
+        if held.st_nlink == 0:
+            # Segment usunięty po kompakcji — jego numer inode mógł już dostać nowy plik
+            return True
+        try:
+            current = os.stat(self.path)
+        except FileNotFoundError:
+            return True
+        return (current.st_ino, current.st_dev) != (held.st_ino, held.st_dev)
+
+    def _catch_up(self, lock_fd) -> int:
+        """
+        Doczytuje wpisy innych procesów (wołający trzyma blokadę dopisywania).
+        Zwraca licznik generacji pliku.
+        """
+        f = self._file
+        if f is not None:
+            self._read_new(f)
+            if self._rotated_away(f):
+                # Inny proces zrotował dziennik — stary segment doczytany, dalej nowy
+                f.close()
+                self._file = None
+        if self._file is None and os.path.exists(self.path):
+            self._read_new(self._open())
+        generation = read_generation(lock_fd)
+        if generation > self.seq:
+            self.stale = True
+            self.seq = generation
+        return self.seq
+
+    def _append(self, entry: dict) -> int:
+        with self._lock, self.lock.appending() as lock_fd:
+            self.seq = self._catch_up(lock_fd) + 1
+            write_generation(lock_fd, self.seq)
+            entry['seq'] = self.seq
+            f = self._open()
+            line = json.dumps(entry, ensure_ascii=False).encode('utf-8') + b"\n"
+            size = os.fstat(f.fileno()).st_size
+            if size:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    # Urwana linia po crashu — nowy wpis zaczyna się od nowej linii
+                    line = b"\n" + line
+            f.write(line)
+            f.flush()
+            self._offset = size + len(line)
+            self._pending += 1
+            if (self._pending >= self.fsync_every
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync()
+            return self.seq
+
+    def _sync(self):
+        if self._file is not None and self._pending:
+            os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def put(self, mem_id: str, record: dict) -> int:
+        return self._append({'op': 'put', 'id': mem_id, 'rec': record})
+
+    def delete(self, mem_id: str) -> int:
+        return self._append({'op': 'del', 'id': mem_id})
+
+    def clear(self) -> int:
+        return self._append({'op': 'clear'})
+
+    def take_foreign(self) -> List[dict]:
+        """Operacje innych procesów zebrane przy dopisywaniu/rotacji (w kolejności seq)."""
+        entries, self._foreign = self._foreign, []
+        return entries
+
+    def poll(self) -> List[dict]:
+        """Doczytuje dziennik i zwraca operacje innych procesów od ostatniego odczytu."""
+        with self._lock:
+            with self.lock.appending() as lock_fd:
+                self._catch_up(lock_fd)
+            return self.take_foreign()
+
+    def flush(self):
+        """Wymusza fsync zaległych operacji (wołane przez save())."""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+            self._sync()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                self._sync()
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def size(self) -> int:
+        """Bajty w dzienniku (bieżący segment + segment w kompakcji)."""
+        total = 0
+        for path in (self.path, self.rotated_path):
+            if os.path.exists(path):
+                total += os.path.getsize(path)
+        return total
+
+    # ─────────────────────────────────────────────────────────────
+    # KOMPAKCJA
+    # ─────────────────────────────────────────────────────────────
+
+    def rotate(self) -> int:
+        """
+        Zamyka bieżący segment i dokleja go do <wal>.1 — od teraz nowe operacje
+        idą do świeżego pliku. Zwraca seq ostatniej operacji w segmencie .1
+        (snapshot robiony w tej chwili zawiera wszystkie operacje <= seq).
+        Wołający musi trzymać lock chroniący D_Map i blokadę układu
+        (lock.rewriting()); operacje innych procesów sprzed rotacji czekają
+        w take_foreign() — snapshot musi je objąć.
+        """
+        with self._lock, self.lock.appending() as lock_fd:
+            self._catch_up(lock_fd)
+            if self._file is not None:
+                self._file.flush()
+                self._sync()
+                self._file.close()
+                self._file = None
+            if os.path.exists(self.path):
+                if os.path.exists(self.rotated_path):
+                    # Poprzednia kompakcja nie doszła do końca — sklej segmenty
+                    with open(self.rotated_path, 'ab') as dst, open(self.path, 'rb') as src:
+                        dst.write(src.read())
+                        dst.flush()
+                        os.fsync(dst.fileno())
+                    os.remove(self.path)
+                else:
+                    os.replace(self.path, self.rotated_path)
+            return self.seq
+
+    def discard_rotated(self):
+        """Snapshot zapisany — segment .1 nie jest już potrzebny."""
+        if os.path.exists(self.rotated_path):
+            os.remove(self.rotated_path)
+
+    # ─────────────────────────────────────────────────────────────
+    # ODCZYT
+    # ─────────────────────────────────────────────────────────────
+
+    def segments(self) -> List[str]:
+        return [p for p in (self.rotated_path, self.path) if os.path.exists(p)]
+
+    def replay(self, after_seq: int = 0) -> Iterator[dict]:
+        """
+        Operacje z seq > after_seq w kolejności zapisu. Ustawia self.seq
+        na najwyższy widziany numer, żeby nowe wpisy kontynuowały numerację.
+
+        Przekrój: długości segmentów mierzone pod blokadą dopisywania, odczyt
+        (mmap) tylko do nich — inne procesy mogą w tym czasie dopisywać.
+        Wołający trzyma lock.reading() (segmenty nie są rotowane w trakcie).
+        """
+        self.seq = max(self.seq, after_seq)
+        with self._lock, self.lock.appending() as lock_fd:
+            generation = read_generation(lock_fd)
+            cut = []
+            if os.path.exists(self.rotated_path):
+                f = open(self.rotated_path, 'rb')
+                cut.append((f, os.fstat(f.fileno()).st_size, True))
+            if self._file is not None and self._rotated_away(self._file):
+                self._file.close()
+                self._file = None
+            if os.path.exists(self.path):
+                f = self._open()
+                cut.append((f, os.fstat(f.fileno()).st_size, False))
+                # Dalsze dopisywanie / doczytywanie zaczyna się za przekrojem
+                self._offset = cut[-1][1]
+        for f, size, close_after in cut:
+            try:
+                if not size:
+                    continue
+                with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+                    for line in iter(mm.readline, b""):
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            # Urwana linia po crashu
+                            continue
+                        seq = entry.get('seq', 0)
+                        self.seq = max(self.seq, seq)
+                        if seq > after_seq:
+                            yield entry
+            finally:
+                if close_after:
+                    f.close()
+        # Numeracja kontynuuje licznik pliku (wszystkie operacje do niego są w przekroju)
+        self.seq = max(self.seq, generation)
+        self.stale = False
+
+
+def apply_entry(d_map: dict, entry: dict):
+    """Nakłada jedną operację WAL na słownik rekordów."""
+    op = entry.get('op')
+    if op == 'put':
+        d_map[entry['id']] = entry['rec']
+    elif op == 'del':
+        d_map.pop(entry['id'], None)
+    elif op == 'clear':
+        d_map.clear()
@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+"""
+soul_zstd.py v1.0.1
+Skompresowany format .soul: niezależne ramki zstd po BLOCK rekordów JSONL.
+
+Układ pliku:
+  b'SOULZST1' | [słownik] | ramka 0 | ramka 1 | ... | indeks JSON | uint64 offset indeksu | b'SOULZST1'
+  - ramka: BLOCK linii JSON (te same rekordy co snapshot JSONL), skompresowana
+    osobno — każdą można odczytać po offsecie (frame()) bez reszty pliku
+  - słownik (opcjonalny, SOUL_ZSTD_DICT): trenowany na pierwszych DICT_SAMPLES
+    rekordach
+    (powtarzalne klucze wektor_C_Def, fractal, resonance, słowa tresc) — zapisany
+    w pliku, plik jest samowystarczalny. Opłaca się przy małych blokach i dużej
+    duszy; przy małej 32 KB słownika kosztuje więcej niż oszczędza
+  - indeks: codec, count, dict [offset, długość], frames [[offset, długość,
+    rekordy, bajty po dekompresji], ...], meta (stats, wal_seq, generation)
+
+Zapis strumieniowy: w pamięci jest tylko bieżący blok (ze słownikiem — także
+próbka do treningu). Odczyt: ramki
+dekompresowane równolegle w wątkach (zstd/zlib zwalniają GIL), rekordy
+oddawane w kolejności zapisu.
+
+Pakiet zstandard jest opcjonalny — bez niego zapis używa zlib (ten sam
+kontener, słownik jako zdict); plik zstd bez pakietu → ImportError przy odczycie.
+
+Konwersja: python soul_zstd.py <źródło> <cel>  (kierunek wg magic bytes;
+źródło może być JSONL, SOULBIN lub SOULZST)
+
+ZMIANY v1.0.1:
+- BUGFIX: write_soul_zstd() naprawdę strumieniuje — rekordy kodowane i
+  kompresowane blok po bloku zamiast list(items) całej duszy; słownik
+  trenowany na pierwszych DICT_SAMPLES rekordach (każdy kodowany raz)
+"""
+
+import json
+import os
+from itertools import chain, islice
+import struct
+import sys
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard as zstd
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstd = None
+    ZSTD_AVAILABLE = False
+
+try:
+    from union_config import UnionConfig
+    _LEVEL = getattr(UnionConfig, 'SOUL_ZSTD_LEVEL', 3)
+    _BLOCK = getattr(UnionConfig, 'SOUL_ZSTD_BLOCK', 1024)
+    _USE_DICT = getattr(UnionConfig, 'SOUL_ZSTD_DICT', False)
+    _WORKERS = getattr(UnionConfig, 'SOUL_ZSTD_WORKERS', 4)
+except ImportError:
+    _LEVEL = 3
+    _BLOCK = 1024
+    _USE_DICT = False
+    _WORKERS = 4
+
+MAGIC = b'SOULZST1'
+FORMAT_VERSION = 1
+_TRAILER = struct.Struct('<Q8s')     # offset indeksu + MAGIC
+
+DICT_SIZE = 32 * 1024                # zlib używa co najwyżej 32 KB zdict
+DICT_SAMPLES = 2000                  # rekordy próbki do treningu słownika
+DICT_MIN_RECORDS = 256               # mniej — słownik nie zwraca się
+
+
+def is_zstd_soul(path: str) -> bool:
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def default_codec() -> str:
+    return 'zstd' if ZSTD_AVAILABLE else 'zlib'
+
+
+def _record_line(record: dict) -> bytes:
+    return json.dumps(record, ensure_ascii=False).encode('utf-8')
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# KODEKI
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _train_dictionary(codec: str, samples: List[bytes]) -> Optional[bytes]:
+    """Słownik z próbki linii; None gdy próbka za mała lub trening się nie udał."""
+    if len(samples) < DICT_MIN_RECORDS:
+        return None
+    if codec == 'zstd':
+        try:
+            return zstd.train_dictionary(DICT_SIZE, samples).as_bytes()
+        except zstd.ZstdError:
+            return None
+    # zlib: zdict = tekst, którego fragmenty się powtarzają — najczęstsze na końcu
+    return b"\n".join(samples)[-DICT_SIZE:]
+
+
+class _Compressor:
+    def __init__(self, codec: str, level: int, dictionary: Optional[bytes]):
+        self.codec = codec
+        self.level = level
+        self.dictionary = dictionary
+        if codec == 'zstd':
+            dict_data = zstd.ZstdCompressionDict(dictionary) if dictionary else None
+            self._zstd = zstd.ZstdCompressor(level=level, dict_data=dict_data)
+
+    def compress(self, raw: bytes) -> bytes:
+        if self.codec == 'zstd':
+            return self._zstd.compress(raw)
+        if self.dictionary:
+            c = zlib.compressobj(self.level, zdict=self.dictionary)
+        else:
+            c = zlib.compressobj(self.level)
+        return c.compress(raw) + c.flush()
+
+
+class _Decompressor:
+    """Dekompresor ramek; obiekty zstd są per wątek (nie są thread-safe)."""
+
+    def __init__(self, codec: str, dictionary: Optional[bytes]):
+        if codec == 'zstd' and not ZSTD_AVAILABLE:
+            raise ImportError("plik .soul w formacie zstd wymaga pakietu zstandard (pip install zstandard)")
+        if codec not in ('zstd', 'zlib'):
+            raise ValueError(f"Nieznany kodek SOULZST: {codec}")
+        self.codec = codec
+        self.dictionary = dictionary
+        self._local = threading.local()
+
+    def decompress(self, blob, raw_len: int) -> bytes:
+        if self.codec == 'zstd':
+            d = getattr(self._local, 'zstd', None)
+            if d is None:
+                dict_data = zstd.ZstdCompressionDict(self.dictionary) if self.dictionary else None
+                d = self._local.zstd = zstd.ZstdDecompressor(dict_data=dict_data)
+            return d.decompress(blob, max_output_size=raw_len)
+        d = zlib.decompressobj(zdict=self.dictionary) if self.dictionary else zlib.decompressobj()
+        return d.decompress(blob) + d.flush()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ODCZYT
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class ZstdSoul:
+    """Plik SOULZST: indeks ramek wczytany od razu, ramki — na żądanie."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path}: to nie jest plik SOULZST")
+            size = f.seek(0, os.SEEK_END)
+            f.seek(size - _TRAILER.size)
+            index_offset, magic = _TRAILER.unpack(f.read(_TRAILER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path}: uszkodzony plik SOULZST (brak indeksu)")
+            f.seek(index_offset)
+            index = json.loads(f.read(size - _TRAILER.size - index_offset))
+            dictionary = None
+            if index.get('dict'):
+                off, length = index['dict']
+                f.seek(off)
+                dictionary = f.read(length)
+        if index.get('version', 1) > FORMAT_VERSION:
+            raise ValueError(f"Nieobsługiwana wersja SOULZST: {index['version']}")
+        self.codec: str = index['codec']
+        self.count: int = index['count']
+        self.meta: dict = index.get('meta', {})
+        # [offset, długość, rekordy, bajty po dekompresji]
+        self.frames: List[List[int]] = index['frames']
+        self._decompressor = _Decompressor(self.codec, dictionary)
+
+    def __len__(self) -> int:
+        return self.count
+
+    @staticmethod
+    def _parse(raw: bytes) -> List[dict]:
+        return [json.loads(line) for line in raw.decode('utf-8').split("\n") if line]
+
+    def frame(self, i: int) -> List[dict]:
+        """Rekordy jednej ramki — odczyt tylko jej bajtów."""
+        off, length, _, raw_len = self.frames[i]
+        with open(self.path, 'rb') as f:
+            f.seek(off)
+            blob = f.read(length)
+        return self._parse(self._decompressor.decompress(blob, raw_len))
+
+    def raw_frames(self, workers: Optional[int] = None) -> Iterator[bytes]:
+        """Zdekompresowane ramki w kolejności zapisu; dekompresja równoległa."""
+        if not self.frames:
+            return
+        start = self.frames[0][0]
+        end = self.frames[-1][0] + self.frames[-1][1]
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            data = memoryview(f.read(end - start))
+        jobs = [(data[off - start:off - start + length], raw_len) for off, length, _, raw_len in self.frames]
+        workers = min(max(1, workers or _WORKERS), len(jobs))
+        if workers == 1:
+            for blob, raw_len in jobs:
+                yield self._decompressor.decompress(blob, raw_len)
+            return
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="soul-zstd") as pool:
+            yield from pool.map(lambda job: self._decompressor.decompress(*job), jobs)
+
+    def records(self, workers: Optional[int] = None) -> Iterator[Tuple[str, dict]]:
+        count = 0
+        for raw in self.raw_frames(workers):
+            for record in self._parse(raw):
+                count += 1
+                yield record.get('id', f"Mem_{count:05d}"), record
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ZAPIS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def write_soul_zstd(items: Iterable[Tuple[str, dict]], path: str, meta: Optional[dict] = None,
+                    codec: Optional[str] = None, level: Optional[int] = None,
+                    block: Optional[int] = None, use_dict: Optional[bool] = None,
+                    encode: Callable[[dict], bytes] = _record_line) -> dict:
+    """
+    Zapisuje (mem_id, rekord) do pliku SOULZST (wołający dba o tmp + replace).
+    encode — rekord → linia UTF-8 (FractalMemory ponawia ją pod lockiem).
+    Zwraca indeks pliku.
+    """
+    codec = codec or default_codec()
+    if codec == 'zstd' and not ZSTD_AVAILABLE:
+        codec = 'zlib'
+    level = _LEVEL if level is None else level
+    block = max(1, block or _BLOCK)
+    use_dict = _USE_DICT if use_dict is None else use_dict
+
+    lines = (encode(rec) for _, rec in items)
+    # Próbka do słownika: pierwsze rekordy — potem idą do ramek jak reszta
+    head = list(islice(lines, DICT_SAMPLES)) if use_dict else []
+    dictionary = _train_dictionary(codec, head) if head else None
+    compressor = _Compressor(codec, level, dictionary)
+    lines = chain(head, lines)
+    del head
+
+    index = {'version': FORMAT_VERSION, 'codec': codec, 'level': level,
+             'count': 0, 'dict': None, 'frames': [], 'meta': meta or {}}
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        if dictionary:
+            index['dict'] = [f.tell(), len(dictionary)]
+            f.write(dictionary)
+        while True:
+            chunk = list(islice(lines, block))
+            if not chunk:
+                break
+            raw = b"\n".join(chunk) + b"\n"
+            blob = compressor.compress(raw)
+            index['frames'].append([f.tell(), len(blob), len(chunk), len(raw)])
+            index['count'] += len(chunk)
+            f.write(blob)
+        index_offset = f.tell()
+        f.write(json.dumps(index, ensure_ascii=False).encode('utf-8'))
+        f.write(_TRAILER.pack(index_offset, MAGIC))
+        f.flush()
+        os.fsync(f.fileno())
+    return index
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# KONWERSJA
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _read_any(path: str) -> Tuple[List[Tuple[str, dict]], dict]:
+    from soul_binary import BinarySoul, is_binary_soul, _read_jsonl
+    if is_binary_soul(path):
+        soul = BinarySoul(path)
+        return list(soul.records()), dict(soul.meta)
+    return _read_jsonl(path)
+
+
+def to_zstd(src: str, dst: str) -> int:
+    items, meta = _read_any(src)
+    write_soul_zstd(items, dst, meta=meta)
+    return len(items)
+
+
+def zstd_to_jsonl(src: str, dst: str) -> int:
+    soul = ZstdSoul(src)
+    with open(dst, 'w', encoding='utf-8') as f:
+        meta = dict(soul.meta)
+        meta['_type'] = '@META'
+        f.write(json.dumps(meta, ensure_ascii=False) + "\n")
+        for raw in soul.raw_frames():
+            f.write(raw.decode('utf-8'))
+    return len(soul)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Użycie: python soul_zstd.py <źródło> <cel>")
+        sys.exit(1)
+    src, dst = sys.argv[1], sys.argv[2]
+    if is_zstd_soul(src):
+        count = zstd_to_jsonl(src, dst)
+        print(f"SOULZST → JSONL: {count} rekordów → {dst}")
+    else:
+        count = to_zstd(src, dst)
+        size_src, size_dst = os.path.getsize(src), os.path.getsize(dst)
+        print(f"→ SOULZST ({default_codec()}): {count} rekordów, "
+              f"{size_src / 1024:.0f} KB → {size_dst / 1024:.0f} KB ({size_src / max(1, size_dst):.1f}×)")
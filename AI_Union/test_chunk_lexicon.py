@@ -0,0 +1,84 @@
+# test_chunk_lexicon.py
+
+import os
+
+from checkpoint import CheckpointManager
+from chunk_lexicon import ChunkLexicon
+
+
+def _checkpoints(lex, data_dir):
+    cp = CheckpointManager(data_dir=data_dir, parallel=False)
+    cp.register('chunks', lex.save_chunks, generation=lambda: lex.revision, files=[lex.chunk_file])
+    cp.register('chunk_sketch', lex.save_sketch,
+                generation=lambda: lex.sketch_revision, files=[lex.sketch_file])
+    return cp
+
+
+def test_admission_progress_survives_checkpoint(tmp_path):
+    chunk_file = str(tmp_path / "chunks.json")
+    lex = ChunkLexicon(chunk_file=chunk_file, admit_count=3)
+    cp = _checkpoints(lex, str(tmp_path))
+    cp.checkpoint()
+
+    # Dwa wystąpienia — za mało na chunk, zmienia się tylko sketch
+    lex.extract_chunks_from_text("ciepły wiatr")
+    lex.extract_chunks_from_text("ciepły wiatr")
+    assert lex.total_chunks == 0
+    assert cp.dirty() == ['chunk_sketch']
+    chunks_mtime = os.stat(chunk_file).st_mtime_ns
+    cp.checkpoint()
+    assert cp.dirty() == []
+    assert os.stat(chunk_file).st_mtime_ns == chunks_mtime
+
+    restarted = ChunkLexicon(chunk_file=chunk_file, admit_count=3)
+    restarted.extract_chunks_from_text("ciepły wiatr")
+    assert 'ciepły wiatr' in restarted.chunks
+    assert restarted.chunks['ciepły wiatr'].frequency == 3
+
+
+def test_eviction_ageing_marks_sketch_dirty(tmp_path):
+    lex = ChunkLexicon(chunk_file=str(tmp_path / "chunks.json"), admit_count=2)
+    for i in range(6):
+        lex.extract_chunks_from_text(f"słowo{i} inne{i}")
+        lex.extract_chunks_from_text(f"słowo{i} inne{i}")
+    assert lex.total_chunks == 6
+
+    before = lex.sketch_revision
+    lex._evict()   # poniżej limitu — sketch bez zmian
+    assert lex.sketch_revision == before
+    lex.max_chunks = 4
+    assert lex._evict() > 0
+    assert lex.sketch_revision == before + 1
+
+
+def _reference_analysis(lex, text):
+    """Stary przegląd: chunki od najdłuższych (stabilnie), każda pozycja od lewej."""
+    words = text.lower().split()
+    found, covered = [], set()
+    for c_obj in sorted(lex.chunks.values(), key=lambda c: c.length, reverse=True):
+        for i in range(len(words) - c_obj.length + 1):
+            span = set(range(i, i + c_obj.length))
+            if words[i:i + c_obj.length] == c_obj.words and not span & covered:
+                found.append(c_obj.text)
+                covered |= span
+    return found, len(covered) / len(words)
+
+
+def test_analysis_matches_longest_first_reference(tmp_path):
+    import random
+    lex = ChunkLexicon(chunk_file=str(tmp_path / "chunks.json"), admit_count=1)
+    # Zachłanne od lewej wzięłoby "a b" — reguła "najpierw dłuższe" bierze "b c d"
+    lex.extract_chunks_from_text("a b")
+    lex.extract_chunks_from_text("x b c d")
+    result = lex.analyze_text_chunks("a b c d", verbose=False)
+    assert result['chunks_found'] == ['b c d']
+    assert result['coverage'] == 0.75
+
+    rng = random.Random(9)
+    vocab = "a b c d e f".split()
+    for _ in range(40):
+        lex.extract_chunks_from_text(' '.join(rng.choices(vocab, k=rng.randint(2, 7))))
+    for _ in range(200):
+        text = ' '.join(rng.choices(vocab, k=rng.randint(1, 20)))
+        result = lex.analyze_text_chunks(text, verbose=False)
+        assert (result['chunks_found'], result['coverage']) == _reference_analysis(lex, text)
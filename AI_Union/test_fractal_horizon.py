@@ -0,0 +1,165 @@
+# test_fractal_horizon.py
+
+import numpy as np
+import pytest
+
+from fractal_horizon import FractalHorizon
+from fractal_memory import FractalMemory
+
+
+def _record(mem_id, vec, rec_type='@MEMORY'):
+    return {
+        'id': mem_id, 'tresc': f"wspomnienie {mem_id} o świecie",
+        'wektor_C_Def': list(vec), '_type': rec_type, 'weight': 0.6,
+        'fractal': {'depth': 2, 'parent_id': None, 'children_ids': []},
+    }
+
+
+def _baseline_recall_combined(fh, query, query_vector, fractal_d_map, top_k=5, depth=1.0):
+    """recall_combined() sprzed v1.7 — pętla po całym fractal_d_map."""
+    quantum_results = {
+        r['id']: r['resonance']
+        for r in fh.recall(query, query_vector, top_k=top_k * 3, depth=depth)
+    }
+    q_norm = np.linalg.norm(query_vector)
+    proustian_scores = {}
+    if q_norm > 1e-10:
+        for mem_id, record in fractal_d_map.items():
+            if record.get('_type') == '@META':
+                continue
+            vec = np.array(record.get('wektor_C_Def', np.zeros(15)))
+            v_norm = np.linalg.norm(vec)
+            if v_norm < 1e-10:
+                continue
+            cosine = np.dot(query_vector, vec) / (q_norm * v_norm)
+            if cosine > 0.3:
+                proustian_scores[mem_id] = cosine
+
+    combined = []
+    for mem_id in set(quantum_results) | set(proustian_scores):
+        if mem_id not in fractal_d_map:
+            continue
+        q_score = quantum_results.get(mem_id, 0.0)
+        p_score = proustian_scores.get(mem_id, 0.0)
+        if q_score > 0 and p_score > 0:
+            score = np.sqrt(q_score * p_score)
+        else:
+            score = max(q_score, p_score) * 0.5
+        combined.append({'id': mem_id, 'score': score,
+                         'quantum_resonance': q_score, 'proustian_similarity': p_score})
+    combined.sort(key=lambda x: x['score'], reverse=True)
+    return combined[:top_k]
+
+
+def _assert_same(result, expected):
+    assert [r['id'] for r in result] == [r['id'] for r in expected]
+    for got, want in zip(result, expected):
+        for key in ('score', 'quantum_resonance', 'proustian_similarity'):
+            assert got[key] == pytest.approx(want[key], rel=1e-5, abs=1e-9)
+
+
+@pytest.fixture
+def horizon(tmp_path):
+    return FractalHorizon(data_dir=str(tmp_path / "horizon"), evolution='analytic')
+
+
+def _populate(d_map, fh, rng, synced=40, unsynced=25):
+    for i in range(synced + unsynced):
+        record = _record(f"M{i:03d}", rng.random(15))
+        d_map[record['id']] = record
+        if i < synced:
+            fh.sync_from_fractal(record)
+    d_map['@META'] = _record('@META', rng.random(15), rec_type='@META')
+
+
+def test_recall_combined_includes_records_missing_from_horizon(horizon):
+    rng = np.random.default_rng(3)
+    d_map = {}
+    _populate(d_map, horizon, rng)
+    for _ in range(5):
+        query_vector = rng.random(15)
+        result = horizon.recall_combined("świat", query_vector, d_map, top_k=20)
+        expected = _baseline_recall_combined(horizon, "świat", query_vector, d_map, top_k=20)
+        _assert_same(result, expected)
+        assert any(r['id'] not in horizon.quanta for r in result)
+        assert all(r['id'] != '@META' for r in result)
+
+
+def test_recall_combined_missing_records_from_memory_matrix(horizon, tmp_path):
+    rng = np.random.default_rng(5)
+    memory = FractalMemory(soul_file=str(tmp_path / "test.soul"), wal=False)
+    _populate(memory.D_Map, horizon, rng)
+    query_vector = rng.random(15)
+    result = horizon.recall_combined("świat", query_vector, memory.D_Map, top_k=20)
+    expected = _baseline_recall_combined(horizon, "świat", query_vector, memory.D_Map, top_k=20)
+    _assert_same(result, expected)
+
+
+def test_recall_combined_empty_horizon_scores_d_map(horizon):
+    d_map = {'A': _record('A', np.eye(15)[0]), 'B': _record('B', np.eye(15)[1])}
+    result = horizon.recall_combined("", np.eye(15)[0], d_map, top_k=5)
+    assert [r['id'] for r in result] == ['A']
+    assert result[0]['score'] == pytest.approx(0.5)
+    assert horizon.recall_combined("", np.eye(15)[0], {}, top_k=5) == []
+
+
+def test_phase_evolution_does_not_bump_revision(tmp_path):
+    rng = np.random.default_rng(7)
+    for evolution in ('analytic', 'step'):
+        fh = FractalHorizon(data_dir=str(tmp_path / evolution), evolution=evolution)
+        for i in range(10):
+            fh.sync_from_fractal(_record(f"M{i}", rng.random(15)))
+        revision = fh.revision
+        fh.advance(force=True)
+        fh.recall("świat", rng.random(15), top_k=3)
+        assert fh.revision == revision
+        fh.reinforce("M1")
+        assert fh.revision > revision
+
+
+def _grown(fh, d_map):
+    before = {mem_id: q.curvature for mem_id, q in fh.quanta.items()}
+    fh.auto_decay(d_map, max_age_hours=0.0)
+    return {mem_id for mem_id, q in fh.quanta.items() if q.curvature > before[mem_id]}
+
+
+def test_auto_decay_uses_columns_kept_by_d_map_hooks(horizon, tmp_path):
+    memory = FractalMemory(soul_file=str(tmp_path / "test.soul"), ann=False, wal=False)
+    memory.horizon = horizon
+    rng = np.random.default_rng(11)
+    for i in range(6):
+        record = _record(f"M{i}", rng.random(15))
+        record['weight'] = 0.4
+        record['fractal']['depth'] = 2 if i in (3, 5) else 1
+        memory.D_Map[record['id']] = record
+        horizon.sync_from_fractal(record)
+
+    replaced = dict(memory.D_Map['M1'], weight=0.9)
+    memory.D_Map['M1'] = replaced          # hook → touch()
+    memory.D_Map['M2']['fractal']['depth'] = 2
+    horizon.touch('M2', memory.D_Map['M2'])
+    del memory.D_Map['M3']                 # hook → detach(): waga 0.5, głębokość 1
+    memory.D_Map['M4']['weight'] = 0.9     # w miejscu, bez touch() — kolumna bez zmian
+
+    # auto_decay nie czyta słownika — wynik tylko z kolumn
+    assert _grown(horizon, {}) == {'M0', 'M3', 'M4'}
+
+    memory.D_Map.clear()                   # hook → detach() wszystkich
+    assert _grown(horizon, {}) == {f"M{i}" for i in range(6)}
+
+
+def test_touch_and_sync_all_detach_orphans(horizon):
+    rng = np.random.default_rng(13)
+    d_map = {}
+    for i in range(4):
+        record = _record(f"M{i}", rng.random(15))
+        d_map[record['id']] = record
+    horizon.sync_all_from_fractal(d_map)
+
+    revision = horizon.revision
+    horizon.touch('M0', d_map['M0'])
+    assert horizon.revision == revision
+
+    del d_map['M1']
+    horizon.sync_all_from_fractal(d_map)
+    assert _grown(horizon, {}) == {'M1'}
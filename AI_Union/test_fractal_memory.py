@@ -0,0 +1,40 @@
+# test_fractal_memory.py
+
+import json
+
+import pytest
+
+from fractal_memory import FractalMemory
+from soul_binary import jsonl_to_binary, LazyRecord
+
+
+def _plain(record):
+    return dict(record.materialize()) if isinstance(record, LazyRecord) else dict(record)
+
+
+@pytest.mark.parametrize('soul_format', ['binary', 'zstd'])
+def test_same_d_map_for_every_soul_format(tmp_path, soul_format):
+    src = tmp_path / "stara.soul"
+    lines = [{'_type': '@META', 'version': '1.0'}]
+    for i in range(4):
+        record = {'tresc': f"wspomnienie {i}", 'wektor_C_Def': [0.1 * i] * 15,
+                  '_type': '@MEMORY', 'weight': 0.5}
+        if i % 2:
+            record['id'] = f"Mem_x{i}"   # część rekordów bez pola 'id' (stary zapis)
+        lines.append(record)
+    src.write_text("\n".join(json.dumps(r, ensure_ascii=False) for r in lines) + "\n",
+                   encoding='utf-8')
+
+    reference = FractalMemory(soul_file=str(src), ann=False, wal=False)
+    dst = tmp_path / f"{soul_format}.soul"
+    if soul_format == 'binary':
+        jsonl_to_binary(str(src), str(dst))
+    else:
+        dst.write_bytes(src.read_bytes())
+        FractalMemory(soul_file=str(dst), ann=False, wal=False, soul_format='zstd').compact()
+    loaded = FractalMemory(soul_file=str(dst), ann=False, wal=False)
+
+    assert sorted(loaded.D_Map) == sorted(reference.D_Map)
+    for mem_id, record in reference.D_Map.items():
+        assert _plain(loaded.D_Map[mem_id]) == record
+        assert loaded.D_Map[mem_id]['id'] == mem_id
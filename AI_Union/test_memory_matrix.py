@@ -0,0 +1,60 @@
+# test_memory_matrix.py
+
+import numpy as np
+import pytest
+
+from memory_matrix import DMapMatrix
+
+
+def _record(mem_id, vec, weight=0.5):
+    return {'id': mem_id, 'tresc': f"wspomnienie {mem_id}", 'wektor_C_Def': list(vec),
+            '_type': '@MEMORY', 'weight': weight}
+
+
+def _row(matrix, mem_id):
+    row = matrix.row_of(mem_id)
+    return matrix.vectors[row], float(matrix.weights[row])
+
+
+def test_replaced_record_under_same_key_refreshes_row():
+    memory = DMapMatrix({'A': _record('A', np.eye(15)[0]), 'B': _record('B', np.eye(15)[1])})
+    # /remember dwa razy w tej samej sekundzie — ten sam klucz, długość bez zmian
+    memory.D_Map['A'] = _record('A', np.eye(15)[2], weight=0.9)
+    vec, weight = _row(memory.matrix, 'A')
+    assert np.array_equal(vec, np.eye(15, dtype=np.float32)[2])
+    assert weight == pytest.approx(0.9)
+    assert len(memory.matrix) == 2
+
+
+def test_delete_then_add_keeps_ids_in_sync():
+    memory = DMapMatrix({f"M{i}": _record(f"M{i}", np.eye(15)[i]) for i in range(4)})
+    del memory.D_Map['M1']
+    memory.D_Map['N0'] = _record('N0', np.eye(15)[5])
+    assert sorted(memory.matrix.ids) == sorted(memory.D_Map) == ['M0', 'M2', 'M3', 'N0']
+    assert memory.D_Map.pop('M2')['id'] == 'M2'
+    assert 'M2' not in memory.matrix
+
+    memory.D_Map['M0']['weight'] = 0.2
+    memory.touch('M0')
+    assert _row(memory.matrix, 'M0')[1] == pytest.approx(0.2)
+
+    memory.D_Map.clear()
+    assert len(memory.matrix) == 0
+
+
+def test_hooks_notify_horizon():
+    calls = []
+
+    class Horizon:
+        def touch(self, mem_id, record):
+            calls.append(('touch', mem_id))
+
+        def detach(self, mem_ids=None):
+            calls.append(('detach', mem_ids))
+
+    memory = DMapMatrix()
+    memory.horizon = Horizon()
+    memory.D_Map['A'] = _record('A', np.eye(15)[0])
+    del memory.D_Map['A']
+    memory.D_Map.clear()
+    assert calls == [('touch', 'A'), ('detach', ['A']), ('detach', None)]
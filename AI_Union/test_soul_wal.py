@@ -0,0 +1,213 @@
+# test_soul_wal.py
+
+import json
+import os
+
+import pytest
+
+import soul_lock
+from fractal_memory import FractalMemory
+from soul_lock import SoulLock, read_generation, write_generation
+from soul_wal import SoulWAL, apply_entry
+
+needs_locking = pytest.mark.skipif(not soul_lock.LOCKING_AVAILABLE,
+                                   reason="brak fcntl — jeden proces na duszę")
+
+
+def _record(mem_id, depth=1):
+    return {
+        'id': mem_id, 'tresc': f"wspomnienie {mem_id}",
+        'wektor_C_Def': [0.1] * 15, '_type': '@MEMORY', 'weight': 0.5,
+        'fractal': {'depth': depth, 'parent_id': None, 'children_ids': []},
+    }
+
+
+def _replayed(wal, after_seq=0):
+    return [(e['seq'], e['op'], e.get('id')) for e in wal.replay(after_seq=after_seq)]
+
+
+@pytest.fixture
+def soul(tmp_path):
+    return str(tmp_path / "test.soul")
+
+
+# ─────────────────────────────────────────────────────────────
+# URWANA LINIA
+# ─────────────────────────────────────────────────────────────
+
+def test_replay_skips_torn_last_line(soul):
+    with SoulWAL(soul) as wal:
+        wal.put('A', _record('A'))
+        wal.put('B', _record('B'))
+        wal.delete('A')
+    with open(soul + ".wal", 'ab') as f:
+        f.write(b'{"seq": 4, "op": "put", "id": "C", "rec": {"tre')
+
+    with SoulWAL(soul) as wal:
+        assert _replayed(wal) == [(1, 'put', 'A'), (2, 'put', 'B'), (3, 'del', 'A')]
+        assert wal.seq == 3
+        # Nowy wpis zaczyna się od nowej linii, za urwanym fragmentem
+        assert wal.put('D', _record('D')) == 4
+
+    with SoulWAL(soul) as wal:
+        assert _replayed(wal) == [(1, 'put', 'A'), (2, 'put', 'B'), (3, 'del', 'A'), (4, 'put', 'D')]
+    with open(soul + ".wal", 'rb') as f:
+        lines = f.read().split(b"\n")
+    assert json.loads(lines[-2])['id'] == 'D'
+
+
+def test_fractal_memory_loads_wal_with_torn_line(soul):
+    memory = FractalMemory(soul_file=soul, ann=False, wal=True)
+    memory.D_Map['A'] = _record('A')
+    memory.D_Map['B'] = _record('B')
+    memory.wal.close()
+    with open(soul + ".wal", 'ab') as f:
+        f.write(b'{"seq": 3, "op": "del", "i')
+
+    reloaded = FractalMemory(soul_file=soul, ann=False, wal=True)
+    assert sorted(reloaded.D_Map) == ['A', 'B']
+    reloaded.D_Map['C'] = _record('C')
+    assert reloaded.wal.seq == 3
+
+
+# ─────────────────────────────────────────────────────────────
+# ROTACJA / KOMPAKCJA
+# ─────────────────────────────────────────────────────────────
+
+def test_rotate_keeps_both_segments_until_discard(soul):
+    with SoulWAL(soul) as wal:
+        wal.put('A', _record('A'))
+        wal.put('B', _record('B'))
+        assert wal.rotate() == 2
+        assert wal.segments() == [wal.rotated_path]
+        assert wal.put('C', _record('C')) == 3
+        assert wal.segments() == [wal.rotated_path, wal.path]
+
+        assert [seq for seq, _, _ in _replayed(wal)] == [1, 2, 3]
+        assert _replayed(wal, after_seq=2) == [(3, 'put', 'C')]
+
+        wal.discard_rotated()
+        assert wal.segments() == [wal.path]
+        assert _replayed(wal) == [(3, 'put', 'C')]
+
+
+def test_rotate_appends_to_unfinished_compaction(soul):
+    with SoulWAL(soul) as wal:
+        wal.put('A', _record('A'))
+        wal.rotate()
+        # Kompakcja przerwana przed discard_rotated() — kolejna rotacja skleja segmenty
+        wal.put('B', _record('B'))
+        assert wal.rotate() == 2
+        assert not os.path.exists(wal.path)
+        assert _replayed(wal) == [(1, 'put', 'A'), (2, 'put', 'B')]
+
+
+def test_compact_round_trip(soul):
+    memory = FractalMemory(soul_file=soul, ann=False, wal=True)
+    for i in range(6):
+        memory.D_Map[f"M{i}"] = _record(f"M{i}", depth=1 + i % 3)
+    del memory.D_Map['M2']
+    assert memory.compact()
+    assert memory.wal.segments() == []
+
+    memory.D_Map['M9'] = _record('M9')
+    assert memory.wal.segments() == [memory.wal.path]
+
+    reloaded = FractalMemory(soul_file=soul, ann=False, wal=True)
+    assert sorted(reloaded.D_Map) == ['M0', 'M1', 'M3', 'M4', 'M5', 'M9']
+    assert reloaded.D_Map['M4']['fractal']['depth'] == 2
+    assert reloaded.generation == memory.generation
+    # Numeracja po kompakcji kontynuuje licznik
+    reloaded.D_Map['M10'] = _record('M10')
+    assert reloaded.wal.seq == 9
+
+
+# ─────────────────────────────────────────────────────────────
+# DWÓCH PISZĄCYCH
+# ─────────────────────────────────────────────────────────────
+
+@needs_locking
+def test_generation_counter_in_lock_file(soul):
+    lock = SoulLock(soul)
+    with lock.appending() as fd:
+        assert read_generation(fd) == 0
+        write_generation(fd, 41)
+    with SoulLock(soul).appending() as fd:
+        assert read_generation(fd) == 41
+
+
+@needs_locking
+def test_two_writers_interleave_unique_seqs(soul):
+    with SoulWAL(soul) as a, SoulWAL(soul) as b:
+        assert a.put('A1', _record('A1')) == 1
+        assert b.put('B1', _record('B1')) == 2
+        assert a.put('A2', _record('A2')) == 3
+        assert b.delete('A1') == 4
+
+        assert [e['seq'] for e in a.poll()] == [2, 4]
+        assert [e['seq'] for e in b.poll()] == [1, 3]
+        assert a.poll() == [] and b.poll() == []
+
+        d_map = {}
+        for entry in SoulWAL(soul).replay():
+            apply_entry(d_map, entry)
+        assert sorted(d_map) == ['A2', 'B1']
+
+
+@needs_locking
+def test_writer_catches_up_after_foreign_compaction(soul):
+    with SoulWAL(soul) as a, SoulWAL(soul) as b:
+        a.put('A1', _record('A1'))
+        b.poll()
+        b.close()
+        # Segment z wpisami 2-3 zrotowany i usunięty, zanim b go przeczytał
+        a.put('A2', _record('A2'))
+        a.put('A3', _record('A3'))
+        a.rotate()
+        a.discard_rotated()
+
+        assert b.poll() == []
+        assert b.stale
+        assert b.put('B1', _record('B1')) == 4
+        assert a.put('A4', _record('A4')) == 5
+        assert [e['seq'] for e in a.poll()] == [4]
+
+
+@needs_locking
+def test_writer_follows_rotation_by_other_process(soul):
+    with SoulWAL(soul) as a, SoulWAL(soul) as b:
+        b.put('B1', _record('B1'))
+        a.put('A1', _record('A1'))
+        a.rotate()
+        # b trzyma deskryptor starego segmentu — dopisuje już do nowego
+        assert b.put('B2', _record('B2')) == 3
+        assert not b.stale
+        assert [e['seq'] for e in b.take_foreign()] == [2]
+        assert a.poll()[-1]['id'] == 'B2'
+        assert _replayed(SoulWAL(soul)) == [(1, 'put', 'B1'), (2, 'put', 'A1'), (3, 'put', 'B2')]
+
+
+@needs_locking
+def test_two_fractal_memories_see_each_other(soul):
+    first = FractalMemory(soul_file=soul, ann=False, wal=True)
+    second = FractalMemory(soul_file=soul, ann=False, wal=True)
+
+    first.D_Map['A'] = _record('A')
+    assert second.refresh() == 1
+    second.D_Map['B'] = _record('B', depth=2)
+    del second.D_Map['A']
+    assert first.refresh() == 2
+    assert sorted(first.D_Map) == sorted(second.D_Map) == ['B']
+
+    # Kompakcja pierwszego, zanim drugi przeczytał nowe wpisy
+    second.wal.close()
+    first.D_Map['C'] = _record('C')
+    assert first.compact()
+    second.refresh()
+    assert not second.wal.stale
+    assert sorted(second.D_Map) == ['B', 'C']
+
+    second.D_Map['D'] = _record('D')
+    assert first.refresh() == 1
+    assert first.wal.seq == second.wal.seq
+    assert sorted(FractalMemory(soul_file=soul, ann=False, wal=True).D_Map) == ['B', 'C', 'D']
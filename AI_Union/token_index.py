@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+token_index.py v1.0.0
+Indeks odwrócony treści wspomnień: token → zbiór mem_id (posting list).
+
+Zamiast re.findall(r'\\w+', tresc.lower()) dla każdego rekordu przy każdym
+zapytaniu — tokenizacja raz, przy zapisie rekordu do D_Map. Liczba wspólnych
+słów zapytania i wspomnienia = liczba list postingowych słów zapytania,
+w których występuje mem_id.
+
+Indeks utrzymuje FractalMemory (hooki _IndexedDMap), więc obejmuje
+store(), load(), /read, /remember i pruning bez dodatkowych wywołań.
+"""
+
+import re
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Iterable, List, Set
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def word_tokens(text: str) -> List[str]:
+    """Tokenizacja jak w AII: re.findall(r'\\w+', text.lower())."""
+    return _WORD_RE.findall(text.lower())
+
+
+def split_tokens(text: str) -> List[str]:
+    """Tokenizacja po białych znakach (ścieżka PFC / _find_memories_for_chunk)."""
+    return text.lower().split()
+
+
+class InvertedIndex:
+    """Posting listy token → mem_id dla jednej funkcji tokenizującej."""
+
+    def __init__(self, tokenizer: Callable[[str], List[str]] = word_tokens):
+        self.tokenizer = tokenizer
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._postings)
+
+    def add(self, mem_id: str, text: str):
+        for token in set(self.tokenizer(text or '')):
+            self._postings[token].add(mem_id)
+
+    def remove(self, mem_id: str, text: str):
+        """Usuwa mem_id z list tokenów tekstu (ten sam tekst co przy add)."""
+        for token in set(self.tokenizer(text or '')):
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            posting.discard(mem_id)
+            if not posting:
+                del self._postings[token]
+
+    def clear(self):
+        self._postings.clear()
+
+    def postings(self, token: str) -> Set[str]:
+        return self._postings.get(token, set())
+
+    def overlap(self, words: Iterable[str]) -> Counter:
+        """mem_id → liczba słów zapytania obecnych w treści (tylko kandydaci > 0)."""
+        counts = Counter()
+        for word in set(words):
+            posting = self._postings.get(word)
+            if posting:
+                counts.update(posting)
+        return counts
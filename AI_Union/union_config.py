@@ -144,6 +144,46 @@ class UnionConfig:
     MEMORY_DECAY = 0.95
     EMOTION_DECAY = 0.85
     MAX_MEMORY_SIZE = 10000
+    # Indeks LSH dla auto_link/auto_parent w FractalMemory.store().
+    # False = pełny skan cosinusowy (do weryfikacji wyników ANN)
+    FRACTAL_ANN = True
+    # Dziennik WAL (.soul.wal) — save() dopisuje operacje zamiast przepisywać .soul.
+    # False = każdy save() przepisuje cały plik (stare zachowanie)
+    SOUL_WAL = True
+    # Kompakcja w tle gdy WAL > max(MIN_BYTES, RATIO × rozmiar snapshotu)
+    SOUL_COMPACT_MIN_BYTES = 4 * 1024 * 1024
+    SOUL_COMPACT_RATIO = 0.5
+    # Format snapshotu zapisywanego przez kompakcję: 'jsonl', 'binary' lub 'zstd'
+    # (SOULBIN: memmap + leniwa treść; odczyt rozpoznaje każdy format)
+    SOUL_FORMAT = 'jsonl'
+    # 'zstd' — skompresowany snapshot SOULZST (soul_zstd.py): niezależne ramki
+    # po SOUL_ZSTD_BLOCK rekordów, dekompresowane równolegle przy odczycie.
+    # Bez pakietu zstandard zapis używa zlib (ten sam kontener)
+    SOUL_ZSTD_LEVEL = 3        # 9 — ok. 10% mniejszy plik, wolniejsza kompakcja
+    SOUL_ZSTD_BLOCK = 1024     # rekordów na ramkę (jednostka odczytu punktowego)
+    SOUL_ZSTD_DICT = False     # słownik trenowany na rekordach — zwraca się przy dużej duszy
+    SOUL_ZSTD_WORKERS = 4      # wątki dekompresji przy load()
+    # Punkt kontrolny (checkpoint.py): save() zapisuje tylko komponenty ze
+    # zmienionym licznikiem; kilka zmienionych — równolegle w wątkach
+    CHECKPOINT_PARALLEL = True
+    CHECKPOINT_WORKERS = 4
+    # Zapis w tle (PersistenceWorker): /read, /remember, /activate tylko zgłaszają
+    # zapis; żądania w tym oknie [s] sklejane w jeden checkpoint
+    PERSIST_COALESCE_S = 0.25
+    # Ewolucja kwantów FractalHorizon: 'analytic' — faza/energia liczone z czasu
+    # przy ocenie (recall tylko czyta), 'step' — recall ewoluuje każdy kwant
+    HORIZON_EVOLUTION = 'analytic'
+    HORIZON_PHASE_RATE = 0.001        # dt ewolucji na sekundę
+    HORIZON_ADVANCE_INTERVAL = 60.0   # min. odstęp advance() w cyklu uwagi [s]
+    # Fazy kwantów z treści dla NOWYCH horyzontów: 'hash' — licznikowy hash
+    # (wektorowo), 'legacy' — RandomState jak przed v1.6 (te same fazy co dotąd).
+    # Wczytany horyzont zawsze zostaje przy schemacie, z którym powstał.
+    HORIZON_PHASE_SEEDING = 'hash'
+    
+    # === JĘZYK (ChunkLexicon) ===
+    CHUNK_MAX = 50000                  # limit chunków — powyżej eviction LFU z zanikiem
+    CHUNK_ADMIT_COUNT = 2              # wystąpień n-gramu przed admisją (1 = od razu)
+    CHUNK_DECAY_TAU = 7 * 24 * 3600.0  # stała zaniku score eviction [s]
     
     # === MUZYKA ===
     DEFAULT_BPM = 120
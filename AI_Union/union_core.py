@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 """
-union_core.py v2.1.1
+union_core.py v2.3.1
 Serce systemu.
+v2.3.1: stop() zgłasza nieudany zapis w tle (flush() → False); save() poniżej go ponawia
+v2.3.0: stop() czeka na zapisy w tle (aii.persistence.flush()) przed końcowym zapisem
+v2.2.0: stop() kompaktuje WAL pamięci fraktalnej do pełnego snapshotu .soul
 FIX v2.1.1: guard przed AttributeError gdy chunk_lexicon=None w stop()
 FIX v2.1.0: Głośne raportowanie zapisu danych przy zamykaniu.
 """
@@ -47,8 +50,17 @@ class EriAmoUnion:
         
         if self.aii:
             print(f"{Colors.YELLOW}║ 💾 Zapisywanie pamięci (D_Map)...    ║{Colors.RESET}")
+            # Bariera: zapisy zgłoszone w tle (/read, /remember) muszą się skończyć
+            persistence = getattr(self.aii, "persistence", None)
+            if persistence is not None and not persistence.flush():
+                print(f"{Colors.RED}║ ⚠ Zapis w tle nieudany: {persistence.last_error}{Colors.RESET}")
             # Wymuszamy zapis
             self.aii.save()
+            # save() tylko fsync-uje WAL — przy zamknięciu pełny snapshot .soul
+            # (obejmuje też zmiany w miejscu, których hooki D_Map nie widzą)
+            fractal = getattr(self.aii, "fractal_memory", None)
+            if fractal is not None:
+                fractal.compact()
             
             # Raport
             count = len(self.aii.D_Map)